@@ -20,7 +20,62 @@
 # the GNU General Public License along with this program.  If not,
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
-from .version import *
-from .lsstCamMapper import *
-from .filters import *
-from ._instrument import *
+
+"""LSST cameras for the LSST Data Management System.
+
+The mapper, filter and instrument classes exported by this package depend
+on most of the LSST software stack, so they are imported on first use.
+This keeps ``import lsst.obs.lsst.translators`` and other lightweight
+users of the package fast. The metadata translators are always imported,
+so that importing this package registers them.
+"""
+
+import importlib
+
+from .version import *  # noqa: F401,F403
+from . import version as _version
+from . import translators  # noqa: F401 -- register the translators
+
+# Names exported by this package and the module defining each of them.
+_LAZY_EXPORTS = {
+    "LsstCamMapper": "lsstCamMapper",
+    "LsstCamMakeRawVisitInfo": "lsstCamMapper",
+    "LSSTCAM_FILTER_DEFINITIONS": "filters",
+    "LATISS_FILTER_DEFINITIONS": "filters",
+    "LSSTCAM_IMSIM_FILTER_DEFINITIONS": "filters",
+    "TS3_FILTER_DEFINITIONS": "filters",
+    "TS8_FILTER_DEFINITIONS": "filters",
+    "COMCAM_FILTER_DEFINITIONS": "filters",
+    "FilterIndex": "filters",
+    "getFilterIndex": "filters",
+    "LsstCam": "_instrument",
+    "LsstCamImSim": "_instrument",
+    "LsstCamPhoSim": "_instrument",
+    "LsstTS8": "_instrument",
+    "Latiss": "_instrument",
+    "LsstTS3": "_instrument",
+    "LsstUCDCam": "_instrument",
+    "LsstComCam": "_instrument",
+}
+
+# Submodules that importing this package used to make available as
+# attributes, through the modules that defined the exports above.
+_LAZY_SUBMODULES = ("lsstCamMapper", "filters", "_instrument", "_fitsHeader", "assembly")
+
+__all__ = tuple(getattr(_version, "__all__", ())) + tuple(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    """Import exported classes and submodules on first use."""
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(f".{_LAZY_EXPORTS[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
@@ -0,0 +1,126 @@
+# This file is part of obs_lsst.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Bounded in-process caches.
+"""
+
+__all__ = ("LruCache",)
+
+import threading
+from collections import OrderedDict
+
+
+class LruCache:
+    """A thread-safe mapping that discards the least recently used entry
+    once it holds ``maxsize`` entries.
+
+    Parameters
+    ----------
+    maxsize : `int`
+        Maximum number of entries to keep.
+    """
+
+    def __init__(self, maxsize):
+        if maxsize < 1:
+            raise ValueError(f"Cache size must be positive, not {maxsize}")
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """Return the value for a key, marking it as recently used.
+
+        Parameters
+        ----------
+        key : hashable
+            Key to look up.
+        default : `object`, optional
+            Value to return if the key is not cached.
+
+        Returns
+        -------
+        value : `object`
+            The cached value or ``default``.
+        """
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def put(self, key, value):
+        """Store a value, discarding the oldest entry if the cache is full.
+
+        Parameters
+        ----------
+        key : hashable
+            Key to store.
+        value : `object`
+            Value to associate with the key.
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove a key from the cache.
+
+        Parameters
+        ----------
+        key : hashable
+            Key to remove.
+        default : `object`, optional
+            Value to return if the key is not cached.
+
+        Returns
+        -------
+        value : `object`
+            The value that was removed, or ``default``.
+        """
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def discard(self, predicate):
+        """Remove all entries whose key matches a predicate.
+
+        Parameters
+        ----------
+        predicate : callable
+            Function taking a key and returning `True` if the entry should
+            be removed.
+        """
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,231 @@
+# This file is part of obs_lsst.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""On-disk cache of the camera geometry built from the YAML policy files.
+"""
+
+__all__ = ("CAMERA_CACHE_ENV", "CAMERA_CACHE_SUFFIX", "makeCachedCamera", "cameraCacheFiles",
+           "clearCameraCache")
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+
+import lsst.log
+import lsst.obs.base.yamlCamera as yamlCamera
+from lsst.afw.cameraGeom import Camera
+
+CAMERA_CACHE_ENV = "OBS_LSST_CAMERA_CACHE"
+"""Environment variable naming the directory to hold the cached cameras.
+If not set, the cache is written to the user cache directory or, if that
+is not writable, next to the policy file."""
+
+CAMERA_CACHE_SUFFIX = ".camera.fits"
+"""Suffix of the files caching a camera."""
+
+# Incremented whenever the cached content changes for the same policy file.
+_CAMERA_CACHE_VERSION = 1
+
+logger = lsst.log.Log.getLogger("obs.lsst.cameraCache")
+
+# Cameras already read by this process, indexed by cache file name.
+_cameras = {}
+_camerasLock = threading.Lock()
+
+# Digests of the policy files, indexed by (name, st_mtime_ns, st_size).
+_digests = {}
+
+
+def _hashFile(fileName):
+    """Return the SHA-256 digest of the content of a file.
+
+    The digest is only computed again if the modification time or size of
+    the file has changed.
+    """
+    stat = os.stat(fileName)
+    key = (fileName, stat.st_mtime_ns, stat.st_size)
+    digest = _digests.get(key)
+    if digest is None:
+        hasher = hashlib.sha256()
+        with open(fileName, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                hasher.update(block)
+        digest = hasher.hexdigest()
+        _digests[key] = digest
+    return digest
+
+
+def _cacheFileName(root, digest):
+    """Return the name of the file caching the camera of a policy file."""
+    return f"{root}-{digest[:16]}-v{_CAMERA_CACHE_VERSION}{CAMERA_CACHE_SUFFIX}"
+
+
+def cameraCacheFiles(cameraYamlFile):
+    """Return the possible locations of the cached camera for a policy file.
+
+    Parameters
+    ----------
+    cameraYamlFile : `str`
+        Full path to the camera policy file.
+
+    Returns
+    -------
+    cacheFiles : `list` of `str`
+        Cache files in order of preference. The names include the hash of
+        the content of the policy file, so a changed policy file never
+        uses a stale cache. The directory of the policy file is only used
+        if `CAMERA_CACHE_ENV` is not set, and after the user cache
+        directory.
+    """
+    cameraYamlFile = os.path.abspath(cameraYamlFile)
+    root, _ = os.path.splitext(os.path.basename(cameraYamlFile))
+    name = _cacheFileName(root, _hashFile(cameraYamlFile))
+
+    cacheDir = os.environ.get(CAMERA_CACHE_ENV)
+    if cacheDir:
+        return [os.path.join(cacheDir, name)]
+    userCacheDir = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+                                "obs_lsst")
+    return [os.path.join(userCacheDir, name), os.path.join(os.path.dirname(cameraYamlFile), name)]
+
+
+def _removeStaleCacheFiles(cacheFile):
+    """Remove the files caching earlier versions of the same policy file.
+
+    Parameters
+    ----------
+    cacheFile : `str`
+        The current cache file, which is kept.
+
+    Notes
+    -----
+    Failure to remove a file is not an error.
+    """
+    cacheDir, name = os.path.split(cacheFile)
+    root = name[:-len(CAMERA_CACHE_SUFFIX)].rsplit("-", 2)[0]
+    pattern = re.compile(re.escape(root) + r"-[0-9a-f]{16}-v\d+" + re.escape(CAMERA_CACHE_SUFFIX) + "$")
+    for entry in os.scandir(cacheDir):
+        if entry.name != name and pattern.match(entry.name):
+            try:
+                os.unlink(entry.path)
+                logger.debug("Removed stale camera cache %s", entry.path)
+            except OSError:
+                pass
+
+
+def _readCachedCamera(cacheFile):
+    """Read a cached camera, returning `None` if it can not be read."""
+    if not os.path.exists(cacheFile):
+        return None
+    try:
+        return Camera.readFits(cacheFile)
+    except Exception as e:
+        # For example a file written by an incompatible version of afw
+        logger.warn("Ignoring unreadable camera cache %s: %s", cacheFile, e)
+        return None
+
+
+def _writeCachedCamera(camera, cacheFiles):
+    """Write a camera to the first writable cache location.
+
+    Notes
+    -----
+    Failure to write the cache is not an error.
+    """
+    for cacheFile in cacheFiles:
+        cacheDir = os.path.dirname(cacheFile)
+        try:
+            os.makedirs(cacheDir, exist_ok=True)
+            fd, tmpFile = tempfile.mkstemp(dir=cacheDir, suffix=".tmp")
+            os.close(fd)
+        except OSError:
+            continue
+        try:
+            camera.writeFits(tmpFile)
+            os.replace(tmpFile, cacheFile)
+        except Exception as e:
+            logger.debug("Unable to write camera cache %s: %s", cacheFile, e)
+            try:
+                os.unlink(tmpFile)
+            except OSError:
+                pass
+            continue
+        logger.debug("Wrote camera cache %s", cacheFile)
+        _removeStaleCacheFiles(cacheFile)
+        return cacheFile
+    return None
+
+
+def makeCachedCamera(cameraYamlFile):
+    """Construct the camera described by a YAML policy file, using a cached
+    copy if one exists.
+
+    Parameters
+    ----------
+    cameraYamlFile : `str`
+        Full path to the camera policy file.
+
+    Returns
+    -------
+    camera : `lsst.afw.cameraGeom.Camera`
+        Camera geometry.
+
+    Notes
+    -----
+    The camera built from the policy file is written with the afw table
+    persistence of `~lsst.afw.cameraGeom.Camera` to a FITS file whose name
+    includes the hash of the policy file. Later calls, in this or any other
+    process, read that file instead of building the camera again. Within a
+    process the same camera object is returned for the same policy file
+    content.
+    """
+    cacheFiles = cameraCacheFiles(cameraYamlFile)
+    with _camerasLock:
+        for cacheFile in cacheFiles:
+            camera = _cameras.get(cacheFile)
+            if camera is not None:
+                return camera
+
+        for cacheFile in cacheFiles:
+            camera = _readCachedCamera(cacheFile)
+            if camera is not None:
+                logger.debug("Using cached camera %s for %s", cacheFile, cameraYamlFile)
+                break
+        else:
+            camera = yamlCamera.makeCamera(cameraYamlFile)
+            cacheFile = _writeCachedCamera(camera, cacheFiles) or cacheFiles[0]
+
+        _cameras[cacheFile] = camera
+        return camera
+
+
+def clearCameraCache():
+    """Forget the cameras read by this process.
+
+    Notes
+    -----
+    The cache files are not removed.
+    """
+    with _camerasLock:
+        _cameras.clear()
+        _digests.clear()
@@ -21,12 +21,116 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 
-__all__ = ("readRawFitsHeader",)
+__all__ = ("readRawFitsHeader", "readPrimaryAndDataMetadata", "clearRawHeaderCache",
+           "cacheRawFitsHeader", "scanRawFitsHeader")
 
+import os
 import re
 from astro_metadata_translator import fix_header, merge_headers
 import lsst.afw.fits
 
+from ._cache import LruCache
+from ._fitsMmap import FITS_BLOCK_SIZE, parseHeaderCards
+from .translators.lsst import LsstBaseTranslator
+
+RAW_HEADER_CACHE_SIZE = 1024
+"""Maximum number of fixed raw headers to remember."""
+
+_rawHeaderCache = LruCache(RAW_HEADER_CACHE_SIZE)
+
+
+def _rawHeaderCacheKey(fileName, translator_class):
+    """Return the key identifying a fixed header in the cache.
+
+    Parameters
+    ----------
+    fileName : `str`
+        Name of the FITS file, possibly including a HDU specifier.
+    translator_class : `~astro_metadata_translator.MetadataTranslator`
+        Translator class used to fix the header.
+
+    Returns
+    -------
+    key : `tuple` or `None`
+        Absolute file name, modification time, size and translator class.
+        `None` if the file can not be examined.
+    """
+    path = re.sub(r"\[\d+\]$", "", fileName)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (os.path.abspath(path), fileName, stat.st_mtime_ns, stat.st_size, translator_class)
+
+
+def clearRawHeaderCache(fileName=None):
+    """Forget cached raw headers.
+
+    Parameters
+    ----------
+    fileName : `str`, optional
+        Only forget the headers read from this file. If `None` the whole
+        cache is cleared.
+
+    Notes
+    -----
+    Entries are also invalidated automatically when the modification time
+    or size of a file changes.
+    """
+    if fileName is None:
+        _rawHeaderCache.clear()
+    else:
+        path = os.path.abspath(re.sub(r"\[\d+\]$", "", fileName))
+        _rawHeaderCache.discard(lambda key: key[0] == path)
+
+
+def cacheRawFitsHeader(fileName, translator_class, md):
+    """Remember a fixed raw header read by other means.
+
+    Parameters
+    ----------
+    fileName : `str`
+        Name of the FITS file the header was read from.
+    translator_class : `~astro_metadata_translator.MetadataTranslator`
+        Translator class used to fix the header.
+    md : `PropertyList`
+        The merged, fixed header, as `readRawFitsHeader` would return it.
+        A copy is stored.
+    """
+    key = _rawHeaderCacheKey(fileName, translator_class)
+    if key is not None:
+        _rawHeaderCache.put(key, md.deepCopy())
+
+
+def readPrimaryAndDataMetadata(fits):
+    """Read the primary header and the default data header from an
+    open FITS file.
+
+    Parameters
+    ----------
+    fits : `lsst.afw.fits.Fits`
+        Open FITS file handle. The current HDU is changed by this function.
+
+    Returns
+    -------
+    phdu : `PropertyList`
+        Metadata from the primary HDU.
+    md : `PropertyList`
+        Metadata from the first HDU containing data. If the primary
+        header sets ``INHERIT`` this will already include the primary
+        header content.
+
+    Notes
+    -----
+    Reading both headers through a single file handle avoids opening and
+    seeking the same file twice, which dominates on network file systems.
+    """
+    fits.setHdu(0)
+    phdu = lsst.afw.fits.readMetadata(fits)
+    fits.setHdu(lsst.afw.fits.DEFAULT_HDU)
+    md = lsst.afw.fits.readMetadata(fits)
+    return phdu, md
+
 
 def readRawFitsHeader(fileName, translator_class=None):
     """Read a FITS header from a raw file and fix it up as required.
@@ -47,7 +151,21 @@ def readRawFitsHeader(fileName, translator_class=None):
         next HDU if an ``INHERIT`` key is not specified. If an explicit
         HDU is encoded with the file name and it is greater than 0 then
         no merging will occur.
+
+    Notes
+    -----
+    Headers are cached in-process on the file name, modification time,
+    size and translator class, so that a file is only parsed and fixed once
+    however many components ask for its header.  A copy is returned each
+    time so callers are free to modify it.  Use `clearRawHeaderCache` to
+    forget cached headers explicitly.
     """
+    key = _rawHeaderCacheKey(fileName, translator_class)
+    if key is not None:
+        cached = _rawHeaderCache.get(key)
+        if cached is not None:
+            return cached.deepCopy()
+
     mat = re.search(r"\[(\d+)\]$", fileName)
     hdu = None
     if mat:
@@ -63,9 +181,154 @@ def readRawFitsHeader(fileName, translator_class=None):
         # For raw some of these files need the second header to be
         # read as well. Not all instruments want the double read
         # but for now it's easiest to always merge.
-        phdu = lsst.afw.fits.readMetadata(fileName, 0)
-        md = lsst.afw.fits.readMetadata(fileName)
+        fits = lsst.afw.fits.Fits(fileName, "r")
+        try:
+            phdu, md = readPrimaryAndDataMetadata(fits)
+        finally:
+            fits.closeFile()
         md = merge_headers([phdu, md], mode="overwrite")
 
     fix_header(md, translator_class=translator_class)
+    if key is not None:
+        _rawHeaderCache.put(key, md.deepCopy())
     return md
+
+
+def _translatorKeywords(translator_class):
+    """Return the header keywords needed by a translator.
+
+    Parameters
+    ----------
+    translator_class : `LsstBaseTranslator` or `None`
+        Translator that will be used. If `None` the keywords of every
+        LSST translator are returned so that the translator can still be
+        determined from the header.
+
+    Returns
+    -------
+    keywords : `frozenset` of `str`
+        Keywords to read.
+    prefixes : `tuple` of `str`
+        Prefixes of further keywords to read.
+    """
+    if translator_class is not None:
+        return translator_class.header_keywords()
+
+    keywords = set()
+    prefixes = set()
+    pending = [LsstBaseTranslator]
+    while pending:
+        translator = pending.pop()
+        classKeywords, classPrefixes = translator.header_keywords()
+        keywords.update(classKeywords)
+        prefixes.update(classPrefixes)
+        pending.extend(translator.__subclasses__())
+    return frozenset(keywords), tuple(sorted(prefixes))
+
+
+def _readHeaderBlocks(fd):
+    """Read the header blocks of the HDU starting at the current position.
+
+    Parameters
+    ----------
+    fd : file-like
+        File opened in binary mode, positioned at the start of a header.
+
+    Returns
+    -------
+    blocks : `bytes`
+        All the header blocks, up to and including the one holding the
+        ``END`` card. Empty if the end of the file has been reached.
+    """
+    blocks = bytearray()
+    while True:
+        block = fd.read(FITS_BLOCK_SIZE)
+        if len(block) < FITS_BLOCK_SIZE:
+            return bytes(blocks) if not block else bytes(blocks + block)
+        blocks += block
+        for pos in range(0, FITS_BLOCK_SIZE, 80):
+            if block[pos:pos + 8] == b"END     ":
+                return bytes(blocks)
+
+
+def _scanPrimaryAndDataHeaders(fd, keywords, prefixes):
+    """Parse selected cards from the primary and first data headers.
+
+    Parameters
+    ----------
+    fd : file-like
+        FITS file opened in binary mode, positioned at the start.
+    keywords : `frozenset` of `str`
+        Keywords to parse.
+    prefixes : `tuple` of `str`
+        Prefixes of further keywords to parse.
+
+    Returns
+    -------
+    header : `dict`
+        The primary header cards overwritten by those of the first
+        extension if the primary HDU holds no data.
+    """
+    blocks = _readHeaderBlocks(fd)
+    header, _ = parseHeaderCards(blocks, keywords=keywords | {"NAXIS"}, prefixes=prefixes)
+    hasData = bool(header.get("NAXIS"))
+    if "NAXIS" not in keywords:
+        header.pop("NAXIS", None)
+
+    if not hasData:
+        # The primary HDU holds no data so it is immediately followed by
+        # the first extension, whose cards take precedence.
+        blocks = _readHeaderBlocks(fd)
+        if blocks:
+            extension, _ = parseHeaderCards(blocks, keywords=keywords, prefixes=prefixes)
+            header.update(extension)
+    return header
+
+
+def scanRawFitsHeader(fileName, translator_class=None):
+    """Read only the translator-relevant cards of a raw FITS header.
+
+    This is a lightweight alternative to `readRawFitsHeader` for
+    metadata-only processing such as ingest. The header blocks are read
+    straight from disk and only the keywords declared by the translator
+    (see `LsstBaseTranslator.header_keywords`) are parsed.
+
+    Parameters
+    ----------
+    fileName : `str`
+        Name of the FITS file.
+    translator_class : `LsstBaseTranslator`, optional
+        Translator class to use for fixing up the header. If `None` the
+        keywords used by any of the LSST translators are read.
+
+    Returns
+    -------
+    header : `dict`
+        The fixed header, suitable for constructing an
+        `~astro_metadata_translator.ObservationInfo`. The primary header
+        is merged with the first data header in the same way as
+        `readRawFitsHeader`.
+
+    Notes
+    -----
+    Files that are not plain FITS files (for example gzip-compressed
+    files) and file names that include an HDU specifier are handed over
+    to `readRawFitsHeader`. Tile-compressed images are supported since
+    their headers are stored uncompressed.
+    """
+    keywords, prefixes = _translatorKeywords(translator_class)
+
+    header = None
+    if not re.search(r"\[\d+\]$", fileName):
+        with open(fileName, "rb") as fd:
+            if fd.read(6) == b"SIMPLE":
+                fd.seek(0)
+                header = _scanPrimaryAndDataHeaders(fd, keywords, prefixes)
+
+    if header is None:
+        md = readRawFitsHeader(fileName, translator_class=translator_class)
+        return {k: md[k] for k in md.names()
+                if k in keywords or (prefixes and k.startswith(prefixes))}
+
+    fix_header(header, translator_class=translator_class)
+    return header
@@ -0,0 +1,312 @@
+# This file is part of obs_lsst.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Memory-mapped access to the pixels of uncompressed FITS files.
+"""
+
+__all__ = ("FITS_BLOCK_SIZE", "parseHeaderCards", "MappedFitsFile")
+
+import mmap
+from dataclasses import dataclass
+
+import numpy as np
+
+FITS_BLOCK_SIZE = 2880
+"""Size in bytes of a FITS header or data block."""
+
+_CARD_SIZE = 80
+
+# Big-endian numpy types corresponding to the FITS BITPIX values.
+_BITPIX_DTYPES = {8: ">u1", 16: ">i2", 32: ">i4", 64: ">i8", -32: ">f4", -64: ">f8"}
+
+
+def _parseCardValue(text):
+    """Convert the value part of a FITS card to a python value.
+
+    Parameters
+    ----------
+    text : `str`
+        The card content following the value indicator.
+
+    Returns
+    -------
+    value : `str`, `bool`, `int`, `float` or `None`
+        The value. `None` is returned for an undefined value.
+    """
+    text = text.lstrip()
+    if text.startswith("'"):
+        # Strings end at the first single quote that is not doubled
+        chars = []
+        i = 1
+        while i < len(text):
+            if text[i] == "'":
+                if text[i + 1:i + 2] == "'":
+                    chars.append("'")
+                    i += 2
+                    continue
+                break
+            chars.append(text[i])
+            i += 1
+        return "".join(chars).rstrip()
+
+    text = text.split("/", 1)[0].strip()
+    if not text:
+        return None
+    if text == "T":
+        return True
+    if text == "F":
+        return False
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text.replace("D", "E"))
+    except ValueError:
+        # Complex values and anything else we do not understand are
+        # returned unparsed.
+        return text
+
+
+def parseHeaderCards(buffer, offset=0, keywords=None, prefixes=()):
+    """Parse a FITS header starting at the given byte offset.
+
+    Parameters
+    ----------
+    buffer : `bytes`-like
+        Buffer containing the header blocks.
+    offset : `int`, optional
+        Byte offset of the start of the header.
+    keywords : `set` of `str`, optional
+        If given, only these keywords are converted to values. All other
+        cards are skipped without being parsed.
+    prefixes : `tuple` of `str`, optional
+        Keywords starting with any of these prefixes are also converted
+        when ``keywords`` is given.
+
+    Returns
+    -------
+    header : `dict`
+        Keyword to value mapping. Commentary cards are not included.
+    dataOffset : `int`
+        Byte offset of the first data block following the header.
+
+    Raises
+    ------
+    ValueError
+        Raised if no ``END`` card is found in the buffer.
+    """
+    header = {}
+    lastKey = None
+    pos = offset
+    end = len(buffer)
+    while pos + _CARD_SIZE <= end:
+        card = bytes(buffer[pos:pos + _CARD_SIZE]).decode("ascii", errors="replace")
+        pos += _CARD_SIZE
+        key = card[:8].rstrip()
+        if key == "END":
+            # Skip to the end of the current block
+            nblocks = (pos - offset + FITS_BLOCK_SIZE - 1) // FITS_BLOCK_SIZE
+            return header, offset + nblocks*FITS_BLOCK_SIZE
+
+        if key == "CONTINUE" and lastKey is not None:
+            previous = header[lastKey]
+            if isinstance(previous, str) and previous.endswith("&"):
+                header[lastKey] = previous[:-1] + _parseCardValue(card[8:])
+            continue
+
+        if key == "HIERARCH":
+            if "=" not in card:
+                continue
+            key, value = card[9:].split("=", 1)
+            key = key.strip()
+        elif card[8:10] == "= ":
+            value = card[10:]
+        else:
+            # Commentary card
+            lastKey = None
+            continue
+
+        if keywords is not None and key not in keywords and \
+                not (prefixes and key.startswith(prefixes)):
+            lastKey = None
+            continue
+
+        header[key] = _parseCardValue(value)
+        lastKey = key
+
+    raise ValueError("No END card found in FITS header")
+
+
+@dataclass(frozen=True)
+class _HduLayout:
+    """Location of a single HDU within a FITS file."""
+
+    header: dict
+    """Keyword to value mapping of the HDU header."""
+
+    dataOffset: int
+    """Byte offset of the start of the data."""
+
+    dataSize: int
+    """Size of the data in bytes, excluding padding."""
+
+
+class MappedFitsFile:
+    """A read-only memory map of a FITS file.
+
+    The HDU layout is computed once when the file is opened and image
+    pixels are exposed as numpy views over the mapped file, so that no
+    copy is made until the pixels are used.
+
+    Parameters
+    ----------
+    fileName : `str`
+        Name of the FITS file.
+
+    Raises
+    ------
+    ValueError
+        Raised if the file does not look like a plain FITS file (for
+        example if it is gzip-compressed).
+    """
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        with open(fileName, "rb") as fd:
+            self._map = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:6] != b"SIMPLE":
+            self.close()
+            raise ValueError(f"File {fileName} is not an uncompressed FITS file")
+        self._hdus = self._scan()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Release the memory map.
+
+        Notes
+        -----
+        Pixel views handed out by `getImageArray` keep the mapping alive, so
+        the mapping is only released once they are no longer referenced.
+        """
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # Views are still in use; the mapping is released when the
+                # last of them is garbage collected.
+                pass
+            self._map = None
+
+    def _scan(self):
+        """Compute the layout of all HDUs in the file."""
+        hdus = []
+        offset = 0
+        size = len(self._map)
+        while offset < size:
+            header, dataOffset = parseHeaderCards(self._map, offset)
+            naxis = header.get("NAXIS", 0)
+            nelem = 0
+            if naxis > 0:
+                nelem = 1
+                for i in range(1, naxis + 1):
+                    nelem *= header[f"NAXIS{i}"]
+            dataSize = abs(header.get("BITPIX", 8))//8 * header.get("GCOUNT", 1) * \
+                (header.get("PCOUNT", 0) + nelem)
+            hdus.append(_HduLayout(header, dataOffset, dataSize))
+            offset = dataOffset + (dataSize + FITS_BLOCK_SIZE - 1)//FITS_BLOCK_SIZE*FITS_BLOCK_SIZE
+        return hdus
+
+    def __len__(self):
+        return len(self._hdus)
+
+    def getHeader(self, hdu):
+        """Return the header of an HDU.
+
+        Parameters
+        ----------
+        hdu : `int`
+            Zero-based HDU index.
+
+        Returns
+        -------
+        header : `dict`
+            Keyword to value mapping.
+        """
+        return self._hdus[hdu].header
+
+    def isPlainImage(self, hdu):
+        """Indicate whether an HDU holds an uncompressed 2-d image.
+
+        Parameters
+        ----------
+        hdu : `int`
+            Zero-based HDU index.
+
+        Returns
+        -------
+        isImage : `bool`
+            `True` if the pixels can be mapped directly.
+        """
+        if hdu >= len(self._hdus):
+            return False
+        header = self._hdus[hdu].header
+        if hdu > 0 and header.get("XTENSION") != "IMAGE":
+            # Tile-compressed images are stored as binary tables
+            return False
+        return header.get("NAXIS") == 2 and header.get("BITPIX") in _BITPIX_DTYPES
+
+    def getImageArray(self, hdu):
+        """Return the pixels of an image HDU as a view over the mapped file.
+
+        Parameters
+        ----------
+        hdu : `int`
+            Zero-based HDU index.
+
+        Returns
+        -------
+        array : `numpy.ndarray`
+            Read-only, big-endian, ``(NAXIS2, NAXIS1)`` array of the stored
+            values. ``BSCALE`` and ``BZERO`` have not been applied.
+        bscale : `float`
+            Scale to apply to the stored values.
+        bzero : `float`
+            Offset to apply to the stored values.
+
+        Raises
+        ------
+        ValueError
+            Raised if the HDU is not a plain image.
+        """
+        if not self.isPlainImage(hdu):
+            raise ValueError(f"HDU {hdu} of {self.fileName} is not an uncompressed image")
+        layout = self._hdus[hdu]
+        header = layout.header
+        shape = (header["NAXIS2"], header["NAXIS1"])
+        array = np.ndarray(shape, dtype=_BITPIX_DTYPES[header["BITPIX"]], buffer=self._map,
+                           offset=layout.dataOffset)
+        return array, float(header.get("BSCALE", 1.0)), float(header.get("BZERO", 0.0))
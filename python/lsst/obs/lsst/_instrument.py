@@ -24,14 +24,15 @@ __all__ = ("LsstCam", "LsstCamImSim", "LsstCamPhoSim", "LsstTS8",
 
 import os.path
 
-import lsst.obs.base.yamlCamera as yamlCamera
 from lsst.daf.butler.core.utils import getFullTypeName
 from lsst.utils import getPackageDir
 from lsst.obs.base import Instrument
 from lsst.obs.base.gen2to3 import TranslatorFactory
+from ._cameraCache import makeCachedCamera
 from .filters import (LSSTCAM_FILTER_DEFINITIONS, LATISS_FILTER_DEFINITIONS,
                       LSSTCAM_IMSIM_FILTER_DEFINITIONS, TS3_FILTER_DEFINITIONS,
                       TS8_FILTER_DEFINITIONS, COMCAM_FILTER_DEFINITIONS,
+                      getFilterIndex,
                       )
 
 from .translators import LatissTranslator, LsstCamTranslator, \
@@ -95,15 +96,52 @@ class LsstCam(Instrument):
 
     @classmethod
     def getCamera(cls):
-        # Constructing a YAML camera takes a long time but we rely on
-        # yamlCamera to cache for us.
+        # Constructing a YAML camera takes a long time so the result is
+        # cached on disk, keyed by the content of the policy file.
         cameraYamlFile = os.path.join(PACKAGE_DIR, "policy", f"{cls.policyName}.yaml")
-        camera = yamlCamera.makeCamera(cameraYamlFile)
+        camera = makeCachedCamera(cameraYamlFile)
         if camera.getName() != cls.getName():
             raise RuntimeError(f"Expected to read camera geometry for {cls.instrument}"
                                f" but instead got geometry for {camera.getName()}")
         return camera
 
+    @classmethod
+    def getFilterIndex(cls):
+        """Return the hash index of the filter definitions of this
+        instrument.
+
+        Returns
+        -------
+        index : `lsst.obs.lsst.filters.FilterIndex`
+            Index of every physical filter name and alias.
+        """
+        return getFilterIndex(cls.filterDefinitions)
+
+    @classmethod
+    def normalizePhysicalFilters(cls, columns):
+        """Calculate the canonical physical filter, band and effective
+        wavelength of many headers in one pass.
+
+        Parameters
+        ----------
+        columns : `dict` [`str`, sequence]
+            Mapping of header keyword to the values of that keyword in each
+            header, as accepted by ``compute_physical_filter_array`` of the
+            translator of this instrument.
+
+        Returns
+        -------
+        physicalFilters : `numpy.ndarray` of `str`
+            Canonical physical filter names. Names that are not defined for
+            this instrument are returned as calculated from the headers.
+        bands : `numpy.ndarray` of `object`
+            Band of each filter, `None` if not known.
+        lambdaEffs : `numpy.ndarray` of `float`
+            Effective wavelength of each filter, NaN if not known.
+        """
+        physicalFilters = cls.translatorClass.compute_physical_filter_array(columns)
+        return cls.getFilterIndex().normalize(physicalFilters)
+
     def getRawFormatter(self, dataId):
         # Docstring inherited from Instrument.getRawFormatter
         # local import to prevent circular dependency
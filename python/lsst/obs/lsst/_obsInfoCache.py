@@ -0,0 +1,131 @@
+# This file is part of obs_lsst.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Share translated observation metadata between readers of a header.
+"""
+
+__all__ = ("OBSERVATION_INFO_CACHE_SIZE", "headerFingerprint", "getObservationInfo",
+           "clearObservationInfoCache")
+
+import hashlib
+
+from astro_metadata_translator import ObservationInfo, MetadataTranslator, fix_header
+
+from ._cache import LruCache
+
+OBSERVATION_INFO_CACHE_SIZE = 1024
+"""Maximum number of translated headers to remember."""
+
+_observationInfoCache = LruCache(OBSERVATION_INFO_CACHE_SIZE)
+
+
+def headerFingerprint(header):
+    """Compute a digest of the content of a header.
+
+    Parameters
+    ----------
+    header : `dict` or `lsst.daf.base.PropertyList`
+        Header to examine.
+
+    Returns
+    -------
+    fingerprint : `str`
+        Digest of all the keywords and values in the header. Headers with
+        the same content have the same fingerprint regardless of the order
+        of the keywords.
+    """
+    digest = hashlib.sha1()
+    for key, value in sorted((key, repr(value)) for key, value in header.items()):
+        digest.update(f"{key}\0{value}\n".encode())
+    return digest.hexdigest()
+
+
+def getObservationInfo(header, translator_class=None, pedantic=False, filename=None):
+    """Return the `~astro_metadata_translator.ObservationInfo` for a header,
+    translating it only if the same content has not already been
+    translated.
+
+    Parameters
+    ----------
+    header : `dict` or `lsst.daf.base.PropertyList`
+        Header to translate.
+    translator_class : `~astro_metadata_translator.MetadataTranslator`,
+                       optional
+        Translator to use. If `None` it is determined from the header.
+    pedantic : `bool`, optional
+        Passed to `~astro_metadata_translator.ObservationInfo`.
+    filename : `str`, optional
+        Name of the file the header was read from, used in log messages.
+        It is not part of the cache key, so a cached result may report
+        the file name given by the caller that first translated the
+        header.
+
+    Returns
+    -------
+    obsInfo : `~astro_metadata_translator.ObservationInfo`
+        Translated metadata. The same object is returned to every caller
+        asking for the same content, so it must not be modified.
+
+    Notes
+    -----
+    Reading a raw typically translates the same header several times, for
+    the ingest parse task, the visit info, the WCS and the filter. The
+    translations are cached using a fingerprint of the header content, so
+    modifying a header in place is safe. A result is remembered for both
+    the header as given and the header after the corrections applied by
+    `~astro_metadata_translator.ObservationInfo`.
+
+    As with `~astro_metadata_translator.ObservationInfo`, the header is
+    corrected in place with `~astro_metadata_translator.fix_header`. This
+    also happens when the translation is found in the cache, unless the
+    header is already known to be in its corrected form.
+    """
+    if translator_class is None:
+        # Determined here rather than by ObservationInfo so that callers
+        # that do and do not know the translator share the cached result.
+        translator_class = MetadataTranslator.determine_translator(header, filename=filename)
+    # The file name only labels log messages, so readers that do and do
+    # not know it share the cached result.
+    options = (translator_class, pedantic)
+    fingerprint = headerFingerprint(header)
+    cached = _observationInfoCache.get((fingerprint, *options))
+    if cached is not None:
+        obsInfo, isFixed = cached
+        if not isFixed:
+            fix_header(header, translator_class=translator_class, filename=filename)
+        return obsInfo
+
+    obsInfo = ObservationInfo(header, translator_class=translator_class, pedantic=pedantic,
+                              filename=filename)
+
+    # ObservationInfo applies the header corrections in place, and
+    # later readers will often be given the corrected header.
+    fixedFingerprint = headerFingerprint(header)
+    _observationInfoCache.put((fingerprint, *options), (obsInfo, fixedFingerprint == fingerprint))
+    if fixedFingerprint != fingerprint:
+        _observationInfoCache.put((fixedFingerprint, *options), (obsInfo, True))
+    return obsInfo
+
+
+def clearObservationInfoCache():
+    """Forget all cached translations."""
+    _observationInfoCache.clear()
@@ -19,18 +19,40 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-__all__ = ("attachRawWcsFromBoresight", "fixAmpGeometry", "assembleUntrimmedCcd",
-           "fixAmpsAndAssemble", "readRawAmps")
+__all__ = ("attachRawWcsFromBoresight", "fixAmpGeometry", "assembleUntrimmedCcd", "getUntrimmedAssembler",
+           "fixAmpsAndAssemble", "readRawAmps", "readRawAmpsAndHeader", "readMappedRawAndAssemble",
+           "readRawAndAssemble")
+
+import threading
+
+import numpy as np
 
 import lsst.log
+import lsst.afw.fits
 import lsst.afw.image as afwImage
+import lsst.afw.cameraGeom as cameraGeom
+from lsst.daf.base import PropertyList
 from lsst.obs.base import bboxFromIraf, MakeRawVisitInfoViaObsInfo, createInitialSkyWcs
-from lsst.geom import Box2I, Extent2I
+from lsst.geom import Box2I, Extent2I, Point2I
 from lsst.ip.isr import AssembleCcdTask
-from astro_metadata_translator import ObservationInfo
+from astro_metadata_translator import fix_header, merge_headers
+
+from ._fitsHeader import readPrimaryAndDataMetadata, cacheRawFitsHeader
+from ._fitsMmap import MappedFitsFile
+from ._cache import LruCache
+from ._obsInfoCache import getObservationInfo
 
 logger = lsst.log.Log.getLogger("obs.lsst.assembly")
 
+DETECTOR_CACHE_SIZE = 256
+"""Number of corrected detectors to remember; enough for every detector
+of the LSSTCam focal plane."""
+
+_fixedDetectorCache = LruCache(DETECTOR_CACHE_SIZE)
+
+# Per-thread storage for the untrimmed assembly task
+_threadState = threading.local()
+
 
 def attachRawWcsFromBoresight(exposure, dataIdForErrMsg=None):
     """Attach a WCS by extracting boresight, rotation, and camera geometry from
@@ -50,7 +72,7 @@ def attachRawWcsFromBoresight(exposure, dataIdForErrMsg=None):
     md = exposure.getMetadata()
     # Use the generic version since we do not have a mapper available to
     # tell us a specific translator to use.
-    obsInfo = ObservationInfo(md)
+    obsInfo = getObservationInfo(md)
     visitInfo = MakeRawVisitInfoViaObsInfo.observationInfo2visitInfo(obsInfo, log=logger)
     exposure.getInfo().setVisitInfo(visitInfo)
 
@@ -82,7 +104,7 @@ def fixAmpGeometry(inAmp, bbox, metadata, logCmd=None):
         Amplifier description from camera geometry.
     bbox : `lsst.geom.Box2I`
         The on-disk bounding box of the amplifer image.
-    metadata : `lsst.daf.base.PropertyList`
+    metadata : `lsst.daf.base.PropertyList` or `dict`
         FITS header metadata from the amplifier HDU.
     logCmd : `function`, optional
         Call back to use to issue log messages.  Arguments to this function
@@ -152,7 +174,7 @@ def fixAmpGeometry(inAmp, bbox, metadata, logCmd=None):
     #
     # Only warn about the first amp, use debug for the others
     #
-    d = metadata.toDict()
+    d = metadata.toDict() if hasattr(metadata, "toDict") else metadata
     detsec = bboxFromIraf(d["DETSEC"]) if "DETSEC" in d else None
     datasec = bboxFromIraf(d["DATASEC"]) if "DATASEC" in d else None
     biassec = bboxFromIraf(d["BIASSEC"]) if "BIASSEC" in d else None
@@ -167,7 +189,30 @@ def fixAmpGeometry(inAmp, bbox, metadata, logCmd=None):
     return outAmp, modified
 
 
-def assembleUntrimmedCcd(ccd, exposures):
+def getUntrimmedAssembler():
+    """Return a task for assembling untrimmed CCDs.
+
+    Returns
+    -------
+    task : `lsst.ip.isr.AssembleCcdTask`
+        Task configured with ``doTrim=False``.
+
+    Notes
+    -----
+    Constructing the task validates its config and sets up logging, which
+    is significant when reading thousands of raws.  The task is built once
+    per thread and then reused.
+    """
+    task = getattr(_threadState, "assembleTask", None)
+    if task is None:
+        config = AssembleCcdTask.ConfigClass()
+        config.doTrim = False
+        task = AssembleCcdTask(config=config)
+        _threadState.assembleTask = task
+    return task
+
+
+def assembleUntrimmedCcd(ccd, exposures, assembleTask=None):
     """Assemble an untrimmmed CCD from per-amp Exposure objects.
 
     Parameters
@@ -177,6 +222,10 @@ def assembleUntrimmedCcd(ccd, exposures):
         framework for the assembly of the input amplifier exposures.
     exposures : sequence of `lsst.afw.image.Exposure`
         Per-amplifier images, in the same order as ``amps``.
+    assembleTask : `lsst.ip.isr.AssembleCcdTask`, optional
+        Task to use for the assembly. Must be configured with
+        ``doTrim=False``. If `None` the task returned by
+        `getUntrimmedAssembler` is used.
 
     Returns
     -------
@@ -186,39 +235,85 @@ def assembleUntrimmedCcd(ccd, exposures):
     ampDict = {}
     for amp, exposure in zip(ccd, exposures):
         ampDict[amp.getName()] = exposure
-    config = AssembleCcdTask.ConfigClass()
-    config.doTrim = False
-    assembleTask = AssembleCcdTask(config=config)
+    if assembleTask is None:
+        assembleTask = getUntrimmedAssembler()
     return assembleTask.assembleCcd(ampDict)
 
 
-def fixAmpsAndAssemble(ampExps, msg):
-    """Fix amp geometry and assemble into exposure.
+def _bboxKey(bbox):
+    """Return a hashable representation of a bounding box."""
+    return (bbox.getMinX(), bbox.getMinY(), bbox.getWidth(), bbox.getHeight())
+
+
+def _ampKey(amp):
+    """Return a hashable description of an amplifier."""
+    # The floating point parameters are compared by their bytes so that
+    # unset (NaN) values compare equal.
+    parameters = np.array([amp.getGain(), amp.getReadNoise(), amp.getSaturation(), amp.getSuspectLevel(),
+                           *amp.getLinearityCoeffs()], dtype=np.float64)
+    return (amp.getName(), parameters.tobytes(), amp.getReadoutCorner(), amp.getLinearityType(),
+            _bboxKey(amp.getBBox()), _bboxKey(amp.getRawBBox()), tuple(amp.getRawXYOffset()),
+            amp.getRawFlipX(), amp.getRawFlipY())
+
+
+def _detectorKey(ccd):
+    """Return a hashable description of a detector and its amplifiers.
+
+    Detectors of different cameras can share an ID and serial, for
+    example LSSTCam and its simulations, so the orientation and the
+    amplifiers are described as well.
+    """
+    orientation = ccd.getOrientation()
+    return (ccd.getId(), ccd.getSerial(), ccd.getName(), ccd.getPhysicalType(),
+            tuple(orientation.getFpPosition()), orientation.getYaw().asDegrees(),
+            orientation.getPitch().asDegrees(), orientation.getRoll().asDegrees(),
+            tuple(ccd.getPixelSize()), tuple(_ampKey(amp) for amp in ccd))
+
+
+def _fixDetectorGeometry(ccd, bboxes, metadatas, msg):
+    """Rebuild a detector so that its amplifiers match the on-disk data.
 
     Parameters
     ----------
-    ampExps : sequence of `lsst.afw.image.Exposure`
-        Per-amplifier images.
+    ccd : `~lsst.afw.cameraGeom.Detector`
+        Detector geometry from the camera.
+    bboxes : sequence of `lsst.geom.Box2I`
+        On-disk bounding boxes of the amplifier images, in the same order
+        as the amplifiers in ``ccd``.
+    metadatas : sequence of `lsst.daf.base.PropertyList` or `dict`
+        FITS header of each amplifier HDU.
     msg : `str`
-        Message to add to log and exception output.
+        Message to add to log output.
 
     Returns
     -------
-    exposure : `lsst.afw.image.Exposure`
-        Exposure with the amps combined into a single image.
+    ccd : `~lsst.afw.cameraGeom.Detector`
+        Detector with corrected amplifier geometry.
 
     Notes
     -----
-    The returned exposure does not have any metadata or WCS attached.
-
+    The corrected detector only depends on the camera geometry and the
+    on-disk amp sizes, so it is cached on a description of ``ccd`` and
+    those sizes.  Repeat reads of a CCD with the same readout
+    configuration skip the geometry repair.  The description covers the
+    detector ID, serial and orientation and the properties of every
+    amplifier, so detectors of different cameras, or with different
+    amplifier parameters, do not share a corrected detector.  Only the
+    corrected detectors are kept, and at most `DETECTOR_CACHE_SIZE` of
+    them.
     """
-    if not len(ampExps):
-        raise RuntimeError(f"Unable to read raw_amps for {msg}")
+    for amp, metadata in zip(ccd, metadatas):
+        # check that the book-keeping worked and we got the correct EXTNAME
+        extname = metadata.get("EXTNAME")
+        predictedExtname = f"Segment{amp.getName()[1:]}"
+        if extname is not None and predictedExtname != extname:
+            logger.warn('%s: expected to see EXTNAME == "%s", but saw "%s"', msg, predictedExtname, extname)
+
+    key = (_detectorKey(ccd), tuple(_bboxKey(bbox) for bbox in bboxes))
+    cached = _fixedDetectorCache.get(key)
+    if cached is not None:
+        return cached
 
-    ccd = ampExps[0].getDetector()      # the same (full, CCD-level) Detector is attached to all ampExps
-    #
-    # Check that the geometry in the metadata matches cameraGeom
-    #
     warned = False
 
     def logCmd(s, *args):
@@ -232,47 +327,339 @@ def fixAmpsAndAssemble(ampExps, msg):
     # Rebuild the detector and the amplifiers to use their corrected geometry.
     tempCcd = ccd.rebuild()
     tempCcd.clear()
-    for amp, ampExp in zip(ccd, ampExps):
-        # check that the book-keeping worked and we got the correct EXTNAME
-        extname = ampExp.getMetadata().get("EXTNAME")
-        predictedExtname = f"Segment{amp.getName()[1:]}"
-        if extname is not None and predictedExtname != extname:
-            logger.warn('%s: expected to see EXTNAME == "%s", but saw "%s"', msg, predictedExtname, extname)
-
+    for amp, bbox, metadata in zip(ccd, bboxes, metadatas):
         outAmp, modified = fixAmpGeometry(amp,
-                                          bbox=ampExp.getBBox(),
-                                          metadata=ampExp.getMetadata(),
+                                          bbox=bbox,
+                                          metadata=metadata,
                                           logCmd=logCmd)
         tempCcd.append(outAmp)
 
-    ccd = tempCcd.finish()
+    fixedCcd = tempCcd.finish()
+    _fixedDetectorCache.put(key, fixedCcd)
+    return fixedCcd
+
+
+def fixAmpsAndAssemble(ampExps, msg, assembleTask=None):
+    """Fix amp geometry and assemble into exposure.
+
+    Parameters
+    ----------
+    ampExps : sequence of `lsst.afw.image.Exposure`
+        Per-amplifier images.
+    msg : `str`
+        Message to add to log and exception output.
+    assembleTask : `lsst.ip.isr.AssembleCcdTask`, optional
+        Untrimmed assembly task to use; see `assembleUntrimmedCcd`.
+
+    Returns
+    -------
+    exposure : `lsst.afw.image.Exposure`
+        Exposure with the amps combined into a single image.
+
+    Notes
+    -----
+    The returned exposure does not have any metadata or WCS attached.
+
+    """
+    if not len(ampExps):
+        raise RuntimeError(f"Unable to read raw_amps for {msg}")
+
+    ccd = ampExps[0].getDetector()      # the same (full, CCD-level) Detector is attached to all ampExps
+    #
+    # Check that the geometry in the metadata matches cameraGeom
+    #
+    ccd = _fixDetectorGeometry(ccd,
+                               [ampExp.getBBox() for ampExp in ampExps],
+                               [ampExp.getMetadata() for ampExp in ampExps],
+                               msg)
 
     # Update the data to be combined to point to the newly rebuilt detector.
     for ampExp in ampExps:
         ampExp.setDetector(ccd)
 
-    exposure = assembleUntrimmedCcd(ccd, ampExps)
+    exposure = assembleUntrimmedCcd(ccd, ampExps, assembleTask=assembleTask)
     return exposure
 
 
-def readRawAmps(fileName, detector):
-    """Given a file name read the amps and attach the detector.
+def _calcRawCcdBBox(ccd):
+    """Calculate the bounding box of an untrimmed CCD.
+
+    Parameters
+    ----------
+    ccd : `~lsst.afw.cameraGeom.Detector`
+        Detector geometry.
+
+    Returns
+    -------
+    bbox : `lsst.geom.Box2I`
+        Bounding box covering all the raw amplifier boxes shifted to their
+        assembled positions.
+    """
+    bbox = Box2I()
+    for amp in ccd:
+        ampBBox = amp.getRawBBox()
+        ampBBox.shift(amp.getRawXYOffset())
+        bbox.include(ampBBox)
+    return bbox
+
+
+def _assembleUntrimmedArrays(ccd, ampArrays):
+    """Assemble an untrimmed CCD by copying amp pixels straight into a
+    pre-allocated image.
+
+    Parameters
+    ----------
+    ccd : `~lsst.afw.cameraGeom.Detector`
+        Detector geometry matching the on-disk amps.
+    ampArrays : iterable of `tuple`
+        For each amplifier, in the same order as ``ccd``, a tuple of the
+        raw pixel `numpy.ndarray`, the scale and the offset to apply to
+        the stored values.  This can be a generator so that each amp is
+        decoded only when it is needed.
+
+    Returns
+    -------
+    exposure : `lsst.afw.image.Exposure`
+        Exposure with the amps combined into a single image.
+
+    Notes
+    -----
+    The amps are placed and flipped as in
+    `lsst.afw.cameraGeom.assembleAmplifierRawImage`.
+    """
+    outBBox = _calcRawCcdBBox(ccd)
+    exposure = afwImage.ExposureF(outBBox)
+    outArray = exposure.getImage().getArray()
+    x0, y0 = outBBox.getBegin()
+    for amp, (rawArray, bscale, bzero) in zip(ccd, ampArrays):
+        inBBox = amp.getRawBBox()
+        outAmpBBox = amp.getRawBBox()
+        outAmpBBox.shift(amp.getRawXYOffset())
+
+        ySlice = slice(None, None, -1) if amp.getRawFlipY() else slice(None)
+        xSlice = slice(None, None, -1) if amp.getRawFlipX() else slice(None)
+        inView = rawArray[inBBox.getMinY():inBBox.getMaxY() + 1,
+                          inBBox.getMinX():inBBox.getMaxX() + 1][ySlice, xSlice]
+        outView = outArray[outAmpBBox.getMinY() - y0:outAmpBBox.getMaxY() + 1 - y0,
+                           outAmpBBox.getMinX() - x0:outAmpBBox.getMaxX() + 1 - x0]
+        if bscale != 1.0 or bzero != 0.0:
+            # Scale in double precision as the FITS reader does
+            outView[:] = inView*np.float64(bscale) + bzero
+        else:
+            outView[:] = inView
+        del rawArray, inView
+
+    exposure.setDetector(cameraGeom.makeUpdatedDetector(ccd))
+    return exposure
+
+
+def _headerBBox(metadata):
+    """Return the bounding box of the image described by an HDU header.
+
+    Parameters
+    ----------
+    metadata : `lsst.daf.base.PropertyList` or `dict`
+        Header of an image HDU, which may be tile-compressed.
+
+    Returns
+    -------
+    bbox : `lsst.geom.Box2I`
+        Bounding box of the image, with origin at 0,0.
+    """
+    prefix = "Z" if metadata.get("ZIMAGE") else ""
+    return Box2I(Point2I(0, 0), Extent2I(metadata.get(f"{prefix}NAXIS1"), metadata.get(f"{prefix}NAXIS2")))
+
+
+def readMappedRawAndAssemble(fileName, detector, msg=None):
+    """Assemble an untrimmed CCD from a memory-mapped raw file.
+
+    Parameters
+    ----------
+    fileName : `str`
+        The full path to an uncompressed file containing data from a single
+        CCD.
+    detector : `lsst.afw.cameraGeom.Detector`
+        Detector geometry from the camera.
+    msg : `str`, optional
+        Message to add to log and exception output. Defaults to the
+        file name.
+
+    Returns
+    -------
+    exposure : `lsst.afw.image.Exposure` or `None`
+        Exposure with the amps combined into a single image, as returned by
+        `fixAmpsAndAssemble`. `None` is returned if the amp pixels can
+        not be mapped directly, for example if the file is compressed.
+
+    Notes
+    -----
+    The amp pixels are never copied into per-amp images. Each amp is
+    exposed as a view over the mapped file and converted straight into its
+    place in the assembled image.
+    """
+    if msg is None:
+        msg = fileName
+
+    try:
+        mapped = MappedFitsFile(fileName)
+    except ValueError:
+        return None
+
+    with mapped:
+        hdus = range(1, len(detector) + 1)
+        if not all(mapped.isPlainImage(hdu) for hdu in hdus):
+            return None
+
+        headers = [mapped.getHeader(hdu) for hdu in hdus]
+        ccd = _fixDetectorGeometry(detector, [_headerBBox(h) for h in headers], headers, msg)
+        return _assembleUntrimmedArrays(ccd, (mapped.getImageArray(hdu) for hdu in hdus))
+
+
+def readRawAndAssemble(fileName, detector, msg=None, useMemoryMap=False):
+    """Read a raw file and assemble it into an untrimmed CCD without
+    building per-amp exposures.
 
     Parameters
     ----------
     fileName : `str`
         The full path to a file containing data from a single CCD.
+    detector : `lsst.afw.cameraGeom.Detector`
+        Detector geometry from the camera.
+    msg : `str`, optional
+        Message to add to log and exception output. Defaults to the
+        file name.
+    useMemoryMap : `bool`, optional
+        Try `readMappedRawAndAssemble` first. Off by default.
+
+    Returns
+    -------
+    exposure : `lsst.afw.image.Exposure`
+        Exposure with the amps combined into a single image, equivalent to
+        the result of `fixAmpsAndAssemble` applied to `readRawAmps`.
+
+    Notes
+    -----
+    The amp headers are read first so that the corrected detector geometry
+    and the size of the untrimmed image are known.  Each amp HDU is then
+    decoded in turn and copied into its slice of the pre-allocated image,
+    so at most one amp is held in memory besides the output.
+    """
+    if msg is None:
+        msg = fileName
+
+    if useMemoryMap:
+        exposure = readMappedRawAndAssemble(fileName, detector, msg)
+        if exposure is not None:
+            return exposure
+
+    hdus = range(1, len(detector) + 1)
+    fits = lsst.afw.fits.Fits(fileName, "r")
+    try:
+        headers = []
+        for hdu in hdus:
+            fits.setHdu(hdu)
+            headers.append(lsst.afw.fits.readMetadata(fits))
+        bboxes = [_headerBBox(h) for h in headers]
+        ccd = _fixDetectorGeometry(detector, bboxes, headers, msg)
+
+        def decodeAmps():
+            for hdu, bbox in zip(hdus, bboxes):
+                fits.setHdu(hdu)
+                image = afwImage.ImageF(fits)
+                if image.getBBox() != bbox:
+                    raise RuntimeError(f"{msg}: HDU {hdu} has bounding box {image.getBBox()}"
+                                       f" but its header declares {bbox}")
+                yield image.getArray(), 1.0, 0.0
+
+        return _assembleUntrimmedArrays(ccd, decodeAmps())
+    finally:
+        fits.closeFile()
+
+
+def _readAmps(fits, detector):
+    """Read the amp HDUs from an open FITS file.
+
+    Parameters
+    ----------
+    fits : `lsst.afw.fits.Fits`
+        Open FITS file handle.
     detector : `lsst.afw.cameraGeom.Detector`
         Detector to associate with the amps.
 
     Returns
     -------
     ampExps : `list` of `lsst.afw.image.Exposure`
-       All the individual amps read from the file.
+       All the individual amps, with the header of their HDU attached as
+       metadata.
     """
     amps = []
     for hdu in range(1, len(detector)+1):
-        exp = afwImage.makeExposure(afwImage.makeMaskedImage(afwImage.ImageF(fileName, hdu=hdu)))
+        fits.setHdu(hdu)
+        metadata = PropertyList()
+        exp = afwImage.makeExposure(afwImage.makeMaskedImage(afwImage.ImageF(fits, metadata)))
+        exp.setMetadata(metadata)
         exp.setDetector(detector)
         amps.append(exp)
     return amps
+
+
+def readRawAmps(fileName, detector):
+    """Given a file name read the amps and attach the detector.
+
+    Parameters
+    ----------
+    fileName : `str`
+        The full path to a file containing data from a single CCD.
+    detector : `lsst.afw.cameraGeom.Detector`
+        Detector to associate with the amps.
+
+    Returns
+    -------
+    ampExps : `list` of `lsst.afw.image.Exposure`
+       All the individual amps read from the file.
+
+    Notes
+    -----
+    The file is opened once and the amp HDUs are read in order from the
+    same file handle.
+    """
+    fits = lsst.afw.fits.Fits(fileName, "r")
+    try:
+        return _readAmps(fits, detector)
+    finally:
+        fits.closeFile()
+
+
+def readRawAmpsAndHeader(fileName, detector, translator_class=None):
+    """Read the amps and the merged raw header from a file in a single
+    pass.
+
+    Parameters
+    ----------
+    fileName : `str`
+        The full path to a file containing data from a single CCD.
+    detector : `lsst.afw.cameraGeom.Detector`
+        Detector to associate with the amps.
+    translator_class : `~astro_metadata_translator.MetadataTranslator`,
+                       optional
+        Any translator class to use for fixing up the header.
+
+    Returns
+    -------
+    ampExps : `list` of `lsst.afw.image.Exposure`
+       All the individual amps read from the file.
+    md : `PropertyList`
+        The primary header merged with the first data header, fixed up
+        as for `~lsst.obs.lsst._fitsHeader.readRawFitsHeader`.
+    """
+    fits = lsst.afw.fits.Fits(fileName, "r")
+    try:
+        phdu, md = readPrimaryAndDataMetadata(fits)
+        amps = _readAmps(fits, detector)
+    finally:
+        fits.closeFile()
+
+    md = merge_headers([phdu, md], mode="overwrite")
+    fix_header(md, translator_class=translator_class)
+    cacheRawFitsHeader(fileName, translator_class, md)
+    return amps, md
@@ -22,10 +22,14 @@
 Mostly support mapping between amp/ccd/focal plane coordinates, but
 also the odd utility function
 """
+import math
+
+import numpy as np
+
 import lsst.geom as geom
 import lsst.afw.cameraGeom as cameraGeom
 
-__all__ = ["LsstCameraTransforms", "getAmpImage", "channelToAmp"]
+__all__ = ["LsstCameraTransforms", "FocalPlaneIndex", "AmpLookupTable", "getAmpImage", "channelToAmp"]
 
 
 class LsstCameraTransforms():
@@ -43,6 +47,43 @@ class LsstCameraTransforms():
         """
         self.camera = camera
         self.__detectorName = detectorName
+        self.__focalPlaneIndex = None
+        self.__ampLookupTables = {}
+
+    def getFocalPlaneIndex(self):
+        r"""Return the spatial index of the detectors in the focal plane
+
+        Returns
+        -------
+        index : `FocalPlaneIndex`
+           The index, built the first time that it's needed
+        """
+        if self.__focalPlaneIndex is None:
+            self.__focalPlaneIndex = FocalPlaneIndex(self.camera)
+
+        return self.__focalPlaneIndex
+
+    def getAmpLookupTable(self, detectorName=None):
+        r"""Return the table of the amplifiers of a detector
+
+        Parameters
+        ----------
+        detectorName : `str`
+           Name of detector (or default from setDetectorName() if None)
+
+        Returns
+        -------
+        table : `AmpLookupTable`
+           The table, built the first time that it's needed for the detector
+        """
+        detector = self.getDetector(detectorName)
+
+        table = self.__ampLookupTables.get(detector.getName())
+        if table is None:
+            table = AmpLookupTable(detector)
+            self.__ampLookupTables[detector.getName()] = table
+
+        return table
 
     def setDetectorName(self, detectorName):
         r"""Set the default detector
@@ -136,7 +177,7 @@ class LsstCameraTransforms():
             If the requested pixel doesn't lie on the detector
         """
 
-        amp, ampXY = ccdPixelToAmpPixel(geom.PointD(ccdX, ccdY), self.getDetector(detectorName))
+        amp, ampXY = self.getAmpLookupTable(detectorName).ccdPixelToAmpPixel(geom.PointD(ccdX, ccdY))
 
         ampX, ampY = ampXY
         return ampToChannel(amp), ampX, ampY
@@ -231,7 +272,7 @@ class LsstCameraTransforms():
         RuntimeError
             If the requested position doesn't lie on a detector
         """
-        detector, ccdXY = focalMmToCcdPixel(self.camera, geom.PointD(focalPlaneX, focalPlaneY))
+        detector, ccdXY = self.getFocalPlaneIndex().focalMmToCcdPixel(geom.PointD(focalPlaneX, focalPlaneY))
         ccdX, ccdY = ccdXY
 
         return detector.getName(), ccdX, ccdY
@@ -267,12 +308,552 @@ class LsstCameraTransforms():
             If the requested position doesn't lie on a detector
         """
 
-        detector, ccdXY = focalMmToCcdPixel(self.camera, geom.PointD(focalPlaneX, focalPlaneY))
-        amp, ampXY = ccdPixelToAmpPixel(ccdXY, detector)
+        detector, ccdXY = self.getFocalPlaneIndex().focalMmToCcdPixel(geom.PointD(focalPlaneX, focalPlaneY))
+        amp, ampXY = self.getAmpLookupTable(detector.getName()).ccdPixelToAmpPixel(ccdXY)
 
         ampX, ampY = ampXY
         return detector.getName(), ampToChannel(amp), ampX, ampY
 
+    def _groupByDetector(self, detectorName, shape):
+        r"""Return the indices of the points on each of a set of detectors
+
+        Parameters
+        ----------
+        detectorName : `str` or `numpy.ndarray` of `str`
+           Name of the detector of every point, or of all the points
+           (or default from setDetectorName() if None)
+        shape : `tuple`
+           The shape of the arrays of points
+
+        Returns
+        -------
+        groups : `list` of (`lsst.afw.cameraGeom.Detector`, `numpy.ndarray`)
+           Each detector and the flat indices of its points
+        """
+        if detectorName is None or isinstance(detectorName, str):
+            return [(self.getDetector(detectorName), np.arange(int(np.prod(shape))))]
+
+        detectorName = np.broadcast_to(np.asarray(detectorName), shape).ravel()
+        names, inverse = np.unique(detectorName, return_inverse=True)
+        return [(self.getDetector(str(name)), np.flatnonzero(inverse == i)) for i, name in enumerate(names)]
+
+    def ampPixelToCcdPixelArray(self, ampX, ampY, channel, detectorName=None):
+        r"""Given arrays of raw amplifier positions return positions on the
+        full detectors
+
+        Parameters
+        ----------
+        ampX : `numpy.ndarray`
+           columns on amp segments
+        ampY : `numpy.ndarray`
+           rows on amp segments
+        channel: `numpy.ndarray` or `int`
+           Channel numbers of amplifiers (1-indexed; identical to HDU)
+        detectorName : `numpy.ndarray` or `str`
+           Names of detectors (or default from setDetectorName() if None)
+
+        Returns
+        -------
+        ccdX : `numpy.ndarray`
+           The column pixel positions relative to the corner of the detector
+        ccdY : `numpy.ndarray`
+           The row pixel positions relative to the corner of the detector
+
+        See Also
+        --------
+        ampPixelToCcdPixel
+        """
+        ampX, ampY, channel = np.broadcast_arrays(np.asarray(ampX), np.asarray(ampY), np.asarray(channel))
+        ccdX = np.empty(ampX.shape, dtype=np.result_type(ampX, int))
+        ccdY = np.empty(ampY.shape, dtype=np.result_type(ampY, int))
+
+        for detector, indices in self._groupByDetector(detectorName, ampX.shape):
+            x, y = ampPixelToCcdPixelArray(ampX.flat[indices], ampY.flat[indices], detector,
+                                           channel.flat[indices])
+            ccdX.flat[indices] = x
+            ccdY.flat[indices] = y
+
+        return ccdX, ccdY
+
+    def ccdPixelToAmpPixelArray(self, ccdX, ccdY, detectorName=None):
+        r"""Given arrays of positions within detectors, return the amplifier
+        positions
+
+        Parameters
+        ----------
+        ccdX : `numpy.ndarray`
+           column pixel positions within detector
+        ccdY : `numpy.ndarray`
+           row pixel positions within detector
+        detectorName : `numpy.ndarray` or `str`
+           Names of detectors (or default from setDetectorName() if None)
+
+        Returns
+        -------
+        channel: `numpy.ndarray`
+           Channel numbers of amplifiers (1-indexed; identical to HDU)
+        ampX : `numpy.ndarray`
+           The column coordinates relative to the corner of the single-amp
+           image
+        ampY : `numpy.ndarray`
+           The row coordinates relative to the corner of the single-amp image
+
+        Raises
+        ------
+        RuntimeError
+            If any requested pixel doesn't lie on its detector
+
+        See Also
+        --------
+        ccdPixelToAmpPixel
+        """
+        ccdX, ccdY = np.broadcast_arrays(np.asarray(ccdX, dtype=float), np.asarray(ccdY, dtype=float))
+        channel = np.empty(ccdX.shape, dtype=int)
+        ampX = np.empty(ccdX.shape, dtype=int)
+        ampY = np.empty(ccdX.shape, dtype=int)
+
+        for detector, indices in self._groupByDetector(detectorName, ccdX.shape):
+            table = self.getAmpLookupTable(detector.getName())
+            c, x, y = table.ccdPixelToAmpPixelArray(ccdX.flat[indices], ccdY.flat[indices])
+            channel.flat[indices] = c
+            ampX.flat[indices] = x
+            ampY.flat[indices] = y
+
+        return channel, ampX, ampY
+
+    def ccdPixelToFocalMmArray(self, ccdX, ccdY, detectorName=None):
+        r"""Given arrays of positions within detectors return the focal plane
+        positions
+
+        Parameters
+        ----------
+        ccdX : `numpy.ndarray`
+           column pixel positions within detector
+        ccdY : `numpy.ndarray`
+           row pixel positions within detector
+        detectorName : `numpy.ndarray` or `str`
+           Names of detectors (or default from setDetectorName() if None)
+
+        Returns
+        -------
+        focalPlaneX : `numpy.ndarray`
+           The x-focal plane positions (mm) relative to the centre of the
+           camera
+        focalPlaneY : `numpy.ndarray`
+           The y-focal plane positions (mm) relative to the centre of the
+           camera
+
+        See Also
+        --------
+        ccdPixelToFocalMm
+        """
+        ccdX, ccdY = np.broadcast_arrays(np.asarray(ccdX, dtype=float), np.asarray(ccdY, dtype=float))
+        focalPlaneX = np.empty(ccdX.shape)
+        focalPlaneY = np.empty(ccdX.shape)
+
+        for detector, indices in self._groupByDetector(detectorName, ccdX.shape):
+            transform = detector.getTransform(cameraGeom.PIXELS, cameraGeom.FOCAL_PLANE)
+            x, y = transform.applyForward(np.array([ccdX.flat[indices], ccdY.flat[indices]]))
+            focalPlaneX.flat[indices] = x
+            focalPlaneY.flat[indices] = y
+
+        return focalPlaneX, focalPlaneY
+
+    def focalMmToCcdPixelArray(self, focalPlaneX, focalPlaneY):
+        r"""Given arrays of focal plane positions return the detector
+        positions
+
+        Parameters
+        ----------
+        focalPlaneX : `numpy.ndarray`
+           The x-focal plane positions (mm) relative to the centre of the
+           camera
+        focalPlaneY : `numpy.ndarray`
+           The y-focal plane positions (mm) relative to the centre of the
+           camera
+
+        Returns
+        -------
+        detectorName : `numpy.ndarray` of `str`
+           The names of the detectors
+        ccdX : `numpy.ndarray`
+           The column pixel positions relative to the corner of the detector
+        ccdY : `numpy.ndarray`
+           The row pixel positions relative to the corner of the detector
+
+        Raises
+        ------
+        RuntimeError
+            If any requested position doesn't lie on a detector
+
+        See Also
+        --------
+        focalMmToCcdPixel
+        """
+        detectors, ccdX, ccdY = self.getFocalPlaneIndex().focalMmToCcdPixelArray(focalPlaneX, focalPlaneY)
+
+        missing = np.flatnonzero(np.equal(detectors, None))
+        if len(missing) > 0:
+            x, y = np.broadcast_arrays(focalPlaneX, focalPlaneY)
+            i = missing[0]
+            raise RuntimeError("Failed to map %d focal plane positions, e.g. (%.3f, %.3f), to a detector" %
+                               (len(missing), np.ravel(x)[i], np.ravel(y)[i]))
+
+        detectorName = np.array([detector.getName() for detector in detectors.flat],
+                                dtype=str).reshape(detectors.shape)
+        return detectorName, ccdX, ccdY
+
+
+class FocalPlaneIndex():
+    """A uniform grid over the focal plane listing the detectors that may
+    cover each cell
+
+    Parameters
+    ----------
+    camera : `lsst.afw.cameraGeom.Camera`
+       The object describing a/the LSST Camera
+
+    Notes
+    -----
+    The cells are as large as the largest detector, so each detector's
+    footprint in the focal plane touches at most four cells and a lookup
+    only has to transform the position into the pixels of the few
+    detectors in one cell, rather than into those of every detector.
+    """
+    def __init__(self, camera):
+        self.camera = camera
+
+        footprints = []
+        for detector in camera:
+            corners = detector.getCorners(cameraGeom.FOCAL_PLANE)
+            xs = [c.getX() for c in corners]
+            ys = [c.getY() for c in corners]
+            footprints.append((detector, min(xs), min(ys), max(xs), max(ys)))
+
+        self._cellSize = max([max(x1 - x0, y1 - y0) for _, x0, y0, x1, y1 in footprints], default=1.0)
+        if not self._cellSize > 0:
+            self._cellSize = 1.0
+        #
+        # Detectors are entered in camera order so that the first detector
+        # to contain a point is the one that a search of the camera finds
+        #
+        self._cells = {}
+        self._cellRanges = []
+        for detector, x0, y0, x1, y1 in footprints:
+            ix0, iy0 = self._cell(x0, y0)
+            ix1, iy1 = self._cell(x1, y1)
+            self._cellRanges.append((detector, ix0, iy0, ix1, iy1))
+            for ix in range(ix0, ix1 + 1):
+                for iy in range(iy0, iy1 + 1):
+                    self._cells.setdefault((ix, iy), []).append(detector)
+
+    def __len__(self):
+        return len(self._cells)
+
+    def _cell(self, x, y):
+        """Return the indices of the cell containing (x, y)"""
+        return math.floor(x/self._cellSize), math.floor(y/self._cellSize)
+
+    def getCandidates(self, focalPlaneXY):
+        r"""Return the detectors whose footprints may contain a position
+
+        Parameters
+        ----------
+        focalPlaneXY : `lsst.geom.PointD`
+           The focal plane position (mm) relative to the centre of the camera
+
+        Returns
+        -------
+        detectors : `list` of `lsst.afw.cameraGeom.Detector`
+           The detectors whose footprints overlap the cell containing the
+           position; may be empty
+        """
+        return self._cells.get(self._cell(focalPlaneXY[0], focalPlaneXY[1]), [])
+
+    def focalMmToCcdPixel(self, focalPlaneXY):
+        r"""Given an position in the focal plane, return the detector position
+
+        Parameters
+        ----------
+        focalPlaneXY : `lsst.geom.PointD`
+           The focal plane position (mm) relative to the centre of the camera
+
+        Returns
+        -------
+        detector : `lsst.afw.cameraGeom.Detector`
+           The requested detector
+        ccdPos : `lsst.geom.Point2D`
+           The pixel position relative to the corner of the detector
+
+        Raises
+        ------
+        RuntimeError
+            If the requested position doesn't lie on a detector
+
+        Notes
+        -----
+        Equivalent to the module-level `focalMmToCcdPixel` but only tries
+        the detectors returned by `getCandidates`.
+        """
+
+        for detector in self.getCandidates(focalPlaneXY):
+            ccdXY = detector.transform(focalPlaneXY, cameraGeom.FOCAL_PLANE, cameraGeom.PIXELS)
+            if geom.BoxD(detector.getBBox()).contains(ccdXY):
+                return detector, ccdXY
+
+        raise RuntimeError("Failed to map focal plane position (%.3f, %.3f) to a detector" % (focalPlaneXY))
+
+    def focalMmToCcdPixelArray(self, focalPlaneX, focalPlaneY):
+        r"""Given arrays of focal plane positions, return the detector
+        positions
+
+        Parameters
+        ----------
+        focalPlaneX : `numpy.ndarray`
+           The x-focal plane positions (mm) relative to the centre of the
+           camera
+        focalPlaneY : `numpy.ndarray`
+           The y-focal plane positions (mm) relative to the centre of the
+           camera
+
+        Returns
+        -------
+        detectors : `numpy.ndarray` of `lsst.afw.cameraGeom.Detector`
+           The detector containing each position (`None` if there is none)
+        ccdX : `numpy.ndarray`
+           The column pixel positions relative to the corner of the detector
+           (NaN if the position doesn't lie on a detector)
+        ccdY : `numpy.ndarray`
+           The row pixel positions relative to the corner of the detector
+           (NaN if the position doesn't lie on a detector)
+
+        Notes
+        -----
+        Each detector's transform is applied once to all the positions in
+        the cells that it overlaps.
+        """
+        focalPlaneX = np.asarray(focalPlaneX, dtype=float)
+        focalPlaneY = np.asarray(focalPlaneY, dtype=float)
+        focalPlaneX, focalPlaneY = np.broadcast_arrays(focalPlaneX, focalPlaneY)
+
+        detectors = np.full(focalPlaneX.shape, None, dtype=object)
+        ccdX = np.full(focalPlaneX.shape, np.nan)
+        ccdY = np.full(focalPlaneX.shape, np.nan)
+
+        ix = np.floor(focalPlaneX/self._cellSize)
+        iy = np.floor(focalPlaneY/self._cellSize)
+        for detector, ix0, iy0, ix1, iy1 in self._cellRanges:
+            todo = np.flatnonzero((ix >= ix0) & (ix <= ix1) & (iy >= iy0) & (iy <= iy1)
+                                  & np.equal(detectors, None))
+            if len(todo) == 0:
+                continue
+
+            transform = detector.getTransform(cameraGeom.FOCAL_PLANE, cameraGeom.PIXELS)
+            x, y = transform.applyForward(np.array([focalPlaneX.flat[todo], focalPlaneY.flat[todo]]))
+
+            bbox = geom.BoxD(detector.getBBox())
+            onDetector = ((x >= bbox.getMinX()) & (x < bbox.getMaxX())
+                          & (y >= bbox.getMinY()) & (y < bbox.getMaxY()))
+            found = todo[onDetector]
+            detectors.flat[found] = detector
+            ccdX.flat[found] = x[onDetector]
+            ccdY.flat[found] = y[onDetector]
+
+        return detectors, ccdX, ccdY
+
+
+class AmpLookupTable():
+    """The layout of the amplifiers of a detector, tabulated to find the
+    amplifier containing a pixel without searching
+
+    Parameters
+    ----------
+    detector : `lsst.afw.cameraGeom.Detector`
+        The detector to tabulate
+
+    Notes
+    -----
+    If the amplifiers tile the detector in a regular grid of equally sized
+    segments, the amplifier containing a pixel is found by integer division
+    and its flips and overscan offsets are read from arrays indexed by
+    position in the grid. Otherwise the module-level `ccdPixelToAmpPixel`
+    and `ccdPixelToAmpPixelArray` are used.
+    """
+    def __init__(self, detector):
+        self.detector = detector
+
+        amps = list(detector)
+        self._amps = None               # grid of amplifiers; None if they aren't a regular grid
+        if not amps:
+            return
+
+        bboxes = [amp.getBBox() for amp in amps]
+        self._x0 = min(bbox.getMinX() for bbox in bboxes)
+        self._y0 = min(bbox.getMinY() for bbox in bboxes)
+        self._width, self._height = bboxes[0].getDimensions()
+        nx = len(set(bbox.getMinX() for bbox in bboxes))
+        ny = len(set(bbox.getMinY() for bbox in bboxes))
+        if nx*ny != len(amps) or self._width <= 0 or self._height <= 0:
+            return
+
+        grid = np.full((ny, nx), None, dtype=object)
+        for amp, bbox in zip(amps, bboxes):
+            ix, rx = divmod(bbox.getMinX() - self._x0, self._width)
+            iy, ry = divmod(bbox.getMinY() - self._y0, self._height)
+            if (rx != 0 or ry != 0 or tuple(bbox.getDimensions()) != (self._width, self._height)
+                    or not (0 <= ix < nx and 0 <= iy < ny) or grid[iy, ix] is not None):
+                return
+            grid[iy, ix] = amp
+        #
+        # Everything needed to go from a pixel's offset within the amp's
+        # data segment to its position in the single-amp image: flip the
+        # offset (about w - 1 in x, h - 1 in y), then subtract the offset
+        # of the data segment within the raw amp
+        #
+        self._channel = np.empty(grid.shape, dtype=int)
+        self._flipX = np.empty(grid.shape, dtype=bool)
+        self._flipY = np.empty(grid.shape, dtype=bool)
+        self._rawWidth = np.empty(grid.shape, dtype=int)
+        self._rawHeight = np.empty(grid.shape, dtype=int)
+        self._dx = np.empty(grid.shape, dtype=int)
+        self._dy = np.empty(grid.shape, dtype=int)
+        for (iy, ix), amp in np.ndenumerate(grid):
+            self._channel[iy, ix] = ampToChannel(amp)
+            self._flipX[iy, ix] = amp.getRawFlipX()
+            self._flipY[iy, ix] = amp.getRawFlipY()
+            self._rawWidth[iy, ix], self._rawHeight[iy, ix] = amp.getRawDataBBox().getDimensions()
+            self._dx[iy, ix], self._dy[iy, ix] = amp.getRawBBox().getBegin() - amp.getRawDataBBox().getBegin()
+
+        self._amps = grid
+        # The same, as python scalars for single pixels
+        self._ampParams = [[(grid[iy, ix], bool(self._flipX[iy, ix]), bool(self._flipY[iy, ix]),
+                             int(self._rawWidth[iy, ix]), int(self._rawHeight[iy, ix]),
+                             int(self._dx[iy, ix]), int(self._dy[iy, ix])) for ix in range(grid.shape[1])]
+                           for iy in range(grid.shape[0])]
+
+    @property
+    def isRegular(self):
+        """Whether the amplifiers form a regular grid (`bool`)"""
+        return self._amps is not None
+
+    def _locate(self, x, y):
+        """Return the grid indices of the amplifiers containing pixels (x, y)
+        and the pixels' offsets within them
+
+        ``x`` and ``y`` are the nearest integer pixels; pixels outside the
+        detector have grid indices of -1
+        """
+        ny, nx = self._amps.shape
+        with np.errstate(invalid="ignore"):
+            ix, ox = np.divmod(x - self._x0, self._width)
+            iy, oy = np.divmod(y - self._y0, self._height)
+            outside = ~((ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny))   # including NaNs
+
+        ix, iy, ox, oy = [np.where(outside, fill, v).astype(int) for fill, v in
+                          [(-1, ix), (-1, iy), (0, ox), (0, oy)]]
+
+        return ix, iy, ox, oy
+
+    def _toAmpPixel(self, ix, iy, ox, oy):
+        """Convert offsets within the amps' data segments to single-amp
+        image coordinates"""
+        ox = np.where(self._flipX[iy, ix], self._rawWidth[iy, ix] - ox - 1, ox)
+        oy = np.where(self._flipY[iy, ix], self._rawHeight[iy, ix] - oy - 1, oy)
+
+        return ox - self._dx[iy, ix], oy - self._dy[iy, ix]
+
+    def ccdPixelToAmpPixel(self, xy):
+        r"""Given an position within the detector return position within an
+        amplifier
+
+        Parameters
+        ----------
+        xy : `lsst.geom.PointD`
+           pixel position within detector
+
+        Returns
+        -------
+        amp : `lsst.afw.table.AmpInfoRecord`
+           The amplifier that the pixel lies in
+        ampXY : `lsst.geom.PointI`
+           The pixel coordinate relative to the corner of the single-amp image
+
+        Raises
+        ------
+        RuntimeError
+            If the requested pixel doesn't lie on the detector
+
+        See Also
+        --------
+        ccdPixelToAmpPixel
+        """
+        if not self.isRegular:
+            return ccdPixelToAmpPixel(xy, self.detector)
+
+        ny, nx = self._amps.shape
+        ix = iy = -1
+        if math.isfinite(xy[0]) and math.isfinite(xy[1]):
+            # pixel coordinates as ints
+            ix, ox = divmod(math.floor(xy[0] + 0.5) - self._x0, self._width)
+            iy, oy = divmod(math.floor(xy[1] + 0.5) - self._y0, self._height)
+
+        if not (0 <= ix < nx and 0 <= iy < ny):
+            raise RuntimeError("Point (%g, %g) does not lie on detector %s" %
+                               (xy[0], xy[1], self.detector.getName()))
+
+        amp, flipX, flipY, w, h, dx, dy = self._ampParams[iy][ix]
+        if flipX:
+            ox = w - ox - 1
+        if flipY:
+            oy = h - oy - 1
+
+        return amp, geom.ExtentI(ox - dx, oy - dy)
+
+    def ccdPixelToAmpPixelArray(self, x, y):
+        r"""Given arrays of positions within the detector return positions
+        within amplifiers
+
+        Parameters
+        ----------
+        x : `numpy.ndarray`
+           column pixel positions within detector
+        y : `numpy.ndarray`
+           row pixel positions within detector
+
+        Returns
+        -------
+        channel: `numpy.ndarray`
+           Channel numbers of amplifiers (1-indexed; identical to HDU)
+        ampX : `numpy.ndarray`
+           The column coordinates relative to the corner of the single-amp
+           image
+        ampY : `numpy.ndarray`
+           The row coordinates relative to the corner of the single-amp image
+
+        Raises
+        ------
+        RuntimeError
+            If any requested pixel doesn't lie on the detector
+
+        See Also
+        --------
+        ccdPixelToAmpPixelArray
+        """
+        if not self.isRegular:
+            return ccdPixelToAmpPixelArray(x, y, self.detector)
+
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        ix, iy, ox, oy = self._locate(np.floor(x + 0.5), np.floor(y + 0.5))
+
+        missing = np.flatnonzero(ix < 0)
+        if len(missing) > 0:
+            i = missing[0]
+            raise RuntimeError("%d points, e.g. (%g, %g), do not lie on detector %s" %
+                               (len(missing), x.flat[i], y.flat[i], self.detector.getName()))
+
+        ampX, ampY = self._toAmpPixel(ix, iy, ox, oy)
+        return self._channel[iy, ix], ampX, ampY
+
 # -=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-
 
 
@@ -386,6 +967,48 @@ def ampPixelToCcdPixel(x, y, detector, channel):
     return amp.getBBox().getBegin() + dxy + geom.ExtentI(x, y)
 
 
+def ampPixelToCcdPixelArray(x, y, detector, channel):
+    r"""Given arrays of positions in raw amplifiers return positions on the
+    full detector
+
+    Parameters
+    ----------
+    x : `numpy.ndarray`
+       columns on amp segments
+    y : `numpy.ndarray`
+       rows on amp segments
+    detector : `lsst.afw.cameraGeom.Detector`
+        The requested detector
+    channel: `numpy.ndarray` or `int`
+       Channel numbers of amplifiers (1-indexed; identical to HDU)
+
+    Returns
+    -------
+    ccdX : `numpy.ndarray`
+       The column pixel positions relative to the corner of the detector
+    ccdY : `numpy.ndarray`
+       The row pixel positions relative to the corner of the detector
+
+    Notes
+    -----
+    The mapping of each amplifier is a shift and possibly a flip, so it is
+    found by `ampPixelToCcdPixel` for the amplifier's (0, 0) pixel and
+    then applied to all of that amplifier's pixels.
+    """
+    x, y, channel = np.broadcast_arrays(np.asarray(x), np.asarray(y), np.asarray(channel))
+    ccdX = np.empty(x.shape, dtype=np.result_type(x, int))
+    ccdY = np.empty(y.shape, dtype=np.result_type(y, int))
+
+    for c in np.unique(channel):
+        amp = channelToAmp(detector, int(c))
+        x0, y0 = ampPixelToCcdPixel(0, 0, detector, int(c))
+        select = channel == c
+        ccdX[select] = x0 - x[select] if amp.getRawFlipX() else x0 + x[select]
+        ccdY[select] = y0 - y[select] if amp.getRawFlipY() else y0 + y[select]
+
+    return ccdX, ccdY
+
+
 def ccdPixelToAmpPixel(xy, detector):
     r"""Given an position within a detector return position within an amplifier
 
@@ -438,6 +1061,75 @@ def ccdPixelToAmpPixel(xy, detector):
     return amp, xy
 
 
+def ccdPixelToAmpPixelArray(x, y, detector):
+    r"""Given arrays of positions within a detector return positions within
+    amplifiers
+
+    Parameters
+    ----------
+    x : `numpy.ndarray`
+       column pixel positions within detector
+    y : `numpy.ndarray`
+       row pixel positions within detector
+    detector : `lsst.afw.cameraGeom.Detector`
+        The requested detector
+
+    N.b. all pixel coordinates have the centre of the bottom-left pixel
+    at (0.0, 0.0)
+
+    Returns
+    -------
+    channel: `numpy.ndarray`
+       Channel numbers of amplifiers (1-indexed; identical to HDU)
+    ampX : `numpy.ndarray`
+       The column coordinates relative to the corner of the single-amp image
+    ampY : `numpy.ndarray`
+       The row coordinates relative to the corner of the single-amp image
+
+    Raises
+    ------
+    RuntimeError
+        If any requested pixel doesn't lie on the detector
+    """
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    channel = np.zeros(x.shape, dtype=int)
+    ampX = np.empty(x.shape, dtype=int)
+    ampY = np.empty(x.shape, dtype=int)
+
+    for amp in detector:
+        bbox = geom.BoxD(amp.getBBox())
+        select = ((channel == 0) & (x >= bbox.getMinX()) & (x < bbox.getMaxX())
+                  & (y >= bbox.getMinY()) & (y < bbox.getMaxY()))
+        if not select.any():
+            continue
+        channel[select] = ampToChannel(amp)
+
+        # pixel coordinates as ints, offset from origin of amp's data segment
+        begin = amp.getBBox().getBegin()
+        ax = np.floor(x[select] + 0.5).astype(int) - begin[0]
+        ay = np.floor(y[select] + 0.5).astype(int) - begin[1]
+
+        # Allow for flips (due e.g. to physical location of the amplifiers)
+        w, h = amp.getRawDataBBox().getDimensions()
+        if amp.getRawFlipX():
+            ax = w - ax - 1
+
+        if amp.getRawFlipY():
+            ay = h - ay - 1
+
+        dx, dy = amp.getRawBBox().getBegin() - amp.getRawDataBBox().getBegin()  # correction for overscan etc.
+        ampX[select] = ax - dx
+        ampY[select] = ay - dy
+
+    missing = np.flatnonzero(channel == 0)
+    if len(missing) > 0:
+        i = missing[0]
+        raise RuntimeError("%d points, e.g. (%g, %g), do not lie on detector %s" %
+                           (len(missing), x.flat[i], y.flat[i], detector.getName()))
+
+    return channel, ampX, ampY
+
+
 def focalMmToCcdPixel(camera, focalPlaneXY):
     r"""Given an position in the focal plane, return the position on a detector
 
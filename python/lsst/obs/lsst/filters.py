@@ -26,9 +26,12 @@ __all__ = (
     "TS3_FILTER_DEFINITIONS",
     "TS8_FILTER_DEFINITIONS",
     "COMCAM_FILTER_DEFINITIONS",
+    "FilterIndex",
+    "getFilterIndex",
 )
 
 import re
+import numpy as np
 from lsst.obs.base import FilterDefinition, FilterDefinitionCollection
 from .translators.lsst import FILTER_DELIMITER
 
@@ -317,3 +320,152 @@ for band, filt in ComCamFilters_dict.items():
 COMCAM_FILTER_DEFINITIONS = FilterDefinitionCollection(
     *ComCamFilters,
 )
+
+
+class FilterIndex:
+    """Hash index of a collection of filter definitions.
+
+    Every physical filter name and alias is mapped to its definition so
+    that lookups take constant time, rather than scanning the collection.
+
+    Parameters
+    ----------
+    filterDefinitions : `lsst.obs.base.FilterDefinitionCollection`
+        Filter definitions to index.
+
+    Notes
+    -----
+    Physical filter names take precedence over aliases. If a name is
+    otherwise used by more than one definition, the first definition in the
+    collection wins.
+    """
+
+    def __init__(self, filterDefinitions):
+        self._definitions = {}
+        for definition in filterDefinitions:
+            self._definitions.setdefault(definition.physical_filter, definition)
+        for definition in filterDefinitions:
+            for alias in definition.alias:
+                self._definitions.setdefault(alias, definition)
+
+    def __len__(self):
+        return len(self._definitions)
+
+    def __contains__(self, name):
+        return name in self._definitions
+
+    def __getitem__(self, name):
+        return self._definitions[name]
+
+    def get(self, name, default=None):
+        """Return the definition of a physical filter or alias.
+
+        Parameters
+        ----------
+        name : `str`
+            Physical filter name or alias.
+        default : `object`, optional
+            Value to return if the name is not known.
+
+        Returns
+        -------
+        definition : `lsst.obs.base.FilterDefinition`
+            The definition, or ``default``.
+        """
+        return self._definitions.get(name, default)
+
+    def band(self, name):
+        """Return the band of a physical filter or alias.
+
+        Parameters
+        ----------
+        name : `str`
+            Physical filter name or alias.
+
+        Returns
+        -------
+        band : `str` or `None`
+            The band, or `None` if the filter is not known or has no band.
+        """
+        definition = self._definitions.get(name)
+        return definition.band if definition is not None else None
+
+    def lambdaEff(self, name):
+        """Return the effective wavelength of a physical filter or alias.
+
+        Parameters
+        ----------
+        name : `str`
+            Physical filter name or alias.
+
+        Returns
+        -------
+        lambdaEff : `float` or `None`
+            The effective wavelength in nm, or `None` if the filter is not
+            known.
+        """
+        definition = self._definitions.get(name)
+        return definition.lambdaEff if definition is not None else None
+
+    def normalize(self, names):
+        """Map physical filter names and aliases to canonical names, bands
+        and effective wavelengths.
+
+        Parameters
+        ----------
+        names : iterable of `str`
+            Physical filter names or aliases, for example as returned by
+            ``compute_physical_filter_array`` of a translator.
+
+        Returns
+        -------
+        physicalFilters : `numpy.ndarray` of `str`
+            Canonical physical filter names. Unknown names are returned
+            unchanged.
+        bands : `numpy.ndarray` of `object`
+            Band of each filter, `None` for unknown filters or filters
+            without a band.
+        lambdaEffs : `numpy.ndarray` of `float`
+            Effective wavelength of each filter, NaN for unknown filters.
+        """
+        names = np.asarray(names, dtype=str)
+        # Look up each distinct name once and broadcast the results.
+        unique, inverse = np.unique(names, return_inverse=True)
+        physicalFilters = np.empty(len(unique), dtype=object)
+        bands = np.empty(len(unique), dtype=object)
+        lambdaEffs = np.full(len(unique), np.nan)
+        for i, name in enumerate(unique):
+            definition = self._definitions.get(name)
+            if definition is None:
+                physicalFilters[i] = name
+            else:
+                physicalFilters[i] = definition.physical_filter
+                bands[i] = definition.band
+                lambdaEffs[i] = definition.lambdaEff
+        inverse = inverse.reshape(names.shape)
+        return physicalFilters[inverse].astype(str), bands[inverse], lambdaEffs[inverse]
+
+
+_filterIndexes = {}
+
+
+def getFilterIndex(filterDefinitions):
+    """Return the index of a collection of filter definitions, building it
+    on first use.
+
+    Parameters
+    ----------
+    filterDefinitions : `lsst.obs.base.FilterDefinitionCollection`
+        One of the filter definition collections of this package.
+
+    Returns
+    -------
+    index : `FilterIndex`
+        The index of the collection.
+    """
+    # The collections are module-level constants, so their identities are
+    # stable for the lifetime of the process.
+    key = id(filterDefinitions)
+    if key not in _filterIndexes:
+        _filterIndexes[key] = (filterDefinitions, FilterIndex(filterDefinitions))
+    return _filterIndexes[key][1]
@@ -22,11 +22,11 @@
 import re
 from lsst.pipe.tasks.ingest import ParseTask
 from lsst.pipe.tasks.ingestCalibs import CalibsParseTask
-from astro_metadata_translator import ObservationInfo
 import lsst.log as lsstLog
 from .translators import LsstCamTranslator
 from .lsstCamMapper import LsstCamMapper
 from ._fitsHeader import readRawFitsHeader
+from ._obsInfoCache import getObservationInfo
 
 EXTENSIONS = ["fits", "gz", "fz"]  # Filename extensions to strip off
 
@@ -106,10 +106,11 @@ class LsstCamParseTask(ParseTask):
         through the ``observationInfo`` attribute.
 
         """
-        # Always calculate a new ObservationInfo since getInfo calls
-        # this method repeatedly for each header.
-        self.observationInfo = ObservationInfo(md, translator_class=self._translatorClass,
-                                               pedantic=False)
+        # Always look up the ObservationInfo since getInfo calls
+        # this method repeatedly for each header. The translation is shared
+        # with any other reader of the same header.
+        self.observationInfo = getObservationInfo(md, translator_class=self._translatorClass,
+                                                  pedantic=False)
 
         info = super().getInfoFromMetadata(md, info)
 
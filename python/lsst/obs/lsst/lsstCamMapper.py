@@ -28,11 +28,11 @@ import lsst.geom
 import lsst.utils as utils
 import lsst.afw.image as afwImage
 from lsst.obs.base import CameraMapper, MakeRawVisitInfoViaObsInfo
-import lsst.obs.base.yamlCamera as yamlCamera
 import lsst.daf.persistence as dafPersist
-from astro_metadata_translator import ObservationInfo
 from .translators import LsstCamTranslator
 from ._fitsHeader import readRawFitsHeader
+from ._obsInfoCache import getObservationInfo
+from ._cameraCache import makeCachedCamera
 from ._instrument import LsstCam
 
 from .filters import LSSTCAM_FILTER_DEFINITIONS
@@ -49,7 +49,7 @@ class LsstCamRawVisitInfo(LsstCamMakeRawVisitInfo):
     metadataTranslator = LsstCamTranslator
 
 
-def assemble_raw(dataId, componentInfo, cls):
+def assemble_raw(dataId, componentInfo, cls, assembleTask=None):
     """Called by the butler to construct the composite type "raw".
 
     Note that we still need to define "_raw" and copy various fields over.
@@ -63,6 +63,9 @@ def assemble_raw(dataId, componentInfo, cls):
         in the mapper policy.
     cls : 'object'
         Unused.
+    assembleTask : `lsst.ip.isr.AssembleCcdTask`, optional
+        Untrimmed assembly task to use. Defaults to the task shared by the
+        calling thread; see `lsst.obs.lsst.assembly.getUntrimmedAssembler`.
 
     Returns
     -------
@@ -71,7 +74,7 @@ def assemble_raw(dataId, componentInfo, cls):
     """
 
     ampExps = componentInfo['raw_amp'].obj
-    exposure = fixAmpsAndAssemble(ampExps, str(dataId))
+    exposure = fixAmpsAndAssemble(ampExps, str(dataId), assembleTask=assembleTask)
     md = componentInfo['raw_hdu'].obj
     exposure.setMetadata(md)
 
@@ -177,7 +180,7 @@ class LsstCamBaseMapper(CameraMapper):
         policy : ignored
         repositoryDir : ignored
         cameraYamlFile : `str`
-           The full path to a yaml file to be passed to `yamlCamera.makeCamera`
+           The full path to a yaml file describing the camera
 
         Returns
         -------
@@ -188,7 +191,7 @@ class LsstCamBaseMapper(CameraMapper):
             cameraYamlFile = os.path.join(utils.getPackageDir(cls.packageName), "policy",
                                           ("%s.yaml" % cls.getCameraName()))
 
-        return yamlCamera.makeCamera(cameraYamlFile)
+        return makeCachedCamera(cameraYamlFile)
 
     def _getRegistryValue(self, dataId, k):
         """Return a value from a dataId, or look it up in the registry if it
@@ -452,7 +455,7 @@ class LsstCamBaseMapper(CameraMapper):
                                         filter=False)
 
         if filter:
-            obsInfo = ObservationInfo(exp.getMetadata(), translator_class=self.translatorClass)
+            obsInfo = getObservationInfo(exp.getMetadata(), translator_class=self.translatorClass)
             try:
                 filt = afwImage.Filter(obsInfo.physical_filter)
             except LookupError:
@@ -0,0 +1,268 @@
+# This file is part of obs_lsst.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Extract observation metadata from many raw files in parallel.
+"""
+
+__all__ = ("BatchError", "BatchResult", "readObservationInfoBatch", "parseInfoBatch")
+
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Optional
+
+from astro_metadata_translator import ObservationInfo
+from astro_metadata_translator.properties import PROPERTIES
+
+from ._fitsHeader import readRawFitsHeader, scanRawFitsHeader
+
+# Number of files queued per worker process. Files are submitted lazily so
+# that arbitrarily long iterables of paths can be processed.
+_QUEUE_DEPTH = 8
+
+# Parse task used by the current worker process.
+_workerParseTask = None
+
+
+@dataclass(frozen=True)
+class BatchError:
+    """Description of a failure to extract metadata from a file.
+
+    The exception itself is not returned since it may not be possible to
+    send it back from the worker process.
+    """
+
+    exceptionType: str
+    """Fully-qualified name of the exception class."""
+
+    message: str
+    """String form of the exception."""
+
+    traceback: str
+    """Formatted traceback from the worker process."""
+
+    @classmethod
+    def fromException(cls, exc):
+        """Describe an exception.
+
+        Parameters
+        ----------
+        exc : `Exception`
+            The exception that was raised.
+
+        Returns
+        -------
+        error : `BatchError`
+            Description of the exception.
+        """
+        excType = type(exc)
+        return cls(exceptionType=f"{excType.__module__}.{excType.__qualname__}", message=str(exc),
+                   traceback="".join(traceback.format_exception(excType, exc, exc.__traceback__)))
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """The metadata extracted from a single file."""
+
+    path: str
+    """Name of the file."""
+
+    info: Optional[dict]
+    """Extracted information, or `None` if extraction failed."""
+
+    error: Optional[BatchError] = None
+    """Description of the failure, or `None` if extraction succeeded."""
+
+    @property
+    def ok(self):
+        """`True` if the information was extracted (`bool`)."""
+        return self.error is None
+
+
+def _observationInfoToDict(obsInfo):
+    """Convert an `~astro_metadata_translator.ObservationInfo` to a
+    `dict` of all its properties."""
+    return {name: getattr(obsInfo, name) for name in PROPERTIES}
+
+
+def _translateFile(path, translator_class, fastScan):
+    """Read the header of a file and translate it.
+
+    Parameters
+    ----------
+    path : `str`
+        Name of the raw file.
+    translator_class : `~astro_metadata_translator.MetadataTranslator`
+        Translator to use, or `None` to determine it from the header.
+    fastScan : `bool`
+        If `True` only read the cards used by the translators.
+
+    Returns
+    -------
+    result : `BatchResult`
+        Translated properties or a description of the failure.
+    """
+    try:
+        if fastScan:
+            header = scanRawFitsHeader(path, translator_class=translator_class)
+        else:
+            header = readRawFitsHeader(path, translator_class=translator_class)
+        obsInfo = ObservationInfo(header, translator_class=translator_class, pedantic=False,
+                                  filename=path)
+        return BatchResult(path=path, info=_observationInfoToDict(obsInfo))
+    except Exception as e:
+        return BatchResult(path=path, info=None, error=BatchError.fromException(e))
+
+
+def _initParseWorker(parseTaskClass, config, name):
+    """Construct the parse task used by a worker process."""
+    global _workerParseTask
+    _workerParseTask = parseTaskClass(config, name=name)
+
+
+def _parseFile(path):
+    """Extract the information from a file using the parse task of this
+    worker process.
+
+    Parameters
+    ----------
+    path : `str`
+        Name of the raw file.
+
+    Returns
+    -------
+    result : `BatchResult`
+        The primary HDU information returned by ``getInfo`` or a
+        description of the failure.
+    """
+    try:
+        phuInfo, _ = _workerParseTask.getInfo(path)
+        return BatchResult(path=path, info=phuInfo)
+    except Exception as e:
+        return BatchResult(path=path, info=None, error=BatchError.fromException(e))
+
+
+def _runBatch(paths, func, args, maxWorkers, initializer=None, initargs=()):
+    """Apply a function to paths in a process pool, yielding the results
+    as they complete.
+
+    Parameters
+    ----------
+    paths : iterable of `str`
+        Files to process. The iterable is consumed lazily.
+    func : callable
+        Function called as ``func(path, *args)`` in a worker, returning a
+        `BatchResult`.
+    args : `tuple`
+        Additional arguments for ``func``.
+    maxWorkers : `int` or `None`
+        Number of worker processes.
+    initializer : callable, optional
+        Called in each worker process when it starts.
+    initargs : `tuple`, optional
+        Arguments for ``initializer``.
+
+    Yields
+    ------
+    result : `BatchResult`
+        Result for each path, in order of completion.
+    """
+    with ProcessPoolExecutor(max_workers=maxWorkers, initializer=initializer,
+                             initargs=initargs) as executor:
+        queueSize = _QUEUE_DEPTH*(maxWorkers or os.cpu_count() or 1)
+        pending = {}
+        paths = iter(paths)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < queueSize:
+                try:
+                    path = next(paths)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[executor.submit(func, path, *args)] = path
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    yield future.result()
+                except Exception as e:
+                    # The worker itself failed, for example because it
+                    # was killed.
+                    yield BatchResult(path=path, info=None, error=BatchError.fromException(e))
+
+
+def readObservationInfoBatch(paths, translator_class=None, maxWorkers=None, fastScan=True):
+    """Translate the headers of many raw files using a process pool.
+
+    Parameters
+    ----------
+    paths : iterable of `str`
+        Raw files to translate. The iterable is consumed lazily so a
+        generator over a large directory tree can be given.
+    translator_class : `~astro_metadata_translator.MetadataTranslator`,
+                       optional
+        Translator to use. If `None` it is determined from each header.
+    maxWorkers : `int`, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    fastScan : `bool`, optional
+        If `True` use `~lsst.obs.lsst._fitsHeader.scanRawFitsHeader` to
+        read only the cards used by the translators, otherwise read the
+        complete headers.
+
+    Yields
+    ------
+    result : `BatchResult`
+        For each file, in order of completion, a `dict` of all the
+        `~astro_metadata_translator.ObservationInfo` properties or a
+        description of the failure. Failures do not stop the batch.
+    """
+    yield from _runBatch(paths, _translateFile, (translator_class, fastScan), maxWorkers)
+
+
+def parseInfoBatch(parseTask, paths, maxWorkers=None):
+    """Run the ``getInfo`` method of an ingest parse task on many raw
+    files using a process pool.
+
+    Parameters
+    ----------
+    parseTask : `lsst.pipe.tasks.ingest.ParseTask`
+        Parse task to use, such as an
+        `~lsst.obs.lsst.ingest.LsstCamParseTask`. Each worker process
+        constructs its own task from the class, config and name of this
+        task.
+    paths : iterable of `str`
+        Raw files to parse. The iterable is consumed lazily.
+    maxWorkers : `int`, optional
+        Number of worker processes. Defaults to the number of CPUs.
+
+    Yields
+    ------
+    result : `BatchResult`
+        For each file, in order of completion, the information returned
+        by ``getInfo`` for the primary HDU or a description of the failure.
+        Failures do not stop the batch.
+    """
+    yield from _runBatch(paths, _parseFile, (), maxWorkers, initializer=_initParseWorker,
+                         initargs=(type(parseTask), parseTask.config, parseTask.getName()))
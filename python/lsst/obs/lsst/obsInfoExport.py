@@ -0,0 +1,482 @@
+# This file is part of obs_lsst.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Export the translated metadata of raw archives to columnar files.
+"""
+
+__all__ = ("EXPORT_FORMATS", "EXPORT_MANIFEST", "DEFAULT_CHUNK_SIZE", "findRawFiles",
+           "observationInfoColumns", "ExportManifest", "ExportSummary", "exportObservationInfo")
+
+import datetime
+import fnmatch
+import os
+import sqlite3
+from dataclasses import dataclass, field
+
+import astropy.coordinates
+import astropy.time
+import astropy.units as u
+from astro_metadata_translator.properties import PROPERTIES
+
+import lsst.log
+
+from .obsInfoBatch import readObservationInfoBatch
+
+EXPORT_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+"""Supported output formats and the file extension of each."""
+
+EXPORT_MANIFEST = "manifest.sqlite3"
+"""Name of the manifest within the output directory."""
+
+DEFAULT_CHUNK_SIZE = 10000
+"""Default number of rows written to each output file."""
+
+_MANIFEST_VERSION = "1"
+
+_RAW_PATTERNS = ("*.fits", "*.fits.fz", "*.fits.gz", "*.fz")
+
+# Units of the quantity-valued properties in the exported columns.
+_QUANTITY_UNITS = {"exposure_time": u.s, "dark_time": u.s, "temperature": u.deg_C,
+                   "pressure": u.hPa}
+
+logger = lsst.log.Log.getLogger("obs.lsst.obsInfoExport")
+
+
+def _importPyarrow():
+    """Import pyarrow, which is only needed when writing the files."""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("Exporting observation metadata requires pyarrow") from e
+    return pyarrow
+
+
+def findRawFiles(root, patterns=_RAW_PATTERNS):
+    """Find raw files below a directory.
+
+    Parameters
+    ----------
+    root : `str`
+        Directory to search. Sub-directories are searched recursively.
+    patterns : `tuple` of `str`, optional
+        Glob patterns matched against the file names.
+
+    Yields
+    ------
+    path : `str`
+        Absolute name of each matching file. Each directory is listed in
+        sorted order, and the tree is walked lazily.
+    """
+    for dirPath, dirNames, fileNames in os.walk(os.path.abspath(root)):
+        dirNames.sort()
+        for fileName in sorted(fileNames):
+            if any(fnmatch.fnmatch(fileName, p) for p in patterns):
+                yield os.path.join(dirPath, fileName)
+
+
+def _propertyColumns(name, pyType):
+    """Return the columns representing a single property.
+
+    Parameters
+    ----------
+    name : `str`
+        Name of the `~astro_metadata_translator.ObservationInfo` property.
+    pyType : `type`
+        Python type of the property.
+
+    Returns
+    -------
+    columns : `list` of `tuple`
+        For each column the name, the arrow type name, the unit (or `None`)
+        and a function converting a defined property value to the column
+        value.
+    """
+    if issubclass(pyType, astropy.coordinates.EarthLocation):
+        return [(f"{name}_lon", "float64", "deg", lambda v: v.lon.to_value(u.deg)),
+                (f"{name}_lat", "float64", "deg", lambda v: v.lat.to_value(u.deg)),
+                (f"{name}_height", "float64", "m", lambda v: v.height.to_value(u.m))]
+    if issubclass(pyType, astropy.coordinates.AltAz):
+        return [(f"{name}_alt", "float64", "deg", lambda v: v.alt.to_value(u.deg)),
+                (f"{name}_az", "float64", "deg", lambda v: v.az.to_value(u.deg))]
+    if issubclass(pyType, astropy.coordinates.SkyCoord):
+        return [(f"{name}_ra", "float64", "deg", lambda v: v.icrs.ra.to_value(u.deg)),
+                (f"{name}_dec", "float64", "deg", lambda v: v.icrs.dec.to_value(u.deg))]
+    if issubclass(pyType, astropy.time.Time):
+        return [(f"{name}_mjd_tai", "float64", "d", lambda v: v.tai.mjd)]
+    if issubclass(pyType, astropy.coordinates.Angle):
+        return [(name, "float64", "deg", lambda v: v.to_value(u.deg))]
+    if issubclass(pyType, u.Quantity):
+        unit = _QUANTITY_UNITS.get(name)
+        if unit is None:
+            return [(name, "float64", "SI", lambda v: v.si.value)]
+        return [(name, "float64", unit.to_string(),
+                 lambda v: v.to_value(unit, equivalencies=u.temperature()))]
+    if issubclass(pyType, bool):
+        return [(name, "bool", None, bool)]
+    if issubclass(pyType, int):
+        return [(name, "int64", None, int)]
+    if issubclass(pyType, float):
+        return [(name, "float64", None, float)]
+    return [(name, "string", None, str)]
+
+
+def observationInfoColumns():
+    """Describe the columns of the exported tables.
+
+    Returns
+    -------
+    columns : `list` of `tuple`
+        For each column the name, the arrow type name and the unit (or
+        `None`). The first column, ``path``, is the name of the raw file;
+        the others are derived from the
+        `~astro_metadata_translator.ObservationInfo` properties. Times are
+        given as TAI MJD, angles and coordinates in degrees.
+    """
+    return [("path", "string", None)] + [column[1:4] for column in _propertyConverters()]
+
+
+def _propertyConverters():
+    """Return the columns of all the properties.
+
+    Returns
+    -------
+    converters : `list` of `tuple`
+        For each column the property name, followed by the column
+        definition returned by `_propertyColumns`.
+    """
+    converters = []
+    for name, definition in PROPERTIES.items():
+        # Element 2 is the python type in all versions of the definitions
+        converters.extend((name, *column) for column in _propertyColumns(name, definition[2]))
+    return converters
+
+
+class _ColumnBuffer:
+    """Accumulate converted rows column by column until they are written.
+    """
+
+    def __init__(self):
+        self._converters = _propertyConverters()
+        self.columns = {"path": []}
+        self.columns.update((column[1], []) for column in self._converters)
+
+    def __len__(self):
+        return len(self.columns["path"])
+
+    def append(self, path, info):
+        """Add the properties of a file.
+
+        Parameters
+        ----------
+        path : `str`
+            Name of the raw file.
+        info : `dict`
+            Properties of the observation.
+        """
+        self.columns["path"].append(path)
+        for name, columnName, _, _, convert in self._converters:
+            value = info.get(name)
+            self.columns[columnName].append(convert(value) if value is not None else None)
+
+    def clear(self):
+        """Remove all the rows."""
+        for values in self.columns.values():
+            values.clear()
+
+
+class ExportManifest:
+    """Record of the files that have been exported to a directory.
+
+    The manifest is a SQLite database listing every file that has been
+    processed and the output file holding its row. It is updated once
+    for each output file so that an interrupted export can be resumed.
+
+    Parameters
+    ----------
+    outputDir : `str`
+        Directory holding the output files and the manifest.
+    fileFormat : `str`
+        Format of the output files, one of `EXPORT_FORMATS`.
+
+    Raises
+    ------
+    ValueError
+        Raised if the directory already holds files of another format.
+    """
+
+    def __init__(self, outputDir, fileFormat):
+        self.outputDir = outputDir
+        self.fileFormat = fileFormat
+        os.makedirs(outputDir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(outputDir, EXPORT_MANIFEST))
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS chunks (name TEXT PRIMARY KEY, n_rows INTEGER, "
+                             "created TEXT)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, chunk TEXT, "
+                             "error TEXT)")
+            self._db.executemany("INSERT OR IGNORE INTO metadata VALUES (?, ?)",
+                                 (("version", _MANIFEST_VERSION), ("format", fileFormat)))
+        metadata = dict(self._db.execute("SELECT key, value FROM metadata"))
+        if metadata["format"] != fileFormat:
+            self.close()
+            raise ValueError(f"{outputDir} holds {metadata['format']} files, not {fileFormat}")
+        if metadata["version"] != _MANIFEST_VERSION:
+            self.close()
+            raise ValueError(f"Manifest in {outputDir} has unsupported version {metadata['version']}")
+
+    def close(self):
+        """Close the manifest database."""
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def isDone(self, path, retryFailed=False):
+        """Indicate whether a file has already been processed.
+
+        Parameters
+        ----------
+        path : `str`
+            Absolute name of the raw file.
+        retryFailed : `bool`, optional
+            If `True` files that could not be translated are not considered
+            to be done.
+
+        Returns
+        -------
+        done : `bool`
+            `True` if the file should be skipped.
+        """
+        row = self._db.execute("SELECT error FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return False
+        return row[0] is None or not retryFailed
+
+    def chunkNames(self):
+        """Return the names of the output files listed in the manifest.
+
+        Returns
+        -------
+        names : `list` of `str`
+            Names of the output files, relative to the output directory.
+        """
+        return [name for name, in self._db.execute("SELECT name FROM chunks ORDER BY name")]
+
+    def nextChunkName(self):
+        """Return the name of the next output file to write.
+
+        Returns
+        -------
+        name : `str`
+            Name relative to the output directory.
+        """
+        count, = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()
+        return f"part-{count:06d}{EXPORT_FORMATS[self.fileFormat]}"
+
+    def removeOrphans(self):
+        """Remove output files that are not listed in the manifest.
+
+        These are left behind if an export is interrupted while writing a
+        file, and would otherwise duplicate rows written when the export is
+        resumed.
+
+        Returns
+        -------
+        removed : `list` of `str`
+            Names of the files that were removed.
+        """
+        known = set(self.chunkNames())
+        removed = []
+        for name in sorted(os.listdir(self.outputDir)):
+            if name.startswith("part-") and name not in known:
+                os.remove(os.path.join(self.outputDir, name))
+                removed.append(name)
+        return removed
+
+    def record(self, chunkName, paths, failures, write):
+        """Write an output file and record its contents.
+
+        Parameters
+        ----------
+        chunkName : `str` or `None`
+            Name of the output file, or `None` if there are no rows to
+            write.
+        paths : `list` of `str`
+            Raw files whose rows are in the output file.
+        failures : `list` of `tuple` [`str`, `str`]
+            Raw files that could not be translated and the reason.
+        write : callable
+            Function called with the full name of a temporary file to which
+            the rows should be written. Not called if ``chunkName`` is
+            `None`.
+        """
+        with self._db:
+            if chunkName is not None:
+                created = datetime.datetime.now(datetime.timezone.utc).isoformat()
+                self._db.execute("INSERT INTO chunks VALUES (?, ?, ?)", (chunkName, len(paths), created))
+                self._db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, NULL)",
+                                     ((p, chunkName) for p in paths))
+            self._db.executemany("INSERT OR REPLACE INTO files VALUES (?, NULL, ?)", failures)
+            if chunkName is not None:
+                # The file is moved into place just before the transaction
+                # commits. If the commit is lost the file is an orphan that
+                # removeOrphans deletes on the next run.
+                fileName = os.path.join(self.outputDir, chunkName)
+                tmpFile = fileName + ".tmp"
+                try:
+                    write(tmpFile)
+                    os.replace(tmpFile, fileName)
+                except BaseException:
+                    if os.path.exists(tmpFile):
+                        os.remove(tmpFile)
+                    raise
+
+
+@dataclass
+class ExportSummary:
+    """Outcome of an export."""
+
+    nExported: int = 0
+    """Number of files whose metadata were written."""
+
+    nFailed: int = 0
+    """Number of files that could not be translated."""
+
+    nSkipped: int = 0
+    """Number of files skipped because they had already been processed."""
+
+    chunks: list = field(default_factory=list)
+    """Names of the output files written by this export."""
+
+
+def _writeTable(pa, columns, schema, fileFormat, fileName):
+    """Write buffered columns to a single output file."""
+    table = pa.Table.from_pydict(columns, schema=schema)
+    if fileFormat == "parquet":
+        pa.parquet.write_table(table, fileName)
+    else:
+        with pa.OSFile(fileName, "wb") as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                writer.write_table(table)
+
+
+def _arrowSchema(pa):
+    """Construct the arrow schema of the exported tables."""
+    fields = []
+    for name, typeName, unit in observationInfoColumns():
+        metadata = {"unit": unit} if unit is not None else None
+        fields.append(pa.field(name, getattr(pa, typeName)(), metadata=metadata))
+    return pa.schema(fields, metadata={"manifest_version": _MANIFEST_VERSION})
+
+
+def exportObservationInfo(paths, outputDir, fileFormat="parquet", chunkSize=DEFAULT_CHUNK_SIZE,
+                          translator_class=None, maxWorkers=None, retryFailed=False):
+    """Translate the headers of many raw files and write the metadata to
+    columnar files.
+
+    Parameters
+    ----------
+    paths : iterable of `str`
+        Raw files to export, for example from `findRawFiles`. The iterable
+        is consumed lazily.
+    outputDir : `str`
+        Directory to hold the output files and the manifest. Files listed
+        in an existing manifest are skipped.
+    fileFormat : `str`, optional
+        Format of the output files, one of `EXPORT_FORMATS`.
+    chunkSize : `int`, optional
+        Maximum number of rows in each output file. Memory use is
+        proportional to this rather than to the number of files.
+    translator_class : `~astro_metadata_translator.MetadataTranslator`,
+                       optional
+        Translator to use. If `None` it is determined from each header.
+    maxWorkers : `int`, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    retryFailed : `bool`, optional
+        If `True` files that could not be translated by an earlier export
+        are tried again.
+
+    Returns
+    -------
+    summary : `ExportSummary`
+        Numbers of files exported, failed and skipped.
+
+    Raises
+    ------
+    ValueError
+        Raised if the format or chunk size is not valid.
+    RuntimeError
+        Raised if pyarrow is not available.
+    """
+    if fileFormat not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fileFormat!r}; expected one of {sorted(EXPORT_FORMATS)}")
+    if chunkSize < 1:
+        raise ValueError(f"Chunk size must be positive, not {chunkSize}")
+    pa = _importPyarrow()
+    schema = _arrowSchema(pa)
+    summary = ExportSummary()
+
+    with ExportManifest(outputDir, fileFormat) as manifest:
+        for name in manifest.removeOrphans():
+            logger.warn("Removed %s left by an interrupted export", name)
+
+        def pending():
+            for path in paths:
+                path = os.path.abspath(path)
+                if manifest.isDone(path, retryFailed=retryFailed):
+                    summary.nSkipped += 1
+                else:
+                    yield path
+
+        buffer = _ColumnBuffer()
+        failures = []
+
+        def flush():
+            chunkName = manifest.nextChunkName() if len(buffer) else None
+            manifest.record(chunkName, buffer.columns["path"], failures,
+                            lambda fileName: _writeTable(pa, buffer.columns, schema, fileFormat, fileName))
+            if chunkName is not None:
+                summary.chunks.append(chunkName)
+                logger.info("Wrote %d rows to %s", len(buffer), chunkName)
+            summary.nExported += len(buffer)
+            summary.nFailed += len(failures)
+            buffer.clear()
+            failures.clear()
+
+        for result in readObservationInfoBatch(pending(), translator_class=translator_class,
+                                               maxWorkers=maxWorkers):
+            if result.ok:
+                buffer.append(result.path, result.info)
+            else:
+                logger.warn("Unable to translate %s: %s", result.path, result.error.message)
+                failures.append((result.path, f"{result.error.exceptionType}: {result.error.message}"))
+            if len(buffer) + len(failures) >= chunkSize:
+                flush()
+        if len(buffer) or failures:
+            flush()
+
+    return summary
@@ -33,9 +33,6 @@ __all__ = (
     "LsstUCDCamRawFormatter",
 )
 
-from astro_metadata_translator import fix_header, merge_headers
-
-import lsst.afw.fits
 from lsst.obs.base import FitsRawFormatterBase
 
 from ._instrument import LsstCam, Latiss, \
@@ -44,7 +41,10 @@ from ._instrument import LsstCam, Latiss, \
 from .translators import LatissTranslator, LsstCamTranslator, \
     LsstUCDCamTranslator, LsstTS3Translator, LsstComCamTranslator, \
     LsstCamPhoSimTranslator, LsstTS8Translator, LsstCamImSimTranslator
-from .assembly import fixAmpsAndAssemble, readRawAmps
+from .assembly import readRawAndAssemble
+from ._fitsHeader import readRawFitsHeader
+from ._obsInfoCache import getObservationInfo
+from .sharedCamera import getSharedCamera
 
 
 class LsstCamRawFormatter(FitsRawFormatterBase):
@@ -52,6 +52,12 @@ class LsstCamRawFormatter(FitsRawFormatterBase):
     filterDefinitions = LsstCam.filterDefinitions
     _instrument = LsstCam
 
+    useMemoryMap = False
+    """Read uncompressed raw files through a memory map, assembling the
+    amps directly from the mapped pixels.  Off by default; set it on a
+    subclass or instance to opt in.  Compressed files always fall back
+    to reading each amp."""
+
     def readMetadata(self):
         """Read all header metadata directly into a PropertyList.
 
@@ -62,20 +68,41 @@ class LsstCamRawFormatter(FitsRawFormatterBase):
         -------
         metadata : `~lsst.daf.base.PropertyList`
             Header metadata.
+
+        Notes
+        -----
+        The header is read with `readRawFitsHeader` so that it is shared
+        with any other reader of the same file in this process.
         """
         file = self.fileDescriptor.location.path
-        phdu = lsst.afw.fits.readMetadata(file, 0)
-        if "INHERIT" in phdu:
-            # Trust the inheritance flag
-            return super().readMetadata()
+        return readRawFitsHeader(file, translator_class=self.translatorClass)
 
-        # Merge ourselves
-        md = merge_headers([phdu, lsst.afw.fits.readMetadata(file)],
-                           mode="overwrite")
-        fix_header(md)
-        return md
+    @property
+    def observationInfo(self):
+        """The `~astro_metadata_translator.ObservationInfo` extracted from
+        this file's metadata (`~astro_metadata_translator.ObservationInfo`,
+        read-only).
+
+        The translation is shared with any other reader of the same header
+        in this process.
+        """
+        if getattr(self, "_observationInfo", None) is None:
+            location = self.fileDescriptor.location
+            path = location.path if location is not None else None
+            self._observationInfo = getObservationInfo(self.metadata, translator_class=self.translatorClass,
+                                                       filename=path)
+        return self._observationInfo
 
     def getDetector(self, id):
+        """Return the detector with the given ID.
+
+        The detector is taken from the camera published with
+        `~lsst.obs.lsst.sharedCamera.SharedCamera.share`, if any, so that
+        processes of a pool do not each build the full camera.
+        """
+        sharedCamera = getSharedCamera(self._instrument.getName())
+        if sharedCamera is not None:
+            return sharedCamera.getDetector(id)
         return self._instrument.getCamera()[id]
 
     def readImage(self):
@@ -108,8 +135,7 @@ class LsstCamRawFormatter(FitsRawFormatterBase):
         """
         rawFile = self.fileDescriptor.location.path
         ccd = self.getDetector(self.observationInfo.detector_num)
-        ampExps = readRawAmps(rawFile, ccd)
-        exposure = fixAmpsAndAssemble(ampExps, rawFile)
+        exposure = readRawAndAssemble(rawFile, ccd, useMemoryMap=self.useMemoryMap)
 
         mask = self.readMask()
         if mask is not None:
@@ -0,0 +1,421 @@
+#!/usr/bin/env python
+# This file is part of obs_lsst.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+__all__ = ("main", "readHeaderCorpus", "groupByTranslator", "benchmarkFixHeader",
+           "benchmarkObservationInfo", "benchmarkMethods", "runBenchmarks", "compareResults")
+
+import argparse
+import copy
+import datetime
+import glob
+import itertools
+import json
+import logging
+import os
+import platform
+import sys
+import time
+
+import astropy
+import numpy as np
+import astro_metadata_translator
+from astro_metadata_translator import MetadataTranslator, ObservationInfo
+from astro_metadata_translator.properties import PROPERTIES
+from astro_metadata_translator.tests import read_test_file
+
+from lsst.obs.lsst.translators import (LsstCamTranslator, LatissTranslator, LsstComCamTranslator,
+                                       LsstTS3Translator, LsstTS8Translator, LsstUCDCamTranslator,
+                                       LsstCamImSimTranslator, LsstCamPhoSimTranslator)
+
+TRANSLATORS = (LsstCamTranslator, LatissTranslator, LsstComCamTranslator, LsstTS3Translator,
+               LsstTS8Translator, LsstUCDCamTranslator, LsstCamImSimTranslator, LsstCamPhoSimTranslator)
+"""Translators covered by the benchmarks."""
+
+RESULTS_VERSION = 1
+"""Version of the layout of the JSON results."""
+
+
+def build_argparser():
+    """Construct an argument parser for the ``benchmarkTranslators.py``
+    script.
+
+    Returns
+    -------
+    argparser : `argparse.ArgumentParser`
+        The argument parser that defines the ``benchmarkTranslators.py``
+        command-line interface.
+    """
+    parser = argparse.ArgumentParser(description="""
+    Time the obs_lsst metadata translators on a corpus of YAML header
+    files, replicated to a given number of headers per translator. The
+    header corrections, the construction of a complete ObservationInfo and
+    each translation method are timed separately.
+    """)
+
+    parser.add_argument("--headers", type=str,
+                        help="Directory of YAML header files (default: the obs_lsst test headers)",
+                        default=None)
+    parser.add_argument("--volume", type=int, default=200,
+                        help="Number of headers to translate per translator and pass")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of passes; the fastest pass is reported as the best time")
+    parser.add_argument("--translator", action="append", default=None, dest="translators",
+                        help="Name of a translator to benchmark (default: all). Can be repeated.")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Write the results to this JSON file")
+    parser.add_argument("--compare", type=str, default=None,
+                        help="JSON results of an earlier run to compare with")
+
+    return parser
+
+
+def readHeaderCorpus(headerDir, pattern="*.yaml"):
+    """Read all the YAML headers matching a pattern.
+
+    Parameters
+    ----------
+    headerDir : `str`
+        Directory containing the headers.
+    pattern : `str`, optional
+        Glob pattern for the file names.
+
+    Returns
+    -------
+    headers : `dict` [`str`, `dict`]
+        Headers indexed by file name.
+    """
+    return {os.path.basename(f): read_test_file(f)
+            for f in sorted(glob.glob(os.path.join(headerDir, pattern)))}
+
+
+def groupByTranslator(headers, translators=TRANSLATORS):
+    """Group headers by the translator that handles them.
+
+    Parameters
+    ----------
+    headers : `dict` [`str`, `dict`]
+        Headers indexed by file name.
+    translators : iterable of `type`, optional
+        Translators of interest. Headers handled by other translators are
+        ignored.
+
+    Returns
+    -------
+    groups : `dict` [`type`, `list` of `dict`]
+        Headers for each translator that handles at least one of them.
+    """
+    wanted = set(translators)
+    groups = {}
+    for fileName, header in headers.items():
+        try:
+            translatorClass = MetadataTranslator.determine_translator(header, filename=fileName)
+        except ValueError:
+            continue
+        if translatorClass in wanted:
+            groups.setdefault(translatorClass, []).append(header)
+    return groups
+
+
+def _replicate(headers, volume):
+    """Return ``volume`` headers taken cyclically from ``headers``."""
+    return list(itertools.islice(itertools.cycle(headers), volume))
+
+
+def _timePasses(prepare, run, repeat):
+    """Time several passes of a benchmark.
+
+    Parameters
+    ----------
+    prepare : callable
+        Called before each pass, outside the timed region. Returns the list
+        of arguments for that pass.
+    run : callable
+        Called with each argument in turn. Returns `True` if the call
+        failed.
+    repeat : `int`
+        Number of passes.
+
+    Returns
+    -------
+    timing : `dict`
+        Best and mean time per call in microseconds, the number of calls
+        per pass and the number of failed calls per pass.
+    """
+    passTimes = []
+    for _ in range(repeat):
+        items = prepare()
+        errors = 0
+        start = time.perf_counter()
+        for item in items:
+            if run(item):
+                errors += 1
+        passTimes.append(time.perf_counter() - start)
+    nCalls = len(items)
+    return {"best_us": min(passTimes)/nCalls*1e6,
+            "mean_us": sum(passTimes)/len(passTimes)/nCalls*1e6,
+            "calls": nCalls,
+            "errors": errors}
+
+
+def _failed(func, *args, **kwargs):
+    """Call a function, returning `True` if it raised."""
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        return True
+    return False
+
+
+def benchmarkFixHeader(translatorClass, headers, repeat):
+    """Time the ``fix_header`` method of a translator.
+
+    Parameters
+    ----------
+    translatorClass : `type`
+        Translator to benchmark.
+    headers : `list` of `dict`
+        Uncorrected headers. They are not modified.
+    repeat : `int`
+        Number of passes over the headers.
+
+    Returns
+    -------
+    timing : `dict`
+        Time per header, excluding the time taken to copy it.
+    """
+    # The instrument and observation ID are determined as
+    # astro_metadata_translator would, outside of the timed loop.
+    work = []
+    for header in headers:
+        translator = translatorClass(header)
+        work.append((header, translator.to_instrument(), translator.to_observation_id()))
+
+    def prepare():
+        return [(copy.copy(header), instrument, obsid) for header, instrument, obsid in work]
+
+    def run(item):
+        return _failed(translatorClass.fix_header, *item)
+
+    return _timePasses(prepare, run, repeat)
+
+
+def benchmarkObservationInfo(translatorClass, headers, repeat):
+    """Time the construction of a complete
+    `~astro_metadata_translator.ObservationInfo`.
+
+    Parameters
+    ----------
+    translatorClass : `type`
+        Translator to use.
+    headers : `list` of `dict`
+        Uncorrected headers. They are not modified.
+    repeat : `int`
+        Number of passes over the headers.
+
+    Returns
+    -------
+    timing : `dict`
+        Time per header, excluding the time taken to copy it.
+    """
+    def prepare():
+        return [copy.copy(header) for header in headers]
+
+    def run(header):
+        return _failed(ObservationInfo, header, translator_class=translatorClass, pedantic=False)
+
+    return _timePasses(prepare, run, repeat)
+
+
+def benchmarkMethods(translatorClass, headers, repeat):
+    """Time each translation method of a translator.
+
+    Parameters
+    ----------
+    translatorClass : `type`
+        Translator to use.
+    headers : `list` of `dict`
+        Headers to translate. Each is corrected once before timing, as it
+        would be by `~astro_metadata_translator.ObservationInfo`.
+    repeat : `int`
+        Number of passes over the headers.
+
+    Returns
+    -------
+    timings : `dict` [`str`, `dict`]
+        Time per call of each ``to_*`` method. Each call is made on a new
+        translator so that no earlier translation is reused.
+    """
+    fixed = []
+    for header in headers:
+        header = copy.copy(header)
+        translator = translatorClass(header)
+        translatorClass.fix_header(header, translator.to_instrument(), translator.to_observation_id())
+        fixed.append(header)
+
+    def prepare():
+        return [translatorClass(header) for header in fixed]
+
+    timings = {}
+    for name in PROPERTIES:
+        method = f"to_{name}"
+        timings[method] = _timePasses(prepare, lambda translator: _failed(getattr(translator, method)),
+                                      repeat)
+    return timings
+
+
+def runBenchmarks(corpus, volume, repeat):
+    """Run all the benchmarks.
+
+    Parameters
+    ----------
+    corpus : `dict` [`type`, `list` of `dict`]
+        Distinct headers for each translator.
+    volume : `int`
+        Number of headers to translate per translator and pass. The
+        corpus is replicated to this size.
+    repeat : `int`
+        Number of passes.
+
+    Returns
+    -------
+    results : `dict`
+        Description of the environment and the timings for each
+        translator, suitable for writing as JSON.
+    """
+    results = {
+        "version": RESULTS_VERSION,
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "astropy": astropy.__version__,
+            "astro_metadata_translator": getattr(astro_metadata_translator, "__version__", "unknown"),
+            "obs_lsst": _obsLsstVersion(),
+        },
+        "volume": volume,
+        "repeat": repeat,
+        "translators": {},
+    }
+    for translatorClass, headers in corpus.items():
+        replicated = _replicate(headers, volume)
+        results["translators"][translatorClass.name] = {
+            "distinct_headers": len(headers),
+            "fix_header": benchmarkFixHeader(translatorClass, replicated, repeat),
+            "observation_info": benchmarkObservationInfo(translatorClass, replicated, repeat),
+            "methods": benchmarkMethods(translatorClass, replicated, repeat),
+        }
+    return results
+
+
+def _obsLsstVersion():
+    try:
+        from lsst.obs.lsst.version import __version__
+    except ImportError:
+        return "unknown"
+    return __version__
+
+
+def _iterTimings(results):
+    """Yield the name and best time of every benchmark in a set of
+    results."""
+    for translatorName, timings in results["translators"].items():
+        for benchmark in ("fix_header", "observation_info"):
+            yield f"{translatorName} {benchmark}", timings[benchmark]["best_us"]
+        for method, timing in timings["methods"].items():
+            yield f"{translatorName} {method}", timing["best_us"]
+
+
+def compareResults(previous, current, threshold=1.2):
+    """Find the benchmarks that have become slower.
+
+    Parameters
+    ----------
+    previous : `dict`
+        Results of an earlier run, as returned by `runBenchmarks`.
+    current : `dict`
+        Results of this run.
+    threshold : `float`, optional
+        Ratio of the best times above which a benchmark is reported.
+
+    Returns
+    -------
+    regressions : `list` of `tuple`
+        Name, previous and current best time in microseconds of each
+        benchmark that is slower by more than the threshold.
+    """
+    before = dict(_iterTimings(previous))
+    regressions = []
+    for name, now in _iterTimings(current):
+        then = before.get(name)
+        if then and now > threshold*then:
+            regressions.append((name, then, now))
+    return regressions
+
+
+def main():
+    args = build_argparser().parse_args()
+
+    headerDir = args.headers
+    if headerDir is None:
+        from lsst.utils import getPackageDir
+        headerDir = os.path.join(getPackageDir("obs_lsst"), "tests", "headers")
+
+    translators = TRANSLATORS
+    if args.translators:
+        translators = [t for t in TRANSLATORS if t.name in args.translators]
+        unknown = set(args.translators) - {t.name for t in translators}
+        if unknown:
+            print(f"Unknown translators: {', '.join(sorted(unknown))}", file=sys.stderr)
+            return 1
+
+    corpus = groupByTranslator(readHeaderCorpus(headerDir), translators)
+    if not corpus:
+        print(f"No headers found in {headerDir}", file=sys.stderr)
+        return 1
+
+    # Untranslatable properties are expected for some of the test headers
+    # and would otherwise be reported for every replicated header.
+    logging.getLogger("astro_metadata_translator").setLevel(logging.ERROR)
+    results = runBenchmarks(corpus, args.volume, args.repeat)
+
+    for translatorName, timings in results["translators"].items():
+        methodTotal = sum(t["best_us"] for t in timings["methods"].values())
+        print(f"{translatorName:>16s}: fix_header {timings['fix_header']['best_us']:8.1f} us, "
+              f"ObservationInfo {timings['observation_info']['best_us']:8.1f} us, "
+              f"all to_* methods {methodTotal:8.1f} us per header")
+
+    if args.output:
+        with open(args.output, "w") as fd:
+            json.dump(results, fd, indent=2)
+
+    if args.compare:
+        with open(args.compare) as fd:
+            previous = json.load(fd)
+        regressions = compareResults(previous, results)
+        for name, then, now in regressions:
+            print(f"Slower: {name} {then:.1f} us -> {now:.1f} us")
+        if regressions:
+            return 2
+    return 0
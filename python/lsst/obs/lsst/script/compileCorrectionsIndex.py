@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# This file is part of obs_lsst.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+__all__ = ("main",)
+
+import argparse
+import os
+import sys
+
+from lsst.utils import getPackageDir
+from lsst.obs.lsst.translators.corrections_index import compile_corrections_index
+
+
+def build_argparser():
+    """Construct an argument parser for the ``compileCorrectionsIndex.py``
+    script.
+
+    Returns
+    -------
+    argparser : `argparse.ArgumentParser`
+        The argument parser that defines the ``compileCorrectionsIndex.py``
+        command-line interface.
+    """
+    parser = argparse.ArgumentParser(description="""
+    Compile the per-observation header correction files into a single
+    index, allowing the translators to establish whether an observation
+    has a correction without searching the file system.
+    """)
+
+    parser.add_argument("--corrections", type=str,
+                        help="Directory of correction files (default: the obs_lsst corrections directory)",
+                        default=None)
+    parser.add_argument("--output", type=str, help="Name of the index file to write", default=None)
+
+    return parser
+
+
+def main():
+    args = build_argparser().parse_args()
+
+    correctionsDir = args.corrections
+    if correctionsDir is None:
+        correctionsDir = os.path.join(getPackageDir("obs_lsst"), "corrections")
+
+    try:
+        nEntries = compile_corrections_index(correctionsDir, args.output)
+    except Exception as e:
+        print(f"{e}", file=sys.stderr)
+        return 1
+    print(f"Indexed {nEntries} corrections from {correctionsDir}")
+    return 0
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# This file is part of obs_lsst.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+
+
+__all__ = ("main",)
+
+import argparse
+import sys
+
+from astro_metadata_translator import MetadataTranslator
+
+from lsst.obs.lsst.obsInfoExport import (EXPORT_FORMATS, DEFAULT_CHUNK_SIZE, findRawFiles,
+                                         exportObservationInfo)
+
+
+def build_argparser():
+    """Construct an argument parser for the ``exportObservationInfo.py``
+    script.
+
+    Returns
+    -------
+    argparser : `argparse.ArgumentParser`
+        The argument parser that defines the ``exportObservationInfo.py``
+        command-line interface.
+    """
+    parser = argparse.ArgumentParser(description="""
+    Translate the headers of every raw file below one or more directories
+    and write the observation metadata to Parquet or Arrow files, one row
+    per file. A manifest in the output directory records the files that
+    have been processed, so rerunning the command only translates new
+    files.
+    """)
+
+    parser.add_argument("roots", nargs="+", help="Directories to search for raw files")
+    parser.add_argument("--output", type=str, required=True,
+                        help="Directory to hold the output files and the manifest")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="parquet",
+                        dest="fileFormat", help="Format of the output files")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, dest="chunkSize",
+                        help="Maximum number of rows per output file")
+    parser.add_argument("--translator", type=str, default=None,
+                        help="Name of the translator to use (default: determined from each header)")
+    parser.add_argument("-j", "--processes", type=int, default=None,
+                        help="Number of worker processes (default: the number of CPUs)")
+    parser.add_argument("--pattern", action="append", default=None, dest="patterns",
+                        help="Glob pattern for raw file names (default: FITS files). Can be repeated.")
+    parser.add_argument("--retry-failed", action="store_true", dest="retryFailed",
+                        help="Try again to translate files that failed in an earlier run")
+
+    return parser
+
+
+def main():
+    args = build_argparser().parse_args()
+
+    translatorClass = None
+    if args.translator is not None:
+        translatorClass = MetadataTranslator.translators.get(args.translator)
+        if translatorClass is None:
+            print(f"Unknown translator: {args.translator}", file=sys.stderr)
+            return 1
+
+    findArgs = {"patterns": tuple(args.patterns)} if args.patterns else {}
+    paths = (path for root in args.roots for path in findRawFiles(root, **findArgs))
+
+    try:
+        summary = exportObservationInfo(paths, args.output, fileFormat=args.fileFormat,
+                                        chunkSize=args.chunkSize, translator_class=translatorClass,
+                                        maxWorkers=args.processes, retryFailed=args.retryFailed)
+    except Exception as e:
+        print(f"{e}", file=sys.stderr)
+        return 1
+
+    print(f"Exported {summary.nExported} files to {len(summary.chunks)} new output files in "
+          f"{args.output}; {summary.nFailed} failed and {summary.nSkipped} were already processed")
+    return 0 if summary.nFailed == 0 else 2
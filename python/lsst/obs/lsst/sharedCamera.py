@@ -0,0 +1,463 @@
+# This file is part of obs_lsst.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Camera geometry shared between processes through shared memory.
+"""
+
+__all__ = ("SHARED_CAMERA_ENV", "DETECTOR_DTYPE", "AMPLIFIER_DTYPE", "SharedCamera", "getSharedCamera")
+
+import json
+import os
+import threading
+from multiprocessing import shared_memory, util
+
+import numpy as np
+
+from lsst.afw.cameraGeom import Detector
+from lsst.afw.fits import MemFileManager
+
+SHARED_CAMERA_ENV = "OBS_LSST_SHARED_CAMERAS"
+"""Environment variable listing the shared memory block of each published
+camera, as a JSON mapping of instrument name to block name. Processes
+started after a camera is published inherit it."""
+
+DETECTOR_DTYPE = np.dtype([
+    ("id", "i4"),
+    ("name", "S32"),
+    ("serial", "S32"),
+    ("physical_type", "S32"),
+    ("type", "i4"),
+    ("bbox", "i4", (4,)),
+    ("fp_position", "f8", (2,)),
+    ("yaw", "f8"),
+    ("pixel_size", "f8", (2,)),
+    ("amp_start", "i8"),
+    ("n_amps", "i4"),
+    ("blob_offset", "i8"),
+    ("blob_size", "i8"),
+])
+"""Layout of the detector table. Bounding boxes are given as inclusive
+``(min_x, min_y, max_x, max_y)``, the focal plane position in mm and the
+yaw in degrees. ``amp_start`` and ``n_amps`` locate the amplifiers of the
+detector in the amplifier table, ``blob_offset`` and ``blob_size`` its
+complete serialised form."""
+
+AMPLIFIER_DTYPE = np.dtype([
+    ("detector", "i4"),
+    ("name", "S16"),
+    ("bbox", "i4", (4,)),
+    ("raw_bbox", "i4", (4,)),
+    ("raw_data_bbox", "i4", (4,)),
+    ("raw_horizontal_overscan_bbox", "i4", (4,)),
+    ("raw_vertical_overscan_bbox", "i4", (4,)),
+    ("raw_flip_x", "?"),
+    ("raw_flip_y", "?"),
+    ("raw_xy_offset", "i4", (2,)),
+    ("gain", "f8"),
+    ("read_noise", "f8"),
+    ("saturation", "f8"),
+])
+"""Layout of the amplifier table. Bounding boxes are given as inclusive
+``(min_x, min_y, max_x, max_y)``."""
+
+_HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "i8"),
+    ("camera", "S64"),
+    ("n_detectors", "i8"),
+    ("detectors_offset", "i8"),
+    ("n_amplifiers", "i8"),
+    ("amplifiers_offset", "i8"),
+    ("blobs_offset", "i8"),
+    ("blobs_size", "i8"),
+])
+
+_MAGIC = b"OBSLSSTC"
+_VERSION = 1
+
+# Cameras attached by this process, indexed by block name.
+_attached = {}
+_attachedLock = threading.Lock()
+
+
+def _align(offset, alignment=8):
+    """Round an offset up to a multiple of the alignment."""
+    return (offset + alignment - 1)//alignment*alignment
+
+
+def _bboxArray(bbox):
+    """Convert a `lsst.geom.Box2I` to inclusive corner coordinates."""
+    return (bbox.getMinX(), bbox.getMinY(), bbox.getMaxX(), bbox.getMaxY())
+
+
+def _serializeDetector(detector):
+    """Serialise a detector with the afw table persistence."""
+    manager = MemFileManager()
+    detector.writeFits(manager)
+    return manager.getData()
+
+
+def _deserializeDetector(data):
+    """Reconstruct a detector serialised by `_serializeDetector`."""
+    manager = MemFileManager(len(data))
+    manager.setData(data, len(data))
+    return Detector.readFits(manager)
+
+
+def _attachSharedMemory(name):
+    """Attach to an existing shared memory block without taking ownership
+    of it."""
+    try:
+        # Python 3.13 and later
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Earlier versions register the block with the resource tracker,
+        # which is shared with the creating process by any process it
+        # starts, so the block is still only unlinked by its creator.
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedCamera:
+    """Detector and amplifier geometry held in a shared memory block.
+
+    Use `create` to lay out a camera in a new block and `attach` to use a
+    block created by another process. The geometry is available as
+    read-only structured arrays, and complete
+    `~lsst.afw.cameraGeom.Detector` objects are reconstructed on demand
+    from the serialised copy held in the block, so a process only pays for
+    the detectors it uses.
+
+    Parameters
+    ----------
+    shm : `multiprocessing.shared_memory.SharedMemory`
+        Block holding the camera.
+    owner : `bool`
+        If `True` the block is removed when this object is closed.
+
+    Raises
+    ------
+    ValueError
+        Raised if the block does not hold a camera.
+    """
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._name = shm.name
+        self._owner = owner
+        self._creatorPid = os.getpid()
+        self._detectorCache = {}
+        self._published = []
+
+        header = np.ndarray((), dtype=_HEADER_DTYPE, buffer=shm.buf)
+        if header["magic"] != _MAGIC or header["version"] != _VERSION:
+            del header
+            shm.close()
+            raise ValueError(f"Shared memory block {shm.name} does not hold a version {_VERSION} camera")
+        self.cameraName = header["camera"].item().decode()
+        self._detectors = np.ndarray((int(header["n_detectors"]),), dtype=DETECTOR_DTYPE, buffer=shm.buf,
+                                     offset=int(header["detectors_offset"]))
+        self._amplifiers = np.ndarray((int(header["n_amplifiers"]),), dtype=AMPLIFIER_DTYPE,
+                                      buffer=shm.buf, offset=int(header["amplifiers_offset"]))
+        self._blobs = shm.buf[int(header["blobs_offset"]):int(header["blobs_offset"] + header["blobs_size"])]
+        del header
+        self._detectors.flags.writeable = False
+        self._amplifiers.flags.writeable = False
+        self._rows = {int(detectorId): row for row, detectorId in enumerate(self._detectors["id"])}
+        # Release the views before the interpreter exits, and remove the
+        # block if this process created it and it has not been closed.
+        self._finalizer = util.Finalize(self, self.close, exitpriority=10)
+
+    @classmethod
+    def create(cls, camera, name=None):
+        """Lay out a camera in a new shared memory block.
+
+        Parameters
+        ----------
+        camera : `lsst.afw.cameraGeom.Camera`
+            Camera to share.
+        name : `str`, optional
+            Name of the block. A unique name is chosen if not given.
+
+        Returns
+        -------
+        sharedCamera : `SharedCamera`
+            The shared camera. The block is removed when it is closed.
+        """
+        detectors = sorted(camera, key=lambda d: d.getId())
+        blobs = [_serializeDetector(detector) for detector in detectors]
+        nAmplifiers = sum(len(detector) for detector in detectors)
+
+        detectorsOffset = _align(_HEADER_DTYPE.itemsize)
+        amplifiersOffset = _align(detectorsOffset + len(detectors)*DETECTOR_DTYPE.itemsize)
+        blobsOffset = _align(amplifiersOffset + nAmplifiers*AMPLIFIER_DTYPE.itemsize)
+        blobsSize = sum(len(blob) for blob in blobs)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(blobsOffset + blobsSize, 1))
+
+        header = detectorTable = amplifierTable = None
+        try:
+            header = np.ndarray((), dtype=_HEADER_DTYPE, buffer=shm.buf)
+            header["camera"] = camera.getName().encode()
+            header["n_detectors"] = len(detectors)
+            header["detectors_offset"] = detectorsOffset
+            header["n_amplifiers"] = nAmplifiers
+            header["amplifiers_offset"] = amplifiersOffset
+            header["blobs_offset"] = blobsOffset
+            header["blobs_size"] = blobsSize
+
+            detectorTable = np.ndarray((len(detectors),), dtype=DETECTOR_DTYPE, buffer=shm.buf,
+                                       offset=detectorsOffset)
+            amplifierTable = np.ndarray((nAmplifiers,), dtype=AMPLIFIER_DTYPE, buffer=shm.buf,
+                                        offset=amplifiersOffset)
+            ampStart = 0
+            blobOffset = 0
+            for row, (detector, blob) in enumerate(zip(detectors, blobs)):
+                orientation = detector.getOrientation()
+                fpPosition = orientation.getFpPosition()
+                pixelSize = detector.getPixelSize()
+                detectorTable[row] = (detector.getId(), detector.getName().encode(),
+                                      detector.getSerial().encode(), detector.getPhysicalType().encode(),
+                                      int(detector.getType()), _bboxArray(detector.getBBox()),
+                                      (fpPosition.getX(), fpPosition.getY()),
+                                      orientation.getYaw().asDegrees(),
+                                      (pixelSize.getX(), pixelSize.getY()),
+                                      ampStart, len(detector), blobOffset, len(blob))
+                for amp in detector:
+                    amplifierTable[ampStart] = (
+                        detector.getId(), amp.getName().encode(), _bboxArray(amp.getBBox()),
+                        _bboxArray(amp.getRawBBox()), _bboxArray(amp.getRawDataBBox()),
+                        _bboxArray(amp.getRawHorizontalOverscanBBox()),
+                        _bboxArray(amp.getRawVerticalOverscanBBox()),
+                        amp.getRawFlipX(), amp.getRawFlipY(),
+                        (amp.getRawXYOffset().getX(), amp.getRawXYOffset().getY()),
+                        amp.getGain(), amp.getReadNoise(), amp.getSaturation())
+                    ampStart += 1
+                shm.buf[blobsOffset + blobOffset:blobsOffset + blobOffset + len(blob)] = blob
+                blobOffset += len(blob)
+
+            # Written last so that a partially written block is never
+            # mistaken for a camera.
+            header["version"] = _VERSION
+            header["magic"] = _MAGIC
+        except BaseException:
+            header = detectorTable = amplifierTable = None
+            shm.close()
+            shm.unlink()
+            raise
+
+        del header, detectorTable, amplifierTable
+        return cls(shm, owner=True)
+
+    @classmethod
+    def share(cls, instrument):
+        """Lay out the camera of an instrument in a new shared memory block
+        and publish it.
+
+        Parameters
+        ----------
+        instrument : `lsst.obs.lsst.LsstCam` or subclass
+            Instrument, or instrument class, whose camera is shared.
+
+        Returns
+        -------
+        sharedCamera : `SharedCamera`
+            The shared camera. The formatters of the instrument read their
+            detectors from it in this process and in any process it starts,
+            until it is closed.
+        """
+        sharedCamera = cls.create(instrument.getCamera())
+        sharedCamera.publish(instrument.getName())
+        return sharedCamera
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to a camera created by another process.
+
+        Parameters
+        ----------
+        name : `str`
+            Name of the shared memory block.
+
+        Returns
+        -------
+        sharedCamera : `SharedCamera`
+            The shared camera. Closing it does not remove the block.
+        """
+        return cls(_attachSharedMemory(name), owner=False)
+
+    @property
+    def name(self):
+        """Name of the shared memory block (`str`)."""
+        return self._name
+
+    @property
+    def detectors(self):
+        """Read-only table of the detectors, sorted by ID
+        (`numpy.ndarray` with dtype `DETECTOR_DTYPE`)."""
+        return self._detectors
+
+    @property
+    def amplifiers(self):
+        """Read-only table of all the amplifiers, grouped by detector
+        (`numpy.ndarray` with dtype `AMPLIFIER_DTYPE`)."""
+        return self._amplifiers
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, detectorId):
+        return detectorId in self._rows
+
+    def getAmplifiers(self, detectorId):
+        """Return the amplifier table of a detector.
+
+        Parameters
+        ----------
+        detectorId : `int`
+            Detector ID.
+
+        Returns
+        -------
+        amplifiers : `numpy.ndarray`
+            Read-only view of the rows of the amplifier table.
+        """
+        detector = self._detectors[self._rows[detectorId]]
+        start = int(detector["amp_start"])
+        return self._amplifiers[start:start + int(detector["n_amps"])]
+
+    def getDetector(self, detectorId):
+        """Return a detector.
+
+        Parameters
+        ----------
+        detectorId : `int`
+            Detector ID.
+
+        Returns
+        -------
+        detector : `lsst.afw.cameraGeom.Detector`
+            The detector, reconstructed from the shared copy on first use
+            in this process.
+
+        Raises
+        ------
+        KeyError
+            Raised if the camera has no such detector.
+        """
+        detector = self._detectorCache.get(detectorId)
+        if detector is None:
+            row = self._detectors[self._rows[detectorId]]
+            offset = int(row["blob_offset"])
+            detector = _deserializeDetector(bytes(self._blobs[offset:offset + int(row["blob_size"])]))
+            self._detectorCache[detectorId] = detector
+        return detector
+
+    def __getitem__(self, detectorId):
+        return self.getDetector(detectorId)
+
+    def publish(self, instrument):
+        """Make this camera available to `getSharedCamera` in this process
+        and in any process it starts from now on.
+
+        Parameters
+        ----------
+        instrument : `str`
+            Name of the instrument, as returned by ``getName`` of the
+            instrument class.
+        """
+        published = json.loads(os.environ.get(SHARED_CAMERA_ENV, "{}"))
+        published[instrument] = self.name
+        os.environ[SHARED_CAMERA_ENV] = json.dumps(published)
+        with _attachedLock:
+            _attached[self.name] = self
+        self._published.append(instrument)
+
+    def close(self):
+        """Release the shared memory, removing the block if it was created
+        by this process and withdrawing any publication of it."""
+        if self._shm is None:
+            return
+        self._finalizer.cancel()
+        if self._published and os.getpid() == self._creatorPid:
+            published = json.loads(os.environ.get(SHARED_CAMERA_ENV, "{}"))
+            for instrument in self._published:
+                if published.get(instrument) == self.name:
+                    del published[instrument]
+            if published:
+                os.environ[SHARED_CAMERA_ENV] = json.dumps(published)
+            else:
+                os.environ.pop(SHARED_CAMERA_ENV, None)
+        with _attachedLock:
+            if _attached.get(self.name) is self:
+                del _attached[self.name]
+
+        self._detectors = self._amplifiers = None
+        self._blobs.release()
+        self._blobs = None
+        self._detectorCache.clear()
+        self._rows = {}
+        shm, self._shm = self._shm, None
+        try:
+            shm.close()
+        except BufferError:
+            # Tables returned to callers are still in use; the mapping is
+            # released when the last of them is garbage collected.
+            pass
+        if self._owner and os.getpid() == self._creatorPid:
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def getSharedCamera(instrument):
+    """Return the shared camera published for an instrument, if any.
+
+    Parameters
+    ----------
+    instrument : `str`
+        Name of the instrument.
+
+    Returns
+    -------
+    sharedCamera : `SharedCamera` or `None`
+        The camera, attached on first use in this process, or `None` if no
+        camera has been published for the instrument.
+
+    Notes
+    -----
+    The block must have been created by this process or by one of its
+    ancestors, for example the process that started a worker pool.
+    """
+    published = os.environ.get(SHARED_CAMERA_ENV)
+    if not published:
+        return None
+    name = json.loads(published).get(instrument)
+    if name is None:
+        return None
+    with _attachedLock:
+        sharedCamera = _attached.get(name)
+        if sharedCamera is None:
+            sharedCamera = SharedCamera.attach(name)
+            _attached[name] = sharedCamera
+    return sharedCamera
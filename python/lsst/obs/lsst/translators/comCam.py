@@ -46,6 +46,8 @@ class LsstComCamTranslator(LsstCamTranslator):
         "instrument": "LSSTComCam",
     }
 
+    _header_keywords = frozenset({"TELCODE"})
+
     # Use the comCam raft definition
     cameraPolicyFile = "policy/comCam.yaml"
 
@@ -0,0 +1,148 @@
+# This file is currently part of obs_lsst but is written to allow it
+# to be migrated to the astro_metadata_translator package at a later date.
+#
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the LICENSE file in this directory for details of code ownership.
+#
+# Use of this source code is governed by a 3-clause BSD-style
+# license that can be found in the LICENSE file.
+
+"""Fast conversions between observed and ICRS coordinates"""
+
+__all__ = ("ASTROPY_COORDINATES_ENV", "FAST_COORDINATES_TOLERANCE", "use_fast_coordinates",
+           "altaz_to_icrs", "icrs_to_altaz")
+
+import os
+import warnings
+
+import astropy.units as u
+import astropy.utils.exceptions
+from astropy.coordinates import AltAz, ICRS, SkyCoord
+
+try:
+    import erfa
+except ImportError:
+    # astropy before 4.2 bundles its own copy
+    from astropy import _erfa as erfa
+
+ASTROPY_COORDINATES_ENV = "OBS_LSST_ASTROPY_COORDINATES"
+"""Environment variable that, if set to a non-empty value, makes the
+translators use the full astropy coordinate transformations, for example
+to validate the fast path."""
+
+FAST_COORDINATES_TOLERANCE = 15.0*u.arcsec
+"""Maximum on-sky separation between the fast and the astropy
+transformations.
+
+The fast path uses the ERFA "quick" observed to ICRS routines directly and
+assumes UT1 = UTC and no polar motion, so that no IERS tables are needed.
+|UT1 - UTC| is kept below 0.9 s, which is at most 13.5 arcsec in hour
+angle; polar motion contributes less than 1 arcsec.  Refraction is
+ignored on both paths.
+"""
+
+# Geodetic longitude and latitude (radians) and height (m) for each
+# geocentric location seen so far.
+_geodetic_cache = {}
+
+
+def use_fast_coordinates():
+    """Indicate whether the fast coordinate transformations should be used.
+
+    Returns
+    -------
+    fast : `bool`
+        `False` if the `ASTROPY_COORDINATES_ENV` environment variable is
+        set to a non-empty value.
+    """
+    return not os.environ.get(ASTROPY_COORDINATES_ENV)
+
+
+def _erfa_site(location):
+    """Return the ERFA site parameters of an observatory location."""
+    key = (location.x.to_value(u.m), location.y.to_value(u.m), location.z.to_value(u.m))
+    site = _geodetic_cache.get(key)
+    if site is None:
+        lon, lat, height = location.to_geodetic()
+        site = (lon.to_value(u.rad), lat.to_value(u.rad), height.to_value(u.m))
+        _geodetic_cache[key] = site
+    return site
+
+
+def _erfa_utc(obstime):
+    """Return the two-part UTC Julian date of a time."""
+    if obstime.scale == "tai":
+        # Avoids the general astropy time scale machinery
+        return erfa.taiutc(obstime.jd1, obstime.jd2)
+    utc = obstime.utc
+    return utc.jd1, utc.jd2
+
+
+def altaz_to_icrs(altaz):
+    """Convert an observed position to ICRS.
+
+    Parameters
+    ----------
+    altaz : `astropy.coordinates.AltAz` or `astropy.coordinates.SkyCoord`
+        Observed position with ``obstime`` and ``location`` set.
+
+    Returns
+    -------
+    radec : `astropy.coordinates.SkyCoord`
+        ICRS position, carrying the ``obstime`` and ``location`` of
+        ``altaz``.
+
+    Notes
+    -----
+    Unless `use_fast_coordinates` returns `False` the result agrees with
+    the full astropy transformation to within
+    `FAST_COORDINATES_TOLERANCE`.
+    """
+    if not use_fast_coordinates() or altaz.obstime is None or altaz.location is None:
+        return SkyCoord(altaz.transform_to(ICRS()), obstime=altaz.obstime, location=altaz.location)
+
+    lon, lat, height = _erfa_site(altaz.location)
+    utc1, utc2 = _erfa_utc(altaz.obstime)
+    with warnings.catch_warnings():
+        # Future dates trigger "dubious year" warnings
+        warnings.simplefilter("ignore", category=astropy.utils.exceptions.AstropyWarning)
+        warnings.simplefilter("ignore", category=erfa.ErfaWarning)
+        ra, dec = erfa.atoc13("A", altaz.az.to_value(u.rad), (90.0*u.deg - altaz.alt).to_value(u.rad),
+                              utc1, utc2, 0.0, lon, lat, height, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+    return SkyCoord(ra*u.rad, dec*u.rad, frame="icrs", obstime=altaz.obstime, location=altaz.location)
+
+
+def icrs_to_altaz(radec):
+    """Convert a sky position to an observed position.
+
+    Parameters
+    ----------
+    radec : `astropy.coordinates.SkyCoord`
+        Sky position with ``obstime`` and ``location`` set.
+
+    Returns
+    -------
+    altaz : `astropy.coordinates.SkyCoord`
+        Position in the `~astropy.coordinates.AltAz` frame defined by the
+        ``obstime`` and ``location`` of ``radec``.
+
+    Notes
+    -----
+    Only ICRS positions are transformed with the fast path, to within
+    `FAST_COORDINATES_TOLERANCE` of the full astropy transformation. Other
+    frames always use astropy.
+    """
+    if not use_fast_coordinates() or radec.frame.name != "icrs" or radec.obstime is None \
+            or radec.location is None:
+        return radec.transform_to(AltAz)
+
+    lon, lat, height = _erfa_site(radec.location)
+    utc1, utc2 = _erfa_utc(radec.obstime)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=astropy.utils.exceptions.AstropyWarning)
+        warnings.simplefilter("ignore", category=erfa.ErfaWarning)
+        az, zd, *_ = erfa.atco13(radec.ra.to_value(u.rad), radec.dec.to_value(u.rad), 0.0, 0.0, 0.0, 0.0,
+                                 utc1, utc2, 0.0, lon, lat, height, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+    return SkyCoord(AltAz(az=az*u.rad, alt=90.0*u.deg - zd*u.rad,
+                          obstime=radec.obstime, location=radec.location))
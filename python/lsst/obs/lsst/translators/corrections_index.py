@@ -0,0 +1,214 @@
+# This file is currently part of obs_lsst but is written to allow it
+# to be migrated to the astro_metadata_translator package at a later date.
+#
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the LICENSE file in this directory for details of code ownership.
+#
+# Use of this source code is governed by a 3-clause BSD-style
+# license that can be found in the LICENSE file.
+
+"""Pre-compiled index of the header correction files"""
+
+__all__ = ("CORRECTIONS_INDEX_FILE", "compile_corrections_index", "CorrectionsIndex",
+           "get_corrections_index")
+
+import functools
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+
+import yaml
+
+log = logging.getLogger(__name__)
+
+CORRECTIONS_INDEX_FILE = os.path.join("index", "corrections.sqlite3")
+"""Location of the index relative to the corrections directory."""
+
+_CORRECTIONS_SUFFIX = ".yaml"
+
+
+def _correction_files(corrections_dir):
+    """Return the names of all the correction files in a directory.
+
+    Parameters
+    ----------
+    corrections_dir : `str`
+        Directory containing ``<instrument>-<obsid>.yaml`` files.
+
+    Returns
+    -------
+    names : `list` of `str`
+        Sorted file names, without the directory.
+    """
+    return sorted(entry.name for entry in os.scandir(corrections_dir)
+                  if entry.is_file() and entry.name.endswith(_CORRECTIONS_SUFFIX))
+
+
+def _names_digest(names):
+    """Return a digest of a sorted list of correction file names."""
+    return hashlib.sha256("\n".join(names).encode()).hexdigest()
+
+
+def compile_corrections_index(corrections_dir, index_file=None):
+    """Compile all the correction files in a directory into an index.
+
+    Parameters
+    ----------
+    corrections_dir : `str`
+        Directory containing ``<instrument>-<obsid>.yaml`` files.
+    index_file : `str`, optional
+        File to write. Defaults to `CORRECTIONS_INDEX_FILE` within
+        ``corrections_dir``.
+
+    Returns
+    -------
+    n_entries : `int`
+        Number of corrections in the index.
+
+    Raises
+    ------
+    ValueError
+        Raised if a correction file is not a YAML mapping.
+    """
+    if index_file is None:
+        index_file = os.path.join(corrections_dir, CORRECTIONS_INDEX_FILE)
+    index_dir = os.path.dirname(os.path.abspath(index_file))
+    os.makedirs(index_dir, exist_ok=True)
+
+    rows = []
+    names = _correction_files(corrections_dir)
+    for name in names:
+        with open(os.path.join(corrections_dir, name)) as fd:
+            content = yaml.safe_load(fd)
+        if not isinstance(content, dict):
+            raise ValueError(f"Correction file {name} does not contain a mapping")
+        instrument, obsid = name[:-len(_CORRECTIONS_SUFFIX)].split("-", 1)
+        rows.append((instrument, obsid, name))
+
+    # Write to a temporary file and rename it into place so that readers
+    # never see a partial index.
+    fd, tmp_file = tempfile.mkstemp(dir=index_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        with sqlite3.connect(tmp_file) as db:
+            db.execute("CREATE TABLE corrections (instrument TEXT, obsid TEXT, filename TEXT, "
+                       "PRIMARY KEY (instrument, obsid))")
+            db.execute("CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT)")
+            db.executemany("INSERT INTO corrections VALUES (?, ?, ?)", rows)
+            db.executemany("INSERT INTO metadata VALUES (?, ?)",
+                           (("n_entries", str(len(rows))), ("names_digest", _names_digest(names))))
+        db.close()
+        os.replace(tmp_file, index_file)
+    except BaseException:
+        os.unlink(tmp_file)
+        raise
+
+    log.debug("Wrote index of %d corrections to %s", len(rows), index_file)
+    return len(rows)
+
+
+class CorrectionsIndex:
+    """In-memory view of a compiled corrections index.
+
+    Parameters
+    ----------
+    corrections_dir : `str`
+        Directory containing the correction files.
+    index_file : `str`, optional
+        Compiled index. Defaults to `CORRECTIONS_INDEX_FILE` within
+        ``corrections_dir``.
+
+    Notes
+    -----
+    The index only records which correction files exist, so it is used
+    if the directory still holds the same file names. These are compared
+    through a digest written when the index was compiled, which needs a
+    single listing of the directory and no access to the files
+    themselves, and is unaffected by copying or installing the tree. If a
+    file was added or removed, `is_valid` is `False` and callers should
+    fall back to looking for the correction files themselves.
+    """
+
+    def __init__(self, corrections_dir, index_file=None):
+        if index_file is None:
+            index_file = os.path.join(corrections_dir, CORRECTIONS_INDEX_FILE)
+        self.corrections_dir = corrections_dir
+        self._entries = self._load(corrections_dir, index_file)
+
+    @staticmethod
+    def _load(corrections_dir, index_file):
+        """Read the index entries, returning `None` if there is no usable
+        index."""
+        if not os.path.exists(index_file):
+            return None
+        try:
+            names = _correction_files(corrections_dir)
+            db = sqlite3.connect(f"file:{index_file}?mode=ro", uri=True)
+            try:
+                metadata = dict(db.execute("SELECT key, value FROM metadata"))
+                entries = frozenset(db.execute("SELECT instrument, obsid FROM corrections"))
+            finally:
+                db.close()
+        except (OSError, sqlite3.Error) as e:
+            log.warning("Unable to read corrections index %s: %s", index_file, e)
+            return None
+
+        if metadata.get("names_digest") != _names_digest(names):
+            log.debug("Ignoring corrections index %s since the files in %s have changed",
+                      index_file, corrections_dir)
+            return None
+        return entries
+
+    @property
+    def is_valid(self):
+        """`True` if the index describes the current correction files
+        (`bool`)."""
+        return self._entries is not None
+
+    def __len__(self):
+        return len(self._entries) if self._entries is not None else 0
+
+    def has_correction(self, instrument, obsid):
+        """Indicate whether a correction file exists for an observation.
+
+        Parameters
+        ----------
+        instrument : `str`
+            Name of the instrument.
+        obsid : `str`
+            Observation ID.
+
+        Returns
+        -------
+        has : `bool`
+            `True` if a correction file exists.
+
+        Raises
+        ------
+        RuntimeError
+            Raised if the index is not valid.
+        """
+        if self._entries is None:
+            raise RuntimeError(f"No valid corrections index for {self.corrections_dir}")
+        return (instrument, obsid) in self._entries
+
+
+@functools.lru_cache(maxsize=None)
+def get_corrections_index(corrections_dir):
+    """Return the index of a corrections directory, reading it once per
+    process.
+
+    Parameters
+    ----------
+    corrections_dir : `str`
+        Directory containing the correction files.
+
+    Returns
+    -------
+    index : `CorrectionsIndex`
+        The index. May not be valid.
+    """
+    return CorrectionsIndex(corrections_dir)
@@ -56,6 +56,8 @@ class LsstCamImSimTranslator(LsstSimTranslator):
         "detector_serial": "LSST_NUM",
     }
 
+    _header_keywords = frozenset({"AIRMASS", "AMSTART", "HASTART", "RATEL", "DECTEL", "ROTANGLE"})
+
     cameraPolicyFile = "policy/imsim.yaml"
 
     @classmethod
@@ -108,19 +110,45 @@ class LsstCamImSimTranslator(LsstSimTranslator):
 
     @cache_translation
     def to_physical_filter(self):
-        # Find throughputs version from imSim header data.  For DC2
-        # data, we used throughputs version 1.4.
-        throughputs_version = None
-        for key, value in self._header.items():
+        if self._throughputs_version(self._header) is None:
+            log.warning("%s: throughputs version not found.  Using FILTER keyword value '%s'.",
+                        self._log_prefix, self._header["FILTER"])
+        return self._physical_filter_from_header(self._header)
+
+    _physical_filter_keywords = ("FILTER",)
+
+    _physical_filter_keyword_prefixes = ("PKG", "VER")
+
+    @staticmethod
+    def _throughputs_version(header):
+        """Find the throughputs version from imSim header data.
+
+        Parameters
+        ----------
+        header : `dict`-like
+            Header, or any mapping containing the ``PKGnn`` and ``VERnn``
+            keywords.
+
+        Returns
+        -------
+        version : `str` or `None`
+            The version of the throughputs package, or `None` if it is
+            not listed.
+        """
+        for key, value in header.items():
             if key.startswith("PKG") and value == "throughputs":
                 version_key = "VER" + key[len("PKG"):]
-                throughputs_version = self._header[version_key].strip()
-                break
+                return header[version_key].strip()
+        return None
+
+    @classmethod
+    def _physical_filter_from_header(cls, header):
+        # Docstring inherited.
+        # For DC2 data, we used throughputs version 1.4.
+        throughputs_version = cls._throughputs_version(header)
         if throughputs_version is None:
-            log.warning("%s: throughputs version not found.  Using FILTER keyword value '%s'.",
-                        self._log_prefix, self._header["FILTER"])
-            return self._header["FILTER"]
-        return "_".join((self._header["FILTER"], "sim", throughputs_version))
+            return header["FILTER"]
+        return "_".join((header["FILTER"], "sim", throughputs_version))
 
     @cache_translation
     def to_altaz_begin(self):
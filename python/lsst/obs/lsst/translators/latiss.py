@@ -14,6 +14,9 @@ __all__ = ("LatissTranslator", )
 
 import logging
 import math
+from collections import namedtuple
+
+import numpy as np
 
 import astropy.units as u
 from astropy.time import Time
@@ -65,6 +68,140 @@ DATE_END_IS_BAD = Time("2020-02-01T00:00", format="isot", scale="utc")
 RAD2DEG = 180.0 / math.pi
 
 
+def _fix_detector_serial(header, log_label):
+    """The 068 detector was installed but the header was not updated."""
+    header["LSST_NUM"] = "ITL-3800C-068"
+    log.debug("%s: Forcing detector serial to %s", log_label, header["LSST_NUM"])
+    return True
+
+
+def _clear_bad_date_end(header, log_label):
+    """DATE-END may or may not be in TAI and may or may not be before
+    DATE-BEG.  Simpler to clear it."""
+    if header.get("DATE-END"):
+        header["DATE-END"] = None
+        header["MJD-END"] = None
+        log.debug("%s: Clearing DATE-END as being untrustworthy", log_label)
+        return True
+    return False
+
+
+def _imgtype_from_groupid(header, log_label):
+    """Up until a certain date GROUPID was the IMGTYPE."""
+    groupId = header.get("GROUPID")
+    if not groupId or groupId.startswith("test"):
+        return False
+    imgType = header.get("IMGTYPE")
+    if imgType:
+        # Someone could be fixing headers in old data
+        # and we do not want GROUPID == IMGTYPE
+        if imgType == groupId:
+            # Clear the group so we default to original
+            header["GROUPID"] = None
+        return False
+
+    if "_" in groupId:
+        # Sometimes have the form dark_0001_0002
+        # in this case we pull the IMGTYPE off the front and
+        # do not clear groupId (although groupId may now
+        # repeat on different days).
+        groupId, _ = groupId.split("_", 1)
+    elif groupId.upper() != "FOCUS" and groupId.upper().startswith("FOCUS"):
+        # If it is exactly FOCUS we want groupId cleared
+        groupId = "FOCUS"
+    else:
+        header["GROUPID"] = None
+    header["IMGTYPE"] = groupId
+    log.debug("%s: Setting IMGTYPE to '%s' from GROUPID", log_label, header["IMGTYPE"])
+    return True
+
+
+def _object_is_engtest(header, log_label):
+    """We were using OBJECT for engineering observations early on."""
+    if header.get("IMGTYPE") == "OBJECT":
+        header["IMGTYPE"] = "ENGTEST"
+        log.debug("%s: Changing OBJECT observation type to %s", log_label, header["IMGTYPE"])
+        return True
+    return False
+
+
+def _radec_to_degrees(header, log_label):
+    """Early on the RA/DEC headers were stored in radians."""
+    modified = False
+    if header.get("RA") is not None:
+        header["RA"] *= RAD2DEG
+        log.debug("%s: Changing RA header to degrees", log_label)
+        modified = True
+    if header.get("DEC") is not None:
+        header["DEC"] *= RAD2DEG
+        log.debug("%s: Changing DEC header to degrees", log_label)
+        modified = True
+    return modified
+
+
+def _clear_shuttime(header, log_label):
+    """SHUTTIME is never reliable."""
+    if header.get("SHUTTIME"):
+        log.debug("%s: Forcing SHUTTIME header to be None", log_label)
+        header["SHUTTIME"] = None
+        return True
+    return False
+
+
+def _ensure_object(header, log_label):
+    """OBJECT observations must have an OBJECT header."""
+    if "OBJECT" not in header and header.get("IMGTYPE") == "OBJECT":
+        log.debug("%s: Forcing OBJECT header to exist", log_label)
+        header["OBJECT"] = "NOTSET"
+        return True
+    return False
+
+
+def _default_radesys(header, log_label):
+    """Default a blank RADESYS to ICRS."""
+    if header.get("RADESYS") == "":
+        header["RADESYS"] = "ICRS"
+        log.debug("%s: Forcing blank RADESYS to '%s'", log_label, header["RADESYS"])
+        return True
+    return False
+
+
+def _clear_derived_radec(header, log_label):
+    """The wrong telescope position was used. Unsetting these will force
+    the RA/DEC demand headers to be used instead."""
+    for h in ("RASTART", "DECSTART", "RAEND", "DECEND"):
+        header[h] = None
+    log.debug("%s: Forcing derived RA/Dec headers to undefined", log_label)
+    # Historically not reported as a modification.
+    return False
+
+
+_HeaderRule = namedtuple("_HeaderRule", ("after", "before", "fix"))
+"""A header correction applied to observations starting strictly between
+two dates, given as TAI MJDs. `None` leaves that end of the window open.
+``fix`` is called as ``fix(header, log_label)`` and returns `True` if the
+header was modified."""
+
+
+def _tai_mjd(date):
+    return date.tai.mjd
+
+
+# Date-dependent corrections, applied in this order by
+# LatissTranslator.fix_header.
+_HEADER_RULES = (
+    _HeaderRule(_tai_mjd(DETECTOR_068_DATE), None, _fix_detector_serial),
+    _HeaderRule(None, _tai_mjd(DATE_END_IS_BAD), _clear_bad_date_end),
+    _HeaderRule(None, _tai_mjd(IMGTYPE_OKAY_DATE), _imgtype_from_groupid),
+    _HeaderRule(None, _tai_mjd(OBJECT_IS_ENGTEST), _object_is_engtest),
+    _HeaderRule(None, _tai_mjd(RADEC_IS_RADIANS), _radec_to_degrees),
+    _HeaderRule(None, None, _clear_shuttime),
+    _HeaderRule(None, None, _ensure_object),
+    _HeaderRule(None, None, _default_radesys),
+    _HeaderRule(None, _tai_mjd(RASTART_IS_BAD), _clear_derived_radec),
+)
+
+
 def is_non_science_or_lab(self):
     """Pseudo method to determine whether this is a lab or non-science
     header.
@@ -124,6 +261,11 @@ class LatissTranslator(LsstBaseTranslator):
                                                                  default=float("nan"), unit=u.deg)),
     }
 
+    _header_keywords = frozenset({
+        "DETNAME", "DETSER", "OBS-NITE", "MJD", "MJD-BEG", "SHUTTIME",
+        "OBJECT", "OBSTYPE", "ROTCOORD", "AMSTART", "RAEND", "DECEND",
+    })
+
     DETECTOR_GROUP_NAME = _DETECTOR_GROUP_NAME
     """Fixed name of detector group."""
 
@@ -203,6 +345,9 @@ class LatissTranslator(LsstBaseTranslator):
           The value is moved to IMGTYPE.
         * SHUTTIME is always forced to be `None`.
 
+        The date-dependent corrections are defined in a table of rules,
+        each applying to a range of observation start dates.
+
         Corrections are reported as debug level log messages.
 
         See `~astro_metadata_translator.fix_header` for details of the general
@@ -272,96 +417,15 @@ class LatissTranslator(LsstBaseTranslator):
             log.debug("%s: Forcing 1970 dates to '%s'", log_label, header["DATE"])
             modified = True
 
-        # Create a translator since we need the date
-        translator = cls(header)
-        date = translator.to_datetime_begin()
-        if date > DETECTOR_068_DATE:
-            header["LSST_NUM"] = "ITL-3800C-068"
-            log.debug("%s: Forcing detector serial to %s", log_label, header["LSST_NUM"])
-            modified = True
-
-        if date < DATE_END_IS_BAD:
-            # DATE-END may or may not be in TAI and may or may not be
-            # before DATE-BEG.  Simpler to clear it
-            if header.get("DATE-END"):
-                header["DATE-END"] = None
-                header["MJD-END"] = None
-
-                log.debug("%s: Clearing DATE-END as being untrustworthy", log_label)
-                modified = True
-
-        # Up until a certain date GROUPID was the IMGTYPE
-        if date < IMGTYPE_OKAY_DATE:
-            groupId = header.get("GROUPID")
-            if groupId and not groupId.startswith("test"):
-                imgType = header.get("IMGTYPE")
-                if not imgType:
-                    if "_" in groupId:
-                        # Sometimes have the form dark_0001_0002
-                        # in this case we pull the IMGTYPE off the front and
-                        # do not clear groupId (although groupId may now
-                        # repeat on different days).
-                        groupId, _ = groupId.split("_", 1)
-                    elif groupId.upper() != "FOCUS" and groupId.upper().startswith("FOCUS"):
-                        # If it is exactly FOCUS we want groupId cleared
-                        groupId = "FOCUS"
-                    else:
-                        header["GROUPID"] = None
-                    header["IMGTYPE"] = groupId
-                    log.debug("%s: Setting IMGTYPE to '%s' from GROUPID", log_label, header["IMGTYPE"])
+        # The date-dependent corrections are selected using the start
+        # of the observation, which is MJD-OBS in TAI (as used by
+        # to_datetime_begin).  Reading it directly avoids constructing a
+        # translator and an astropy Time for every header.
+        mjd = float(header["MJD-OBS"])
+        for rule in _HEADER_RULES:
+            if (rule.after is None or mjd > rule.after) and (rule.before is None or mjd < rule.before):
+                if rule.fix(header, log_label):
                     modified = True
-                else:
-                    # Someone could be fixing headers in old data
-                    # and we do not want GROUPID == IMGTYPE
-                    if imgType == groupId:
-                        # Clear the group so we default to original
-                        header["GROUPID"] = None
-
-        # We were using OBJECT for engineering observations early on
-        if date < OBJECT_IS_ENGTEST:
-            imgType = header.get("IMGTYPE")
-            if imgType == "OBJECT":
-                header["IMGTYPE"] = "ENGTEST"
-                log.debug("%s: Changing OBJECT observation type to %s",
-                          log_label, header["IMGTYPE"])
-                modified = True
-
-        # Early on the RA/DEC headers were stored in radians
-        if date < RADEC_IS_RADIANS:
-            if header.get("RA") is not None:
-                header["RA"] *= RAD2DEG
-                log.debug("%s: Changing RA header to degrees", log_label)
-                modified = True
-            if header.get("DEC") is not None:
-                header["DEC"] *= RAD2DEG
-                log.debug("%s: Changing DEC header to degrees", log_label)
-                modified = True
-
-        if header.get("SHUTTIME"):
-            log.debug("%s: Forcing SHUTTIME header to be None", log_label)
-            header["SHUTTIME"] = None
-            modified = True
-
-        if "OBJECT" not in header:
-            # Only patch OBJECT IMGTYPE
-            if "IMGTYPE" in header and header["IMGTYPE"] == "OBJECT":
-                log.debug("%s: Forcing OBJECT header to exist", log_label)
-                header["OBJECT"] = "NOTSET"
-                modified = True
-
-        if "RADESYS" in header:
-            if header["RADESYS"] == "":
-                # Default to ICRS
-                header["RADESYS"] = "ICRS"
-                log.debug("%s: Forcing blank RADESYS to '%s'", log_label, header["RADESYS"])
-                modified = True
-
-        if date < RASTART_IS_BAD:
-            # The wrong telescope position was used. Unsetting these will force
-            # the RA/DEC demand headers to be used instead.
-            for h in ("RASTART", "DECSTART", "RAEND", "DECEND"):
-                header[h] = None
-            log.debug("%s: Forcing derived RA/Dec headers to undefined", log_label)
 
         return modified
 
@@ -395,6 +459,21 @@ class LatissTranslator(LsstBaseTranslator):
             log.warning("Unexpected non-zero detector number for LATISS")
         return exposure_id
 
+    @staticmethod
+    def compute_detector_exposure_id_array(exposure_id, detector_num):
+        # Docstring will be inherited.
+        exposure_id, detector_num = np.broadcast_arrays(np.asarray(exposure_id, dtype=np.int64),
+                                                        detector_num)
+        if np.any(detector_num != 0):
+            log.warning("Unexpected non-zero detector number for LATISS")
+        return exposure_id.copy()
+
+    @staticmethod
+    def decode_detector_exposure_id_array(detector_exposure_id):
+        # Docstring will be inherited.
+        exposure_id = np.array(detector_exposure_id, dtype=np.int64)
+        return exposure_id, np.zeros_like(exposure_id)
+
     @cache_translation
     def to_dark_time(self):
         # Docstring will be inherited. Property defined in properties.py
@@ -496,11 +575,19 @@ class LatissTranslator(LsstBaseTranslator):
             or bias.
         """
 
-        physical_filter = self._determine_primary_filter()
+        physical_filter = self._physical_filter_from_header(self._header)
+        self._used_physical_filter_cards(warn_if_no_filter=True)
+        return physical_filter
+
+    _physical_filter_keywords = ("FILTER", "GRATING")
+
+    @classmethod
+    def _physical_filter_from_header(cls, header):
+        # Docstring inherited.
+        physical_filter = cls._primary_filter_from_header(header)
 
-        if self.is_key_ok("GRATING"):
-            grating = self._header["GRATING"]
-            self._used_these_cards("GRATING")
+        if cls.is_keyword_defined(header, "GRATING"):
+            grating = header["GRATING"]
 
             if not grating or grating.lower().startswith("empty"):
                 grating = "empty"
@@ -11,7 +11,9 @@
 """Metadata translation support code for LSST headers"""
 
 __all__ = ("TZERO", "SIMONYI_LOCATION", "read_detector_ids",
-           "compute_detector_exposure_id_generic", "LsstBaseTranslator",
+           "compute_detector_exposure_id_generic", "compute_detector_exposure_id_generic_array",
+           "decode_detector_exposure_id_generic_array", "compute_visit_id_from_exposure_group",
+           "compute_visit_id_from_exposure_group_array", "LsstBaseTranslator",
            "SIMONYI_TELESCOPE")
 
 import os.path
@@ -20,18 +22,22 @@ import logging
 import re
 import datetime
 import hashlib
+import json
+import tempfile
+import functools
 
-import astropy.coordinates
+import numpy as np
 import astropy.units as u
 from astropy.time import Time, TimeDelta
 from astropy.coordinates import EarthLocation
 
-from lsst.utils import getPackageDir
-
 from astro_metadata_translator import cache_translation, FitsTranslator
 from astro_metadata_translator.translators.helpers import tracking_from_degree_headers, \
     altaz_from_degree_headers
 
+from .corrections_index import get_corrections_index
+from .coordinates import altaz_to_icrs
+
 
 TZERO = Time("2015-01-01T00:00", format="isot", scale="utc")
 TZERO_DATETIME = TZERO.to_datetime()
@@ -39,6 +45,10 @@ TZERO_DATETIME = TZERO.to_datetime()
 # Delimiter to use for multiple filters/gratings
 FILTER_DELIMITER = "~"
 
+# Offset added to the YYYYMMDD component of the exposure ID for each
+# camera controller
+_CONTROLLER_OFFSETS = {"O": 0, "C": 1000_00_00, "H": 2000_00_00}
+
 # Regex to use for parsing a GROUPID string
 GROUP_RE = re.compile(r"^(\d\d\d\d\-\d\d\-\d\dT\d\d:\d\d:\d\d)\.(\d\d\d)(?:[\+#](\d+))?$")
 
@@ -48,10 +58,165 @@ SIMONYI_LOCATION = EarthLocation.from_geodetic(-70.749417, -30.244639, 2663.0)
 # Name of the main survey telescope
 SIMONYI_TELESCOPE = "Simonyi Survey Telescope"
 
-obs_lsst_packageDir = getPackageDir("obs_lsst")
+
+@functools.lru_cache(maxsize=None)
+def _obs_lsst_package_dir():
+    """Return the location of the obs_lsst package.
+
+    ``lsst.utils`` is imported here rather than at module level so that
+    importing the translators does not import the LSST C++ libraries.
+    """
+    from lsst.utils import getPackageDir
+    return getPackageDir("obs_lsst")
+
+
+def __getattr__(name):
+    # obs_lsst_packageDir used to be computed on import.
+    if name == "obs_lsst_packageDir":
+        return _obs_lsst_package_dir()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 log = logging.getLogger(__name__)
 
+DETECTOR_CACHE_SUFFIX = ".detectors.json"
+"""Suffix of the files caching the detector mapping of a camera policy."""
+
+_DETECTOR_CACHE_VERSION = 1
+
+
+def _detector_cache_files(policy_file):
+    """Return the possible locations of the detector cache for a policy
+    file.
+
+    Parameters
+    ----------
+    policy_file : `str`
+        Full path to the camera policy file.
+
+    Returns
+    -------
+    cache_files : `list` of `str`
+        The cache file next to the policy file followed by the cache file
+        in the user cache directory.
+    """
+    policy_file = os.path.abspath(policy_file)
+    root, _ = os.path.splitext(os.path.basename(policy_file))
+    user_cache_dir = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+                                  "obs_lsst")
+    path_hash = hashlib.sha256(policy_file.encode()).hexdigest()[:16]
+    return [os.path.join(os.path.dirname(policy_file), f"{root}{DETECTOR_CACHE_SUFFIX}"),
+            os.path.join(user_cache_dir, f"{root}-{path_hash}{DETECTOR_CACHE_SUFFIX}")]
+
+
+def _hash_file(file):
+    """Return the SHA-256 digest of the content of a file."""
+    hasher = hashlib.sha256()
+    with open(file, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def _read_detector_cache(policy_file):
+    """Read the cached detector mapping of a policy file.
+
+    Parameters
+    ----------
+    policy_file : `str`
+        Full path to the camera policy file.
+
+    Returns
+    -------
+    mapping : `dict` of `str` to (`int`, `str`) or `None`
+        The mapping, or `None` if there is no cache for the current content
+        of the policy file.
+
+    Notes
+    -----
+    A cache whose recorded size and modification time match the policy
+    file is used without reading the policy file. Otherwise the content
+    hashes are compared, and if they match the cache is rewritten with the
+    new modification time, so that later processes take the quick path
+    on a copied or installed tree.
+    """
+    try:
+        stat = os.stat(policy_file)
+    except OSError:
+        return None
+
+    caches = []
+    for cache_file in _detector_cache_files(policy_file):
+        try:
+            with open(cache_file) as fh:
+                cache = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        if cache.get("version") == _DETECTOR_CACHE_VERSION and cache.get("size") == stat.st_size:
+            caches.append((cache_file, cache))
+
+    for cache_file, cache in caches:
+        if cache.get("mtime_ns") == stat.st_mtime_ns:
+            log.debug("Using cached detector mapping %s for %s", cache_file, policy_file)
+            return {name: (id, serial) for name, (id, serial) in cache["mapping"].items()}
+
+    if caches:
+        content_hash = _hash_file(policy_file)
+        for cache_file, cache in caches:
+            if cache.get("sha256") == content_hash:
+                log.debug("Using cached detector mapping %s for %s", cache_file, policy_file)
+                mapping = {name: (id, serial) for name, (id, serial) in cache["mapping"].items()}
+                _write_detector_cache(policy_file, mapping, content_hash=content_hash)
+                return mapping
+    return None
+
+
+def _write_detector_cache(policy_file, mapping, content_hash=None):
+    """Write the detector mapping of a policy file to a cache file.
+
+    Parameters
+    ----------
+    policy_file : `str`
+        Full path to the camera policy file.
+    mapping : `dict` of `str` to (`int`, `str`)
+        Mapping read from the policy file.
+    content_hash : `str`, optional
+        SHA-256 digest of the policy file, if already known.
+
+    Notes
+    -----
+    Failure to write the cache is not an error.
+    """
+    try:
+        stat = os.stat(policy_file)
+        if content_hash is None:
+            content_hash = _hash_file(policy_file)
+        content = json.dumps({"version": _DETECTOR_CACHE_VERSION, "size": stat.st_size,
+                              "mtime_ns": stat.st_mtime_ns, "sha256": content_hash,
+                              "mapping": mapping})
+    except OSError:
+        return
+
+    for cache_file in _detector_cache_files(policy_file):
+        cache_dir = os.path.dirname(cache_file)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp_file = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        except OSError:
+            continue
+        try:
+            with os.fdopen(fd, "w") as fh:
+                fh.write(content)
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
+            continue
+        log.debug("Wrote detector mapping cache %s for %s", cache_file, policy_file)
+        return
+
 
 def read_detector_ids(policyFile):
     """Read a camera policy file and retrieve the mapping from CCD name
@@ -77,9 +242,18 @@ def read_detector_ids(policyFile):
     `~lsst.obs.base.yamlCamera.YAMLCamera` infrastructure or
     `lsst.afw.cameraGeom`.  This is because the translators are intended to
     have minimal dependencies on LSST infrastructure.
+
+    The mapping is cached in a small JSON file next to the policy file, or
+    in the user cache directory if the policy directory is not writable.
+    The cache is only used if it was written from a policy file with the
+    same content.
     """
 
-    file = os.path.join(obs_lsst_packageDir, policyFile)
+    file = os.path.join(_obs_lsst_package_dir(), policyFile)
+    mapping = _read_detector_cache(file)
+    if mapping is not None:
+        return mapping
+
     try:
         with open(file) as fh:
             # Use the fast parser since these files are large
@@ -91,6 +265,7 @@ def read_detector_ids(policyFile):
     for ccd, value in camera["CCDs"].items():
         mapping[ccd] = (int(value["id"]), value["serial"])
 
+    _write_detector_cache(file, mapping)
     return mapping
 
 
@@ -138,12 +313,285 @@ def compute_detector_exposure_id_generic(exposure_id, detector_num, max_num=1000
         raise ValueError(f"Computation mode of '{mode}' is not understood")
 
 
+def compute_detector_exposure_id_generic_array(exposure_id, detector_num, max_num=1000, mode="concat"):
+    """Compute the detector_exposure_id for arrays of exposure IDs and
+    detector numbers.
+
+    Parameters
+    ----------
+    exposure_id : `numpy.ndarray` of `int`
+        The exposure IDs.
+    detector_num : `numpy.ndarray` of `int`
+        The detector numbers. Must be broadcastable against
+        ``exposure_id``.
+    max_num : `int`, optional
+        Maximum number of detectors to make space for. Defaults to 1000.
+    mode : `str`, optional
+        Computation mode. Defaults to "concat". See
+        `compute_detector_exposure_id_generic` for details.
+
+    Returns
+    -------
+    detector_exposure_id : `numpy.ndarray` of `numpy.int64`
+        Computed IDs, identical to those calculated by
+        `compute_detector_exposure_id_generic`.
+
+    Raises
+    ------
+    ValueError
+        A detector number is out of range.
+    """
+    exposure_id = np.asarray(exposure_id, dtype=np.int64)
+    detector_num = np.asarray(detector_num, dtype=np.int64)
+
+    bad = (detector_num > max_num) | (detector_num < 0)
+    if np.any(bad):
+        raise ValueError(f"Detector number out of range 0 <= {detector_num[bad].flat[0]} <= {max_num}")
+
+    if mode == "concat":
+        npad = len(str(max_num))
+        return exposure_id*10**npad + detector_num
+    elif mode == "multiply":
+        return max_num*exposure_id + detector_num
+    else:
+        raise ValueError(f"Computation mode of '{mode}' is not understood")
+
+
+def decode_detector_exposure_id_generic_array(detector_exposure_id, max_num=1000, mode="concat"):
+    """Split detector_exposure_ids into exposure IDs and detector numbers.
+
+    This is the inverse of `compute_detector_exposure_id_generic_array`.
+
+    Parameters
+    ----------
+    detector_exposure_id : `numpy.ndarray` of `int`
+        The detector exposure IDs.
+    max_num : `int`, optional
+        Maximum number of detectors used to compute the IDs.
+    mode : `str`, optional
+        Computation mode used to compute the IDs.
+
+    Returns
+    -------
+    exposure_id : `numpy.ndarray` of `numpy.int64`
+        The exposure IDs.
+    detector_num : `numpy.ndarray` of `numpy.int64`
+        The detector numbers.
+
+    Notes
+    -----
+    In "multiply" mode a detector number equal to ``max_num`` can not be
+    distinguished from detector 0 of the following exposure; it is decoded
+    as the latter.
+    """
+    detector_exposure_id = np.asarray(detector_exposure_id, dtype=np.int64)
+    if mode == "concat":
+        return np.divmod(detector_exposure_id, 10**len(str(max_num)))
+    elif mode == "multiply":
+        return np.divmod(detector_exposure_id, max_num)
+    else:
+        raise ValueError(f"Computation mode of '{mode}' is not understood")
+
+
+def _visit_id_from_group_hash(exposure_group):
+    """Calculate a visit ID by hashing an exposure group string.
+
+    Parameters
+    ----------
+    exposure_group : `str`
+        Exposure group that is neither an integer nor a date.
+
+    Returns
+    -------
+    visit_id : `int`
+        Visit ID.
+    """
+    # Non-standard string so convert to numbers
+    # using a hash function. Use the first N hex digits
+    group_bytes = exposure_group.encode("us-ascii")
+    hasher = hashlib.blake2b(group_bytes)
+    # Need to be big enough it does not possibly clash with the
+    # date-based version above
+    digest = hasher.hexdigest()[:14]
+    visit_id = int(digest, base=16)
+
+    # To help with hash collision, append the string length
+    return int(f"{visit_id}{len(exposure_group):02d}")
+
+
+def compute_visit_id_from_exposure_group(exposure_group):
+    """Calculate the visit ID associated with an exposure group.
+
+    Parameters
+    ----------
+    exposure_group : `str`
+        The exposure group, usually from the ``GROUPID`` header.
+
+    Returns
+    -------
+    visit_id : `int`
+        The visit ID.
+
+    Notes
+    -----
+    A group that is an integer is used directly. A group of the form
+    ``ISODATE.fff+N`` is converted to seconds since `TZERO` with the
+    fraction and ``N`` appended. Any other group is hashed.
+    """
+    # If the group is an int we return it
+    try:
+        visit_id = int(exposure_group)
+        return visit_id
+    except ValueError:
+        pass
+
+    # A Group is defined as ISO date with an extension
+    # The integer must be the same for a given group so we can never
+    # use datetime_begin.
+    # Nominally a GROUPID looks like "ISODATE+N" where the +N is
+    # optional.  This can be converted to seconds since epoch with
+    # an adjustment for N.
+    # For early data lacking that form we hash the group and return
+    # the int.
+    matches_date = GROUP_RE.match(exposure_group)
+    if matches_date:
+        iso_str = matches_date.group(1)
+        fraction = matches_date.group(2)
+        n = matches_date.group(3)
+        if n is not None:
+            n = int(n)
+        else:
+            n = 0
+        iso = datetime.datetime.strptime(iso_str, "%Y-%m-%dT%H:%M:%S")
+
+        tdelta = iso - TZERO_DATETIME
+        epoch = int(tdelta.total_seconds())
+
+        # Form the integer from EPOCH + 3 DIGIT FRAC + 0-pad N
+        visit_id = int(f"{epoch}{fraction}{n:04d}")
+    else:
+        visit_id = _visit_id_from_group_hash(exposure_group)
+
+    return visit_id
+
+
+def _digit_value(codes, start, stop):
+    """Return the integers formed by a column range of ASCII digit codes,
+    ignoring zero padding."""
+    value = np.zeros(codes.shape[0], dtype=np.int64)
+    for column in range(start, stop):
+        code = codes[:, column].astype(np.int64)
+        value = np.where(code != 0, value*10 + code - ord("0"), value)
+    return value
+
+
+def compute_visit_id_from_exposure_group_array(exposure_groups):
+    """Calculate the visit IDs associated with many exposure groups.
+
+    Parameters
+    ----------
+    exposure_groups : sequence of `str`
+        The exposure groups.
+
+    Returns
+    -------
+    visit_ids : `numpy.ndarray` of `numpy.int64`
+        The visit IDs, identical to those calculated by
+        `compute_visit_id_from_exposure_group`.
+
+    Raises
+    ------
+    ValueError
+        Raised if a group looks like a date but the date is invalid.
+    OverflowError
+        Raised if a visit ID does not fit in 64 bits.
+
+    Notes
+    -----
+    The structure of all the groups is checked at once on an array of
+    character codes and the dates are parsed together as
+    `numpy.datetime64`. Only the groups that are not integers or dates,
+    and rare forms such as those with more than four digits of ``N``,
+    are handled one by one.
+    """
+    groups = np.asarray(exposure_groups).astype(str)
+    shape = groups.shape
+    groups = np.ascontiguousarray(groups.ravel())
+    n_groups = len(groups)
+    visit_ids = np.zeros(n_groups, dtype=np.int64)
+    handled = np.zeros(n_groups, dtype=bool)
+
+    width = groups.dtype.itemsize//4
+    if n_groups and width:
+        # Unicode code point of every character, zero padded.
+        codes = groups.view(np.uint32).reshape(n_groups, width)
+        length = np.char.str_len(groups)
+        is_digit = (codes >= ord("0")) & (codes <= ord("9"))
+
+        # Plain integers, short enough to fit in 64 bits.
+        is_int = (length > 0) & (length <= 18) & np.all(is_digit | (codes == 0), axis=1)
+        visit_ids[is_int] = groups[is_int].astype(np.int64)
+        handled |= is_int
+
+        # YYYY-MM-DDTHH:MM:SS.fff optionally followed by a separator and
+        # up to four digits of N.
+        date_width = 23
+        if width >= date_width:
+            is_date = ~handled
+            for column, char in ((4, "-"), (7, "-"), (10, "T"), (13, ":"), (16, ":"), (19, ".")):
+                is_date &= codes[:, column] == ord(char)
+            for column in (0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18, 20, 21, 22):
+                is_date &= is_digit[:, column]
+
+            suffix_length = length - date_width
+            has_n = (suffix_length >= 2) & (suffix_length <= 5)
+            if width > date_width:
+                separator = codes[:, date_width]
+                has_n &= (separator == ord("+")) | (separator == ord("#"))
+                has_n &= np.all(is_digit[:, date_width + 1:] | (codes[:, date_width + 1:] == 0), axis=1)
+            is_date &= (suffix_length == 0) | has_n
+
+            if np.any(is_date):
+                date_codes = codes[is_date]
+                dates = groups[is_date].astype("U19").astype("datetime64[s]")
+                epoch = (dates - np.datetime64(TZERO_DATETIME, "s")).astype(np.int64)
+                fraction = _digit_value(date_codes, 20, 23)
+                n = _digit_value(date_codes, date_width + 1, min(width, date_width + 5))
+
+                # Negative epochs do not concatenate arithmetically so are
+                # left to the scalar calculation.
+                positive = epoch >= 0
+                date_index = np.flatnonzero(is_date)[positive]
+                visit_ids[date_index] = (epoch*10**7 + fraction*10**4 + n)[positive]
+                handled[date_index] = True
+
+    for i in np.flatnonzero(~handled):
+        visit_ids[i] = compute_visit_id_from_exposure_group(str(groups[i]))
+
+    return visit_ids.reshape(shape)
+
+
 class LsstBaseTranslator(FitsTranslator):
     """Translation methods useful for all LSST-style headers."""
 
     _const_map = {}
     _trivial_map = {}
 
+    _header_keywords = frozenset({
+        "INSTRUME", "TELESCOP", "OBSID", "DAYOBS", "SEQNUM", "CONTRLLR", "CALIB_ID",
+        "DATE", "DATE-OBS", "DATE-BEG", "DATE-END", "MJD-OBS", "MJD-END", "TIMESYS",
+        "EXPTIME", "DARKTIME", "IMGTYPE", "TESTTYPE", "TRACKSYS", "TSTAND", "GROUPID",
+        "RADESYS", "RASTART", "DECSTART", "RA", "DEC",
+        "ELSTART", "AZSTART", "LSST_NUM", "RAFTBAY", "CCDSLOT", "OBSGEO-X", "OBSGEO-Y",
+        "OBSGEO-Z",
+    })
+    """Header keywords read by this class in addition to those listed in
+    ``_trivial_map`` and ``_physical_filter_keywords``. Subclasses list only
+    the keywords they add."""
+
+    _header_keyword_prefixes = ()
+    """Prefixes of any further header keywords read by this class."""
+
     # Do not specify a name for this translator
     cameraPolicyFile = None
     """Path to policy file relative to obs_lsst root."""
@@ -165,6 +613,11 @@ class LsstBaseTranslator(FitsTranslator):
     """Time delta for the definition of a Rubin Observatory start of day.
     Used when the header is missing. See LSE-400 for details."""
 
+    _exposure_id_from_date = False
+    """`True` if ``compute_exposure_id`` forms the ID from the digits of
+    the observation date, as the test stands do, rather than from the day
+    of observation and sequence number."""
+
     @classmethod
     def __init_subclass__(cls, **kwargs):
         """Ensure that subclasses clear their own detector mapping entries
@@ -185,8 +638,56 @@ class LsstBaseTranslator(FitsTranslator):
         path : `list`
             List with a single element containing the full path to the
             ``corrections`` directory within the ``obs_lsst`` package.
+            The list is empty if the compiled corrections index shows that
+            there is no correction for this observation.
+
+        Notes
+        -----
+        The index is built with ``compileCorrectionsIndex.py`` and read once
+        per process, so most headers need no file system access at all to
+        establish that they have no correction. Without a valid index the
+        directory is always returned.
+        """
+        corrections_dir = os.path.join(_obs_lsst_package_dir(), "corrections")
+        index = get_corrections_index(corrections_dir)
+        if index.is_valid and not index.has_correction(self.to_instrument(),
+                                                       self.to_observation_id()):
+            return []
+        return [corrections_dir]
+
+    @classmethod
+    def header_keywords(cls):
+        """Return the header keywords used by this translator.
+
+        Returns
+        -------
+        keywords : `frozenset` of `str`
+            Keywords read by the translation methods, by ``fix_header``
+            and by ``can_translate``.
+        prefixes : `tuple` of `str`
+            Prefixes of keywords that are matched by pattern rather than
+            by name.
+
+        Notes
+        -----
+        Headers restricted to these keywords translate identically to the
+        full headers, which allows header scanners to skip all other cards.
+        The keywords used to calculate the physical filter are taken from
+        ``_physical_filter_keywords`` and need not be listed again.
         """
-        return [os.path.join(obs_lsst_packageDir, "corrections")]
+        keywords = set(cls._physical_filter_keywords)
+        prefixes = set(cls._physical_filter_keyword_prefixes)
+        for klass in cls.__mro__:
+            keywords.update(vars(klass).get("_header_keywords", ()))
+            prefixes.update(vars(klass).get("_header_keyword_prefixes", ()))
+            for value in vars(klass).get("_trivial_map", {}).values():
+                if isinstance(value, tuple):
+                    value = value[0]
+                if isinstance(value, str):
+                    keywords.add(value)
+                else:
+                    keywords.update(value)
+        return frozenset(keywords), tuple(sorted(prefixes))
 
     @classmethod
     def compute_detector_exposure_id(cls, exposure_id, detector_num):
@@ -212,6 +713,50 @@ class LsstBaseTranslator(FitsTranslator):
                                                     max_num=cls.DETECTOR_MAX,
                                                     mode="concat")
 
+    @classmethod
+    def compute_detector_exposure_id_array(cls, exposure_id, detector_num):
+        """Compute detector exposure IDs from arrays of detector numbers
+        and exposure IDs.
+
+        Parameters
+        ----------
+        exposure_id : `numpy.ndarray` of `int`
+            Unique exposure IDs.
+        detector_num : `numpy.ndarray` of `int`
+            Detector numbers. Must be broadcastable against
+            ``exposure_id``.
+
+        Returns
+        -------
+        detector_exposure_id : `numpy.ndarray` of `numpy.int64`
+            The calculated IDs, identical to those returned by
+            `compute_detector_exposure_id`.
+        """
+        return compute_detector_exposure_id_generic_array(exposure_id, detector_num,
+                                                          max_num=cls.DETECTOR_MAX,
+                                                          mode="concat")
+
+    @classmethod
+    def decode_detector_exposure_id_array(cls, detector_exposure_id):
+        """Split detector exposure IDs into exposure IDs and detector
+        numbers.
+
+        Parameters
+        ----------
+        detector_exposure_id : `numpy.ndarray` of `int`
+            IDs calculated by `compute_detector_exposure_id`.
+
+        Returns
+        -------
+        exposure_id : `numpy.ndarray` of `numpy.int64`
+            The exposure IDs.
+        detector_num : `numpy.ndarray` of `numpy.int64`
+            The detector numbers.
+        """
+        return decode_detector_exposure_id_generic_array(detector_exposure_id,
+                                                         max_num=cls.DETECTOR_MAX,
+                                                         mode="concat")
+
     @classmethod
     def max_detector_exposure_id(cls):
         """The maximum detector exposure ID expected to be generated by
@@ -412,6 +957,197 @@ class LsstBaseTranslator(FitsTranslator):
         # Exposure ID has to be an integer
         return int(idstr)
 
+    @classmethod
+    def compute_exposure_id_array(cls, dayobs, seqnum, controller=None):
+        """Calculate exposure IDs for arrays of observations.
+
+        Parameters
+        ----------
+        dayobs : `numpy.ndarray` of `str` or `int`
+            Days of observation, as strings in any of the forms accepted
+            by `compute_exposure_id` or as integers of form YYYYMMDD.
+        seqnum : `numpy.ndarray` of `int`
+            Sequence numbers.
+        controller : `numpy.ndarray` of `str` or `str`, optional
+            Controllers, as for `compute_exposure_id`. `None` indicates
+            that the controller is not relevant.
+
+        Returns
+        -------
+        exposure_id : `numpy.ndarray` of `numpy.int64`
+            Exposure IDs, identical to those returned by
+            `compute_exposure_id`. The arguments are broadcast against
+            each other.
+
+        Raises
+        ------
+        ValueError
+            Raised if any of the values is invalid. The message reports
+            the first invalid value.
+
+        Notes
+        -----
+        Translators that calculate exposure IDs differently, for example
+        from the observation date, fall back to calling their own
+        ``compute_exposure_id`` for each element.
+        """
+        if cls.compute_exposure_id is not LsstBaseTranslator.compute_exposure_id:
+            compute = np.vectorize(cls.compute_exposure_id, otypes=[np.int64])
+            return compute(dayobs, seqnum, controller)
+
+        dayobs = np.asarray(dayobs)
+        if dayobs.dtype.kind in "iu":
+            dayobs_int = dayobs.astype(np.int64)
+            bad = (dayobs_int < 1000_00_00) | (dayobs_int > 9999_99_99)
+        else:
+            dayobs = np.char.partition(dayobs.astype(str), "T")[..., 0]
+            dayobs = np.char.replace(dayobs, "-", "")
+            bad = (np.char.str_len(dayobs) != 8) | ~np.char.isdigit(dayobs)
+        if np.any(bad):
+            raise ValueError(f"Malformed dayobs: {dayobs[bad].flat[0]}")
+        if dayobs.dtype.kind not in "iu":
+            dayobs_int = dayobs.astype(np.int64)
+
+        # Expect no more than 99,999 exposures in a day
+        maxdigits = 5
+        seqnum = np.asarray(seqnum, dtype=np.int64)
+        if np.any(seqnum >= 10**maxdigits):
+            raise ValueError(f"Sequence number ({seqnum[seqnum >= 10**maxdigits].flat[0]}) exceeds limit")
+        if np.any(seqnum < 0):
+            raise ValueError(f"Sequence number ({seqnum[seqnum < 0].flat[0]}) is negative")
+
+        # Camera control changes the year component of the exposure ID
+        if controller is not None:
+            controller = np.asarray(controller).astype(str)
+            offset = np.zeros(controller.shape, dtype=np.int64)
+            known = np.zeros(controller.shape, dtype=bool)
+            for code, code_offset in _CONTROLLER_OFFSETS.items():
+                matches = controller == code
+                offset[matches] = code_offset
+                known |= matches
+            if not np.all(known):
+                raise ValueError(f"Supplied controller, '{controller[~known].flat[0]}' "
+                                 "is neither 'O' nor 'C' nor 'H'")
+            dayobs_int = dayobs_int + offset
+
+        return dayobs_int*10**maxdigits + seqnum
+
+    @classmethod
+    def decode_exposure_id(cls, exposure_id):
+        """Split an exposure ID into the components it was calculated from.
+
+        This is the inverse of `compute_exposure_id`.
+
+        Parameters
+        ----------
+        exposure_id : `int`
+            Exposure ID.
+
+        Returns
+        -------
+        dayobs : `int` or `str`
+            Day of observation in YYYYMMDD form. For translators that form
+            the ID from the observation date, the date of observation in
+            FITS ISO format to the precision held in the ID.
+        seqnum : `int`
+            Sequence number. Always 0 for IDs formed from the date.
+        controller : `str` or `None`
+            Controller. IDs calculated without a controller are reported
+            with controller "O" since that does not modify the ID. Always
+            `None` for IDs formed from the date.
+
+        Raises
+        ------
+        NotImplementedError
+            Raised if this translator calculates exposure IDs in some
+            other way.
+        """
+        if cls._exposure_id_from_date:
+            return cls._dateobs_from_exposure_id(exposure_id), 0, None
+        if cls.compute_exposure_id is not LsstBaseTranslator.compute_exposure_id:
+            raise NotImplementedError(f"Exposure IDs of {cls.__name__} can not be decoded")
+        dayobs, seqnum, controller = cls.decode_exposure_id_array([exposure_id])
+        return int(dayobs[0]), int(seqnum[0]), str(controller[0])
+
+    @staticmethod
+    def _dateobs_from_exposure_id(exposure_id):
+        """Recover the date of observation from an exposure ID formed from
+        the digits of the date, as used by the test stands.
+
+        Parameters
+        ----------
+        exposure_id : `int`
+            Exposure ID of form YYYYMMDDhhmmss with an optional digit of
+            tenths of a second.
+
+        Returns
+        -------
+        dateobs : `str`
+            Date of observation in FITS ISO format, to the precision
+            held in the ID.
+
+        Raises
+        ------
+        ValueError
+            Raised if the ID does not have the expected number of digits.
+        """
+        digits = str(exposure_id)
+        if len(digits) not in (14, 15):
+            raise ValueError(f"Exposure ID {exposure_id} is not formed from a date")
+        dateobs = (f"{digits[0:4]}-{digits[4:6]}-{digits[6:8]}T"
+                   f"{digits[8:10]}:{digits[10:12]}:{digits[12:14]}")
+        if len(digits) == 15:
+            dateobs += f".{digits[14]}"
+        return dateobs
+
+    @classmethod
+    def decode_exposure_id_array(cls, exposure_id):
+        """Split exposure IDs into the components they were calculated from.
+
+        This is the inverse of `compute_exposure_id_array`.
+
+        Parameters
+        ----------
+        exposure_id : `numpy.ndarray` of `int`
+            Exposure IDs.
+
+        Returns
+        -------
+        dayobs : `numpy.ndarray` of `numpy.int64`
+            Days of observation in YYYYMMDD form.
+        seqnum : `numpy.ndarray` of `numpy.int64`
+            Sequence numbers.
+        controller : `numpy.ndarray` of `str`
+            Controllers. IDs calculated without a controller are reported
+            with controller "O" since that does not modify the ID.
+
+        Raises
+        ------
+        NotImplementedError
+            Raised if this translator calculates exposure IDs in some
+            other way.
+
+        Notes
+        -----
+        For translators that form the ID from the observation date the
+        arrays hold the results of `decode_exposure_id` for each element.
+        """
+        if cls._exposure_id_from_date:
+            exposure_id = np.asarray(exposure_id, dtype=np.int64)
+            decoded = [cls.decode_exposure_id(int(i)) for i in exposure_id.flat]
+            return tuple(np.array([d[i] for d in decoded]).reshape(exposure_id.shape) for i in range(3))
+        if cls.compute_exposure_id is not LsstBaseTranslator.compute_exposure_id:
+            raise NotImplementedError(f"Exposure IDs of {cls.__name__} can not be decoded")
+
+        dayobs, seqnum = np.divmod(np.asarray(exposure_id, dtype=np.int64), 10**5)
+
+        # Real years are below 3000 so the controller offset can be
+        # recognized from the year component.
+        controller = np.where(dayobs >= 4000_00_00, "H", np.where(dayobs >= 3000_00_00, "C", "O"))
+        for code, code_offset in _CONTROLLER_OFFSETS.items():
+            dayobs[controller == code] -= code_offset
+        return dayobs, seqnum, controller
+
     def _is_on_mountain(self):
         """Indicate whether these data are coming from the instrument
         installed on the mountain.
@@ -564,52 +1300,7 @@ class LsstBaseTranslator(FitsTranslator):
         exposure group.  For other instruments we return the exposure_id.
         """
 
-        exposure_group = self.to_exposure_group()
-        # If the group is an int we return it
-        try:
-            visit_id = int(exposure_group)
-            return visit_id
-        except ValueError:
-            pass
-
-        # A Group is defined as ISO date with an extension
-        # The integer must be the same for a given group so we can never
-        # use datetime_begin.
-        # Nominally a GROUPID looks like "ISODATE+N" where the +N is
-        # optional.  This can be converted to seconds since epoch with
-        # an adjustment for N.
-        # For early data lacking that form we hash the group and return
-        # the int.
-        matches_date = GROUP_RE.match(exposure_group)
-        if matches_date:
-            iso_str = matches_date.group(1)
-            fraction = matches_date.group(2)
-            n = matches_date.group(3)
-            if n is not None:
-                n = int(n)
-            else:
-                n = 0
-            iso = datetime.datetime.strptime(iso_str, "%Y-%m-%dT%H:%M:%S")
-
-            tdelta = iso - TZERO_DATETIME
-            epoch = int(tdelta.total_seconds())
-
-            # Form the integer from EPOCH + 3 DIGIT FRAC + 0-pad N
-            visit_id = int(f"{epoch}{fraction}{n:04d}")
-        else:
-            # Non-standard string so convert to numbers
-            # using a hash function. Use the first N hex digits
-            group_bytes = exposure_group.encode("us-ascii")
-            hasher = hashlib.blake2b(group_bytes)
-            # Need to be big enough it does not possibly clash with the
-            # date-based version above
-            digest = hasher.hexdigest()[:14]
-            visit_id = int(digest, base=16)
-
-            # To help with hash collision, append the string length
-            visit_id = int(f"{visit_id}{len(exposure_group):02d}")
-
-        return visit_id
+        return compute_visit_id_from_exposure_group(self.to_exposure_group())
 
     @cache_translation
     def to_physical_filter(self):
@@ -621,11 +1312,116 @@ class LsstBaseTranslator(FitsTranslator):
             Name of filter. Can be a combination of FILTER, FILTER1 and FILTER2
             headers joined by a "~". Returns "unknown" if no filter is declared
         """
-        joined = self._join_keyword_values(["FILTER", "FILTER1", "FILTER2"], delim=FILTER_DELIMITER)
-        if not joined:
-            joined = "unknown"
+        physical_filter = self._physical_filter_from_header(self._header)
+        self._used_physical_filter_cards()
+        return physical_filter
+
+    _physical_filter_keywords = ("FILTER", "FILTER1", "FILTER2")
+    """Header keywords used to calculate the physical filter."""
+
+    _physical_filter_keyword_prefixes = ()
+    """Prefixes of any further header keywords used to calculate the
+    physical filter."""
 
-        return joined
+    @classmethod
+    def _physical_filter_from_header(cls, header):
+        """Calculate the physical filter name from header values.
+
+        Parameters
+        ----------
+        header : `dict`-like
+            Header, or any mapping containing the keywords listed in
+            ``_physical_filter_keywords``.
+
+        Returns
+        -------
+        filter : `str`
+            Name of the physical filter, as returned by
+            `to_physical_filter`.
+
+        Notes
+        -----
+        This does not issue warnings or record the cards used, so it can be
+        applied to many sets of header values at once by
+        `compute_physical_filter_array`.
+        """
+        values = [header[k] for k in cls._physical_filter_keywords if cls.is_keyword_defined(header, k)]
+        if not values:
+            return "unknown"
+        return FILTER_DELIMITER.join(str(v) for v in values)
+
+    def _used_physical_filter_cards(self, warn_if_no_filter=False):
+        """Record the cards read by `_physical_filter_from_header`.
+
+        Parameters
+        ----------
+        warn_if_no_filter : `bool`, optional
+            If `True` issue a warning if the ``FILTER`` header is not
+            defined, unless this is a bias or dark observation.
+        """
+        for keyword in self._physical_filter_keywords:
+            if self.is_key_ok(keyword):
+                self._used_these_cards(keyword)
+
+        if warn_if_no_filter and not self.is_key_ok("FILTER"):
+            # Warn if the filter being unknown is important
+            obstype = self.to_observation_type()
+            if obstype not in ("bias", "dark"):
+                log.warning("%s: Unable to determine the filter",
+                            self._log_prefix)
+
+    @classmethod
+    def compute_physical_filter_array(cls, columns):
+        """Calculate the physical filter names of many headers in one pass.
+
+        Parameters
+        ----------
+        columns : `dict` [`str`, sequence]
+            Mapping of header keyword to the values of that keyword in each
+            header. All sequences must have the same length and `None`
+            indicates an undefined value. Keywords that are not used by
+            this translator are ignored and missing keywords are treated
+            as undefined.
+
+        Returns
+        -------
+        physical_filters : `numpy.ndarray` of `str`
+            The physical filter of each header, identical to the value
+            `to_physical_filter` would return.
+
+        Raises
+        ------
+        ValueError
+            Raised if the columns do not all have the same length.
+
+        Notes
+        -----
+        Each distinct combination of values is translated only once, so
+        the cost is dominated by the number of distinct filter
+        configurations rather than the number of headers.
+        """
+        prefixes = cls._physical_filter_keyword_prefixes
+        keywords = [k for k in columns
+                    if k in cls._physical_filter_keywords or (prefixes and k.startswith(prefixes))]
+        lengths = {len(v) for v in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Header value columns differ in length: {sorted(lengths)}")
+        n_headers = lengths.pop() if lengths else 0
+
+        # With no relevant keywords every header has the same (empty) row.
+        rows = zip(*(columns[k] for k in keywords)) if keywords else [()]*n_headers
+
+        translated = {}
+        physical_filters = []
+        for row in rows:
+            try:
+                physical_filter = translated[row]
+            except KeyError:
+                physical_filter = cls._physical_filter_from_header(dict(zip(keywords, row)))
+                translated[row] = physical_filter
+            physical_filters.append(physical_filter)
+
+        return np.array(physical_filters, dtype=str)
 
     @cache_translation
     def to_tracking_radec(self):
@@ -636,10 +1432,7 @@ class LsstBaseTranslator(FitsTranslator):
         # is 1970 they are garbage and should not be used.
         if self._header["DATE-OBS"] == self._header["DATE"]:
             # A fixed up date -- use AZEL as source of truth
-            altaz = self.to_altaz_begin()
-            radec = astropy.coordinates.SkyCoord(altaz.transform_to(astropy.coordinates.ICRS),
-                                                 obstime=altaz.obstime,
-                                                 location=altaz.location)
+            radec = altaz_to_icrs(self.to_altaz_begin())
         else:
             radecsys = ("RADESYS",)
             radecpairs = (("RASTART", "DECSTART"), ("RA", "DEC"))
@@ -691,33 +1484,30 @@ class LsstBaseTranslator(FitsTranslator):
         """
         return bool(re.match(r"empty_?\d*$", filter.lower()))
 
-    def _determine_primary_filter(self):
+    @classmethod
+    def _primary_filter_from_header(cls, header):
         """Determine the primary filter from the ``FILTER`` header.
 
+        Parameters
+        ----------
+        header : `dict`-like
+            Header, or any mapping containing the ``FILTER`` keyword.
+
         Returns
         -------
         filter : `str`
             The contents of the ``FILTER`` header with some appropriate
             defaulting.
         """
-
-        if self.is_key_ok("FILTER"):
-            physical_filter = self._header["FILTER"]
-            self._used_these_cards("FILTER")
-
-            if self._is_filter_empty(physical_filter):
+        if cls.is_keyword_defined(header, "FILTER"):
+            physical_filter = header["FILTER"]
+            if cls._is_filter_empty(physical_filter):
                 physical_filter = "empty"
         else:
             # Be explicit about having no knowledge of the filter
             # by setting it to "unknown". It should always have a value.
             physical_filter = "unknown"
 
-            # Warn if the filter being unknown is important
-            obstype = self.to_observation_type()
-            if obstype not in ("bias", "dark"):
-                log.warning("%s: Unable to determine the filter",
-                            self._log_prefix)
-
         return physical_filter
 
     @cache_translation
@@ -141,13 +141,21 @@ class LsstCamTranslator(LsstBaseTranslator):
             headers joined by a "~" if FILTER2 is set and not empty.
             Returns "UNKNOWN" if no filter is declared.
         """
-        physical_filter = self._determine_primary_filter()
+        physical_filter = self._physical_filter_from_header(self._header)
+        self._used_physical_filter_cards(warn_if_no_filter=True)
+        return physical_filter
+
+    _physical_filter_keywords = ("FILTER", "FILTER2")
+
+    @classmethod
+    def _physical_filter_from_header(cls, header):
+        # Docstring inherited.
+        physical_filter = cls._primary_filter_from_header(header)
 
         filter2 = None
-        if self.is_key_ok("FILTER2"):
-            self._used_these_cards("FILTER2")
-            filter2 = self._header["FILTER2"]
-            if self._is_filter_empty(filter2):
+        if cls.is_keyword_defined(header, "FILTER2"):
+            filter2 = header["FILTER2"]
+            if cls._is_filter_empty(filter2):
                 filter2 = None
 
         if filter2:
@@ -63,6 +63,8 @@ class LsstUCDCamTranslator(LsstBaseTranslator):
         "detector_serial": "LSST_NUM",
     }
 
+    _header_keywords = frozenset({"ORIGIN", "FILENAME", "MJD"})
+
     DETECTOR_NAME = _DETECTOR_NAME
     """Fixed name of single sensor in raft."""
 
@@ -82,6 +84,8 @@ class LsstUCDCamTranslator(LsstBaseTranslator):
     _ROLLOVER_TIME = TimeDelta(8*60*60, scale="tai", format="sec")
     """Time delta for the definition of a Rubin Test Stand start of day."""
 
+    _exposure_id_from_date = True
+
     @classmethod
     def can_translate(cls, header, filename=None):
         """Indicate whether this translation class can translate the
@@ -226,13 +230,21 @@ class LsstUCDCamTranslator(LsstBaseTranslator):
             The filter name.  Returns "NONE" if no filter can be determined.
         """
 
-        if "FILTER" in self._header:
+        if self.is_key_ok("FILTER"):
             self._used_these_cards("FILTER")
-            return self._header["FILTER"].lower()
         else:
             log.warning("%s: FILTER key not found in header (assuming NONE)",
                         self._log_prefix)
+        return self._physical_filter_from_header(self._header)
+
+    _physical_filter_keywords = ("FILTER",)
+
+    @classmethod
+    def _physical_filter_from_header(cls, header):
+        # Docstring inherited.
+        if not cls.is_keyword_defined(header, "FILTER"):
             return "NONE"
+        return header["FILTER"].lower()
 
     def to_exposure_id(self):
         """Generate a unique exposure ID number
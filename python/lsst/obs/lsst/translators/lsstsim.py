@@ -16,10 +16,10 @@ import warnings
 import logging
 
 import astropy.utils.exceptions
-from astropy.coordinates import AltAz
 from astro_metadata_translator import cache_translation
 
 from .lsst import LsstBaseTranslator, SIMONYI_LOCATION, SIMONYI_TELESCOPE
+from .coordinates import icrs_to_altaz
 
 log = logging.getLogger(__name__)
 
@@ -35,6 +35,8 @@ class LsstSimTranslator(LsstBaseTranslator):
     }
     _trivial_map = {}
 
+    _header_keywords = frozenset({"OUTFILE"})
+
     @classmethod
     def max_exposure_id(cls):
         """The maximum exposure ID expected from this instrument.
@@ -84,6 +86,6 @@ class LsstSimTranslator(LsstBaseTranslator):
                 # This triggers warnings because of the future dates
                 with warnings.catch_warnings():
                     warnings.simplefilter("ignore", category=astropy.utils.exceptions.AstropyWarning)
-                    altaz = radec.transform_to(AltAz)
+                    altaz = icrs_to_altaz(radec)
                 return altaz
         return None
@@ -58,6 +58,11 @@ class LsstCamPhoSimTranslator(LsstSimTranslator):
         "detector_serial": "LSST_NUM",
     }
 
+    _header_keywords = frozenset({
+        "CREATOR", "RATEL", "DECTEL", "RA_DEG", "DEC_DEG", "BORE-RA", "BORE-DEC",
+        "ROTANGZ", "ROTANGLE", "ZENITH", "AZIMUTH",
+    })
+
     cameraPolicyFile = "policy/phosim.yaml"
 
     @classmethod
@@ -60,6 +60,8 @@ class LsstTS3Translator(LsstBaseTranslator):
         "exposure_time": ("EXPTIME", dict(unit=u.s)),
     }
 
+    _header_keywords = frozenset({"FILENAME"})
+
     DETECTOR_NAME = _DETECTOR_NAME
     """Fixed name of single sensor."""
 
@@ -72,6 +74,8 @@ class LsstTS3Translator(LsstBaseTranslator):
     _ROLLOVER_TIME = TimeDelta(8*60*60, scale="tai", format="sec")
     """Time delta for the definition of a Rubin Test Stand start of day."""
 
+    _exposure_id_from_date = True
+
     @classmethod
     def can_translate(cls, header, filename=None):
         """Indicate whether this translation class can translate the
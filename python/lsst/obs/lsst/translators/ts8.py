@@ -53,6 +53,8 @@ class LsstTS8Translator(LsstBaseTranslator):
         "exposure_time": ("EXPTIME", dict(unit=u.s)),
     }
 
+    _header_keywords = frozenset({"FILENAME", "CONTNUM", "REBNAME", "RAFTNAME"})
+
     DETECTOR_MAX = 250
     """Maximum number of detectors to use when calculating the
     detector_exposure_id."""
@@ -62,6 +64,8 @@ class LsstTS8Translator(LsstBaseTranslator):
     _ROLLOVER_TIME = TimeDelta(8*60*60, scale="tai", format="sec")
     """Time delta for the definition of a Rubin Test Stand start of day."""
 
+    _exposure_id_from_date = True
+
     @classmethod
     def can_translate(cls, header, filename=None):
         """Indicate whether this translation class can translate the
@@ -201,26 +205,36 @@ class LsstTS8Translator(LsstBaseTranslator):
         this properly.
         """
 
-        try:
-            filter_pos = self._header["FILTPOS"]
-            self._used_these_cards("FILTPOS")
-        except KeyError:
+        physical_filter = self._physical_filter_from_header(self._header)
+
+        if not self.is_key_ok("FILTPOS"):
             log.warning("%s: FILTPOS key not found in header (assuming NONE)",
                         self._log_prefix)
-            return "NONE"
+        else:
+            self._used_these_cards("FILTPOS")
+            if physical_filter == "NONE":
+                log.warning("%s: Unknown filter position (assuming NONE): %d",
+                            self._log_prefix, self._header["FILTPOS"])
 
-        try:
-            return {
-                2: 'g',
-                3: 'r',
-                4: 'i',
-                5: 'z',
-                6: 'y',
-            }[filter_pos]
-        except KeyError:
-            log.warning("%s: Unknown filter position (assuming NONE): %d",
-                        self._log_prefix, filter_pos)
+        return physical_filter
+
+    _physical_filter_keywords = ("FILTPOS",)
+
+    _FILTER_POSITIONS = {
+        2: 'g',
+        3: 'r',
+        4: 'i',
+        5: 'z',
+        6: 'y',
+    }
+    """Mapping of filter wheel position to filter name."""
+
+    @classmethod
+    def _physical_filter_from_header(cls, header):
+        # Docstring inherited.
+        if not cls.is_keyword_defined(header, "FILTPOS"):
             return "NONE"
+        return cls._FILTER_POSITIONS.get(header["FILTPOS"], "NONE")
 
     def to_exposure_id(self):
         """Generate a unique exposure ID number
@@ -25,14 +25,22 @@
 Miscellaneous utilities related to lsst cameras
 """
 
-__all__ = ("readRawFile",)
+__all__ = ("readRawFile", "readRawVisit", "DetectorReadResult")
+
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass
+
+import lsst.log
+import lsst.afw.image
 
 from .lsstCamMapper import assemble_raw
-from .assembly import readRawAmps
-from ._fitsHeader import readRawFitsHeader
+from .assembly import readRawAmpsAndHeader, readRawAmps, fixAmpsAndAssemble
 
+logger = lsst.log.Log.getLogger("obs.lsst.utils")
 
-def readRawFile(fileName, detector, dataId=None):
+
+def readRawFile(fileName, detector, dataId=None, assembleTask=None):
     """Read a raw file from fileName, assembling it nicely.
 
     Parameters
@@ -43,6 +51,9 @@ def readRawFile(fileName, detector, dataId=None):
         Detector to associate with the returned Exposure.
     dataId : `lsst.daf.persistence.DataId` or `dict`
         DataId to use in log message output.
+    assembleTask : `lsst.ip.isr.AssembleCcdTask`, optional
+        Untrimmed assembly task to use. Defaults to the task shared by the
+        calling thread; see `lsst.obs.lsst.assembly.getUntrimmedAssembler`.
 
     Returns
     -------
@@ -56,12 +67,111 @@ def readRawFile(fileName, detector, dataId=None):
         def __init__(self, obj):
             self.obj = obj
 
-    amps = readRawAmps(fileName, detector=detector)
+    amps, md = readRawAmpsAndHeader(fileName, detector=detector)
 
     component_info = {}
-    component_info["raw_hdu"] = Info(readRawFitsHeader(fileName))
+    component_info["raw_hdu"] = Info(md)
     component_info["raw_amp"] = Info(amps)
 
-    exp = assemble_raw(dataId, component_info, None)
+    exp = assemble_raw(dataId, component_info, None, assembleTask=assembleTask)
 
     return exp
+
+
+@dataclass
+class DetectorReadResult:
+    """The assembled raw of a single detector and how long it took."""
+
+    detector: int
+    """Detector ID."""
+
+    fileName: str
+    """Raw file that was read."""
+
+    exposure: lsst.afw.image.Exposure
+    """Assembled untrimmed exposure. No metadata, WCS or VisitInfo is
+    attached."""
+
+    ioTime: float
+    """Time spent reading the amps, in seconds."""
+
+    assemblyTime: float
+    """Time spent fixing the amp geometry and assembling the CCD, in
+    seconds."""
+
+
+def _readAndAssembleDetector(detectorId, fileName, instrument, camera):
+    """Read and assemble the raw of a single detector.
+
+    Parameters
+    ----------
+    detectorId : `int`
+        Detector ID.
+    fileName : `str`
+        Raw file containing the detector.
+    instrument : `type`
+        Instrument class providing ``getCamera``. Only used if ``camera``
+        is `None`.
+    camera : `lsst.afw.cameraGeom.Camera` or `None`
+        Camera geometry.
+
+    Returns
+    -------
+    result : `DetectorReadResult`
+        The assembled exposure and the timings.
+    """
+    if camera is None:
+        camera = instrument.getCamera()
+    t0 = time.perf_counter()
+    ampExps = readRawAmps(fileName, camera[detectorId])
+    t1 = time.perf_counter()
+    exposure = fixAmpsAndAssemble(ampExps, fileName)
+    t2 = time.perf_counter()
+    return DetectorReadResult(detector=detectorId, fileName=fileName, exposure=exposure,
+                              ioTime=t1 - t0, assemblyTime=t2 - t1)
+
+
+def readRawVisit(fileNames, instrument, maxWorkers=None, useProcesses=False):
+    """Read and assemble the raws of all the detectors of a visit
+    concurrently.
+
+    Parameters
+    ----------
+    fileNames : `dict` of `int`: `str`
+        Raw file for each detector ID.
+    instrument : `type`
+        Instrument class, such as `lsst.obs.lsst.LsstCam`, whose
+        ``getCamera`` method provides the detector geometry.
+    maxWorkers : `int`, optional
+        Number of workers to use. Defaults to the executor default.
+    useProcesses : `bool`, optional
+        If `True` use a process pool instead of a thread pool. Each process
+        builds its own camera, and the exposures are returned to the
+        calling process by pickling.
+
+    Returns
+    -------
+    results : `list` of `DetectorReadResult`
+        One result per detector, sorted by detector ID.
+
+    Notes
+    -----
+    The per-detector read and assembly timings are reported at debug
+    level as well as being returned with each result.
+    """
+    if useProcesses:
+        executorClass = ProcessPoolExecutor
+        camera = None
+    else:
+        executorClass = ThreadPoolExecutor
+        camera = instrument.getCamera()
+
+    with executorClass(max_workers=maxWorkers) as executor:
+        futures = [executor.submit(_readAndAssembleDetector, detectorId, fileName, instrument, camera)
+                   for detectorId, fileName in sorted(fileNames.items())]
+        results = [future.result() for future in futures]
+
+    for result in results:
+        logger.debug("Detector %d: read in %.3fs, assembled in %.3fs (%s)", result.detector,
+                     result.ioTime, result.assemblyTime, result.fileName)
+    return results
@@ -19,25 +19,43 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import gzip
 import numpy
 import os
+import shutil
 import sys
+import tempfile
+import threading
 import unittest
 
 import lsst.utils.tests
 from lsst.utils import getPackageDir
 from lsst.daf.persistence import Butler
 from lsst.afw.cameraGeom import Detector
+from lsst.geom import Box2I, Extent2I
 from lsst.afw.image import ImageFitsReader
 import lsst.obs.base.yamlCamera as yamlCamera
 from lsst.ip.isr import AssembleCcdTask
 
-from lsst.obs.lsst.utils import readRawFile
+from lsst.obs.lsst.utils import readRawFile, readRawVisit
+from lsst.obs.lsst import LsstCam
+import lsst.obs.lsst.assembly
+from lsst.obs.lsst.assembly import (readRawAmps, readRawAmpsAndHeader, fixAmpsAndAssemble,
+                                    readMappedRawAndAssemble, readRawAndAssemble,
+                                    getUntrimmedAssembler)
+import lsst.obs.lsst._fitsHeader
+from lsst.obs.lsst._fitsHeader import readRawFitsHeader, clearRawHeaderCache, scanRawFitsHeader
+from lsst.obs.lsst.translators import LsstCamTranslator
+from astro_metadata_translator import ObservationInfo
 
 PACKAGE_DIR = getPackageDir("obs_lsst")
 TESTDIR = os.path.dirname(__file__)
 LATISS_DATA_ROOT = os.path.join(PACKAGE_DIR, 'data', 'input', 'latiss')
 BOT_DATA_ROOT = os.path.join(TESTDIR, 'data', 'input')
+E2V_RAW_FILE = os.path.join(BOT_DATA_ROOT, "raw", "2019-10-31", "3019103101985",
+                            "3019103101985-R22-S11-det094.fits")
+ITL_RAW_FILE = os.path.join(BOT_DATA_ROOT, "raw", "2019-11-01", "3019110102212",
+                            "3019110102212-R02-S02-det011.fits")
 E2V_DATA_ID = {'raftName': 'R22', 'detectorName': 'S11', 'visit': 3019103101985}
 ITL_DATA_ID = {'raftName': 'R02', 'detectorName': 'S02', 'visit': 3019110102212}
 TESTDATA_ROOT = os.path.join(TESTDIR, "data")
@@ -153,6 +171,160 @@ class ReadRawFileTestCase(lsst.utils.tests.TestCase):
         md = exposure.getMetadata()
         self.assertIn("INSTRUME", md)
 
+    def testReadRawAmpsAndHeader(self):
+        fileName = os.path.join(LATISS_DATA_ROOT, "raw/2018-09-20/3018092000065-det000.fits")
+        policy = os.path.join(PACKAGE_DIR, "policy", "latiss.yaml")
+        detector = yamlCamera.makeCamera(policy)[0]
+        amps, md = readRawAmpsAndHeader(fileName, detector)
+        self.assertEqual(len(amps), len(detector))
+        for amp, ampExp in zip(detector, amps):
+            self.assertEqual(ampExp.getMetadata().get("EXTNAME"), f"Segment{amp.getName()[1:]}")
+        self.assertEqual(md.toDict(), readRawFitsHeader(fileName).toDict())
+        for ampExp, singleExp in zip(amps, readRawAmps(fileName, detector)):
+            self.assertImagesEqual(ampExp.getImage(), singleExp.getImage())
+
+    def testReadMappedRaw(self):
+        detector = LsstCam.getCamera()[94]
+        # The test data are gzip-compressed so can not be mapped directly
+        self.assertIsNone(readMappedRawAndAssemble(E2V_RAW_FILE, detector))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fileName = os.path.join(tmpdir, "raw.fits")
+            with gzip.open(E2V_RAW_FILE, "rb") as infh, open(fileName, "wb") as outfh:
+                shutil.copyfileobj(infh, outfh)
+
+            mapped = readMappedRawAndAssemble(fileName, detector)
+            expected = fixAmpsAndAssemble(readRawAmps(fileName, detector), fileName)
+
+        self.assertImagesEqual(mapped.getImage(), expected.getImage())
+        for amp1, amp2 in zip(mapped.getDetector(), expected.getDetector()):
+            self.assertEqual(amp1.getRawBBox(), amp2.getRawBBox())
+
+    def testReadRawAndAssemble(self):
+        detector = LsstCam.getCamera()[94]
+        assembled = readRawAndAssemble(E2V_RAW_FILE, detector)
+        expected = fixAmpsAndAssemble(readRawAmps(E2V_RAW_FILE, detector), E2V_RAW_FILE)
+        self.assertImagesEqual(assembled.getImage(), expected.getImage())
+        for amp1, amp2 in zip(assembled.getDetector(), expected.getDetector()):
+            self.assertEqual(amp1.getName(), amp2.getName())
+            self.assertEqual(amp1.getRawBBox(), amp2.getRawBBox())
+            self.assertEqual(amp1.getRawXYOffset(), amp2.getRawXYOffset())
+
+        # Opting in to memory mapping falls back for compressed files
+        mapped = readRawAndAssemble(E2V_RAW_FILE, detector, useMemoryMap=True)
+        self.assertImagesEqual(mapped.getImage(), expected.getImage())
+
+    def testFixedDetectorCache(self):
+        detector = LsstCam.getCamera()[94]
+        ampExps = readRawAmps(E2V_RAW_FILE, detector)
+        bboxes = [ampExp.getBBox() for ampExp in ampExps]
+        metadatas = [ampExp.getMetadata() for ampExp in ampExps]
+
+        lsst.obs.lsst.assembly._fixedDetectorCache.clear()
+        fixed = lsst.obs.lsst.assembly._fixDetectorGeometry(detector, bboxes, metadatas, "test")
+        self.assertEqual(len(lsst.obs.lsst.assembly._fixedDetectorCache), 1)
+        again = lsst.obs.lsst.assembly._fixDetectorGeometry(detector, bboxes, metadatas, "test")
+        self.assertIs(fixed, again)
+
+        # An identical detector from another camera instance shares the
+        # entry
+        copied = lsst.obs.lsst.assembly._fixDetectorGeometry(detector.rebuild().finish(), bboxes,
+                                                             metadatas, "test")
+        self.assertIs(fixed, copied)
+        self.assertEqual(len(lsst.obs.lsst.assembly._fixedDetectorCache), 1)
+
+        # A different on-disk layout must not reuse the cached geometry
+        bboxes = [Box2I(bbox.getBegin(), bbox.getDimensions() + Extent2I(0, 10)) for bbox in bboxes]
+        other = lsst.obs.lsst.assembly._fixDetectorGeometry(detector, bboxes, metadatas, "test")
+        self.assertIsNot(fixed, other)
+        self.assertEqual(len(lsst.obs.lsst.assembly._fixedDetectorCache), 2)
+
+        # Nor may a detector with the same name and amp layout but other
+        # amplifier properties
+        builder = detector.rebuild()
+        for ampBuilder in builder.getAmplifiers():
+            ampBuilder.setGain(2*ampBuilder.getGain())
+        bboxes = [ampExp.getBBox() for ampExp in ampExps]
+        doubled = lsst.obs.lsst.assembly._fixDetectorGeometry(builder.finish(), bboxes, metadatas, "test")
+        self.assertIsNot(doubled, fixed)
+        for amp1, amp2 in zip(doubled, fixed):
+            self.assertEqual(amp1.getGain(), 2*amp2.getGain())
+
+    def testUntrimmedAssemblerReuse(self):
+        task = getUntrimmedAssembler()
+        self.assertFalse(task.config.doTrim)
+        self.assertIs(task, getUntrimmedAssembler())
+
+        others = []
+        thread = threading.Thread(target=lambda: others.append(getUntrimmedAssembler()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(task, others[0])
+
+    def testReadRawVisit(self):
+        fileNames = {94: E2V_RAW_FILE, 11: ITL_RAW_FILE}
+        results = readRawVisit(fileNames, LsstCam, maxWorkers=2)
+        self.assertEqual([r.detector for r in results], [11, 94])
+        for result in results:
+            self.assertGreaterEqual(result.ioTime, 0.0)
+            self.assertGreaterEqual(result.assemblyTime, 0.0)
+            detector = LsstCam.getCamera()[result.detector]
+            expected = fixAmpsAndAssemble(readRawAmps(result.fileName, detector), result.fileName)
+            self.assertImagesEqual(result.exposure.getImage(), expected.getImage())
+
+    def testRawHeaderCache(self):
+        cache = lsst.obs.lsst._fitsHeader._rawHeaderCache
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fileName = os.path.join(tmpdir, "raw.fits")
+            shutil.copyfile(E2V_RAW_FILE, fileName)
+
+            clearRawHeaderCache()
+            md1 = readRawFitsHeader(fileName)
+            self.assertEqual(len(cache), 1)
+            md2 = readRawFitsHeader(fileName)
+            self.assertEqual(len(cache), 1)
+            self.assertIsNot(md1, md2)
+            self.assertEqual(md1.toDict(), md2.toDict())
+
+            # Modifying the returned header must not affect the cache
+            md1["NEWKEY"] = "new"
+            self.assertNotIn("NEWKEY", readRawFitsHeader(fileName))
+
+            # A modified file is read again
+            stat = os.stat(fileName)
+            os.utime(fileName, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            readRawFitsHeader(fileName)
+            self.assertEqual(len(cache), 2)
+
+            clearRawHeaderCache(fileName)
+            self.assertEqual(len(cache), 0)
+
+    def testScanRawFitsHeader(self):
+        keywords, _ = LsstCamTranslator.header_keywords()
+        for key in ("DAYOBS", "SEQNUM", "MJD-OBS", "RAFTBAY", "CCDSLOT", "LSST_NUM", "OBSID"):
+            self.assertIn(key, keywords)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fileName = os.path.join(tmpdir, "raw.fits")
+            with gzip.open(E2V_RAW_FILE, "rb") as infh, open(fileName, "wb") as outfh:
+                shutil.copyfileobj(infh, outfh)
+
+            for translator_class in (LsstCamTranslator, None):
+                with self.subTest(translator_class=translator_class):
+                    scanned = scanRawFitsHeader(fileName, translator_class=translator_class)
+                    full = readRawFitsHeader(fileName, translator_class=translator_class)
+                    self.assertLess(len(scanned), len(full))
+                    for key, value in scanned.items():
+                        self.assertEqual(value, full[key], msg=key)
+                    self.assertEqual(ObservationInfo(scanned, translator_class=translator_class),
+                                     ObservationInfo(full, translator_class=translator_class))
+
+        # Compressed files fall back to the full reader
+        scanned = scanRawFitsHeader(E2V_RAW_FILE, translator_class=LsstCamTranslator)
+        self.assertEqual(ObservationInfo(scanned, translator_class=LsstCamTranslator),
+                         ObservationInfo(readRawFitsHeader(E2V_RAW_FILE, translator_class=LsstCamTranslator),
+                                         translator_class=LsstCamTranslator))
+
 
 def setup_module(module):
     lsst.utils.tests.init()
@@ -0,0 +1,65 @@
+# This file is part of obs_lsst.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Test the benchmarkTranslators.py script in bin.src."""
+
+import copy
+import os
+import unittest
+
+from lsst.obs.lsst.script.benchmarkTranslators import (readHeaderCorpus, groupByTranslator,
+                                                       runBenchmarks, compareResults, TRANSLATORS)
+
+TESTDIR = os.path.abspath(os.path.dirname(__file__))
+
+BAD_HEADERS = {"latiss-future-bad.yaml"}
+"""Test headers that are known not to translate."""
+
+
+class BenchmarkTranslatorsTestCase(unittest.TestCase):
+    """Test the translator benchmarks on the test headers."""
+
+    def testBenchmarks(self):
+        headers = readHeaderCorpus(os.path.join(TESTDIR, "headers"))
+        self.assertLessEqual(BAD_HEADERS, set(headers))
+        headers = {name: header for name, header in headers.items() if name not in BAD_HEADERS}
+        corpus = groupByTranslator(headers)
+        self.assertEqual(set(corpus), set(TRANSLATORS))
+
+        # Replicate to the largest group so that every header is translated
+        volume = max(len(group) for group in corpus.values())
+        results = runBenchmarks(corpus, volume=volume, repeat=1)
+        self.assertEqual(set(results["translators"]), {t.name for t in TRANSLATORS})
+        for timings in results["translators"].values():
+            self.assertEqual(timings["fix_header"]["calls"], volume)
+            self.assertEqual(timings["fix_header"]["errors"], 0)
+            self.assertEqual(timings["observation_info"]["errors"], 0)
+            self.assertIn("to_observation_id", timings["methods"])
+
+        self.assertEqual(compareResults(results, results), [])
+        slower = copy.deepcopy(results)
+        slower["translators"]["LSST_LATISS"]["fix_header"]["best_us"] *= 2
+        self.assertEqual([name for name, _, _ in compareResults(results, slower)],
+                         ["LSST_LATISS fix_header"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+# This file is part of obs_lsst.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Test the mappings between focal plane, detector and amplifier
+coordinates."""
+
+import unittest
+
+import numpy as np
+
+import lsst.geom as geom
+import lsst.utils.tests
+from lsst.obs.lsst import LsstCam
+from lsst.obs.lsst.cameraTransforms import (LsstCameraTransforms, FocalPlaneIndex, AmpLookupTable,
+                                            focalMmToCcdPixel, ccdPixelToAmpPixel)
+
+
+class CameraTransformsTestCase(lsst.utils.tests.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.camera = LsstCam.getCamera()
+
+    def _lookup(self, func, *args):
+        """Return the result of a lookup, or `None` if it raises."""
+        try:
+            return func(*args)
+        except RuntimeError:
+            return None
+
+    def testFocalPlaneIndex(self):
+        index = FocalPlaneIndex(self.camera)
+        self.assertGreater(len(index), 0)
+        self.assertLess(max(len(index.getCandidates(geom.PointD(x, y)))
+                            for x in np.linspace(-350, 350, 29) for y in np.linspace(-350, 350, 29)),
+                        len(self.camera))
+
+        # The index must find exactly what a search of every detector finds,
+        # including points in the gaps and off the focal plane.
+        for x in np.linspace(-350, 350, 71):
+            for y in np.linspace(-350, 350, 71):
+                point = geom.PointD(x, y)
+                expected = self._lookup(focalMmToCcdPixel, self.camera, point)
+                found = self._lookup(index.focalMmToCcdPixel, point)
+                if expected is None:
+                    self.assertIsNone(found)
+                else:
+                    self.assertEqual(found[0].getName(), expected[0].getName())
+                    self.assertEqual(found[1], expected[1])
+
+    def testLsstCameraTransforms(self):
+        lct = LsstCameraTransforms(self.camera)
+        detector = self.camera["R22_S11"]
+        focalPlaneXY = detector.getOrientation().getFpPosition()
+        detectorName, ccdX, ccdY = lct.focalMmToCcdPixel(*focalPlaneXY)
+        self.assertEqual(detectorName, "R22_S11")
+        self.assertIs(lct.getFocalPlaneIndex(), lct.getFocalPlaneIndex())
+
+        detectorName, channel, ampX, ampY = lct.focalMmToAmpPixel(*focalPlaneXY)
+        self.assertEqual(detectorName, "R22_S11")
+        ccdXY = lct.ampPixelToCcdPixel(ampX, ampY, channel, detectorName)
+        self.assertLessEqual(abs(ccdXY[0] - ccdX), 1)
+        self.assertLessEqual(abs(ccdXY[1] - ccdY), 1)
+
+        with self.assertRaises(RuntimeError):
+            lct.focalMmToCcdPixel(1e4, 1e4)
+
+    def testArrays(self):
+        lct = LsstCameraTransforms(self.camera)
+        rng = np.random.RandomState(42)
+        n = 500
+        detectorNames = rng.choice(["R22_S11", "R01_S00", "R43_S22"], n)
+        ccdX = rng.uniform(0, 4000, n)
+        ccdY = rng.uniform(0, 3990, n)
+
+        channel, ampX, ampY = lct.ccdPixelToAmpPixelArray(ccdX, ccdY, detectorNames)
+        focalPlaneX, focalPlaneY = lct.ccdPixelToFocalMmArray(ccdX, ccdY, detectorNames)
+        for i in range(0, n, 10):
+            self.assertEqual(lct.ccdPixelToAmpPixel(ccdX[i], ccdY[i], detectorNames[i]),
+                             (channel[i], ampX[i], ampY[i]))
+            self.assertFloatsAlmostEqual(np.array(lct.ccdPixelToFocalMm(ccdX[i], ccdY[i], detectorNames[i])),
+                                         np.array([focalPlaneX[i], focalPlaneY[i]]), atol=1e-9)
+
+        # Amplifier pixels map back to the nearest detector pixel
+        x, y = lct.ampPixelToCcdPixelArray(ampX, ampY, channel, detectorNames)
+        np.testing.assert_array_equal(x, np.floor(ccdX + 0.5))
+        np.testing.assert_array_equal(y, np.floor(ccdY + 0.5))
+
+        names, x, y = lct.focalMmToCcdPixelArray(focalPlaneX, focalPlaneY)
+        np.testing.assert_array_equal(names, detectorNames)
+        np.testing.assert_allclose(x, ccdX, atol=1e-6)
+        np.testing.assert_allclose(y, ccdY, atol=1e-6)
+
+        with self.assertRaises(RuntimeError):
+            lct.focalMmToCcdPixelArray([0.0, 1e4], [0.0, 1e4])
+        with self.assertRaises(RuntimeError):
+            lct.ccdPixelToAmpPixelArray([0.0, 1e5], [0.0, 0.0], "R22_S11")
+
+    def testAmpLookupTable(self):
+        lct = LsstCameraTransforms(self.camera)
+        for detectorName in ["R22_S11", "R01_S00", "R43_S22"]:
+            detector = self.camera[detectorName]
+            table = lct.getAmpLookupTable(detectorName)
+            self.assertIsInstance(table, AmpLookupTable)
+            self.assertIs(lct.getAmpLookupTable(detectorName), table)
+            self.assertTrue(table.isRegular)
+
+            bbox = detector.getBBox()
+            for x in np.linspace(bbox.getMinX() - 1, bbox.getMaxX() + 1, 23):
+                for y in np.linspace(bbox.getMinY() - 1, bbox.getMaxY() + 1, 19):
+                    point = geom.PointD(x, y)
+                    expected = self._lookup(ccdPixelToAmpPixel, point, detector)
+                    found = self._lookup(table.ccdPixelToAmpPixel, point)
+                    if expected is None:
+                        self.assertIsNone(found)
+                    else:
+                        self.assertEqual(found[0].getName(), expected[0].getName())
+                        self.assertEqual(found[1], expected[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
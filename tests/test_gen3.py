@@ -23,6 +23,7 @@ import os
 import unittest
 import shutil
 import tempfile
+import unittest.mock
 from cProfile import Profile
 from pstats import Stats
 
@@ -30,6 +31,7 @@ import numpy as np
 
 from lsst.obs.lsst import (LsstCam, LsstComCam, LsstCamImSim, LsstCamPhoSim,
                            LsstTS8, LsstTS3, LsstUCDCam, Latiss)
+from lsst.obs.lsst._cameraCache import CAMERA_CACHE_ENV, CAMERA_CACHE_SUFFIX, clearCameraCache
 
 from lsst.daf.butler import (Butler, DatasetType, FileDescriptor, Location,
                              StorageClass, StorageClassFactory)
@@ -161,6 +163,69 @@ class TestInstruments(unittest.TestCase):
         self.checkInstrumentWithRegistry(Latiss,
                                          "latiss/raw/2018-09-20/3018092000065-det000.fits")
 
+    def testCameraCache(self):
+        with unittest.mock.patch.dict(os.environ, {CAMERA_CACHE_ENV: self.root}):
+            clearCameraCache()
+            camera = Latiss.getCamera()
+            self.assertIs(Latiss.getCamera(), camera)
+            cacheFiles = [f for f in os.listdir(self.root) if f.endswith(CAMERA_CACHE_SUFFIX)]
+            self.assertEqual(len(cacheFiles), 1)
+
+            # A new process reads the cache instead of the policy file
+            clearCameraCache()
+            with unittest.mock.patch("lsst.obs.base.yamlCamera.makeCamera",
+                                     side_effect=AssertionError("YAML camera was built")):
+                cached = Latiss.getCamera()
+            self.assertIsNot(cached, camera)
+            self.assertEqual(cached.getName(), camera.getName())
+            self.assertEqual([d.getName() for d in cached], [d.getName() for d in camera])
+            self.assertEqual([d.getSerial() for d in cached], [d.getSerial() for d in camera])
+            self.assertEqual([len(d) for d in cached], [len(d) for d in camera])
+
+            # The policy file is not hashed again while it is unchanged
+            with unittest.mock.patch("hashlib.sha256", side_effect=AssertionError("policy was hashed")):
+                self.assertIs(Latiss.getCamera(), cached)
+
+            # Writing a cache removes those of earlier versions of the policy
+            stale = cacheFiles[0].replace(cacheFiles[0].split("-")[-2], "0123456789abcdef")
+            with open(os.path.join(self.root, stale), "w"):
+                pass
+            for cacheFile in os.listdir(self.root):
+                if cacheFile != stale and cacheFile.endswith(CAMERA_CACHE_SUFFIX):
+                    os.unlink(os.path.join(self.root, cacheFile))
+            clearCameraCache()
+            Latiss.getCamera()
+            self.assertEqual([f for f in os.listdir(self.root) if f.endswith(CAMERA_CACHE_SUFFIX)],
+                             cacheFiles)
+        clearCameraCache()
+
+    def testFilterIndex(self):
+        for cls in (LsstCam, LsstComCam, LsstCamImSim, LsstTS8, LsstTS3, Latiss):
+            index = cls.getFilterIndex()
+            self.assertIs(cls.getFilterIndex(), index)
+            for definition in cls.filterDefinitions:
+                for name in (definition.physical_filter, *definition.alias):
+                    self.assertIn(name, index)
+                    # Physical filter names take precedence over aliases
+                    first = next((d for d in cls.filterDefinitions if name == d.physical_filter),
+                                 None)
+                    if first is None:
+                        first = next(d for d in cls.filterDefinitions if name in d.alias)
+                    self.assertIs(index[name], first)
+
+        physicalFilters, bands, lambdaEffs = LsstCam.normalizePhysicalFilters(
+            {"FILTER": ["SDSSi", "open", "SDSSi", "mystery"],
+             "FILTER2": ["ND_OD0.5", None, "ND_OD0.5", None]})
+        self.assertEqual(physicalFilters.tolist(), ["SDSSi~ND_OD0.5", "empty", "SDSSi~ND_OD0.5", "mystery"])
+        self.assertEqual(bands.tolist(), ["i~ND_OD0_5", "white", "i~ND_OD0_5", None])
+        self.assertEqual(lambdaEffs[1], 0.0)
+        self.assertTrue(np.isnan(lambdaEffs[3]))
+
+        physicalFilters, _, lambdaEffs = Latiss.normalizePhysicalFilters(
+            {"FILTER": ["no_filter", "KPNO_406_828nm"], "GRATING": ["ronchi90lpmm", None]})
+        self.assertEqual(physicalFilters.tolist(), ["empty~ronchi90lpmm", "KPNO_406_828nm~unknown"])
+        self.assertEqual(lambdaEffs.tolist(), [0.0, 828.0])
+
 
 if __name__ == "__main__":
     unittest.main()
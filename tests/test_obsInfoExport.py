@@ -0,0 +1,126 @@
+# This file is part of obs_lsst.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Test the export of observation metadata to columnar files."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from astro_metadata_translator import ObservationInfo
+
+from lsst.obs.lsst._fitsHeader import readRawFitsHeader
+from lsst.obs.lsst.obsInfoExport import (EXPORT_MANIFEST, ExportManifest, findRawFiles,
+                                         observationInfoColumns, exportObservationInfo)
+from lsst.obs.lsst.translators import LsstCamTranslator
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+TESTDIR = os.path.abspath(os.path.dirname(__file__))
+DATADIR = os.path.join(TESTDIR, os.path.pardir, "data", "input")
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not available")
+class ObsInfoExportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.root = os.path.join(DATADIR, "lsstCam", "raw")
+        self.files = list(findRawFiles(self.root))
+        self.outputDir = tempfile.mkdtemp(dir=TESTDIR)
+
+    def tearDown(self):
+        shutil.rmtree(self.outputDir, ignore_errors=True)
+
+    def readRows(self, suffix=".parquet"):
+        """Read the rows of all the output files, indexed by path."""
+        rows = {}
+        for name in sorted(os.listdir(self.outputDir)):
+            if not name.endswith(suffix):
+                continue
+            fileName = os.path.join(self.outputDir, name)
+            if suffix == ".parquet":
+                table = pyarrow.parquet.read_table(fileName)
+            else:
+                table = pyarrow.ipc.open_file(fileName).read_all()
+            self.assertEqual(table.column_names, [c[0] for c in observationInfoColumns()])
+            for row in table.to_pylist():
+                self.assertNotIn(row["path"], rows)
+                rows[row["path"]] = row
+        return rows
+
+    def testExport(self):
+        self.assertGreater(len(self.files), 2)
+        missing = os.path.join(self.root, "missing.fits")
+
+        summary = exportObservationInfo(self.files[:2] + [missing], self.outputDir, chunkSize=1,
+                                        translator_class=LsstCamTranslator, maxWorkers=2)
+        self.assertEqual((summary.nExported, summary.nFailed, summary.nSkipped), (2, 1, 0))
+        self.assertEqual(len(summary.chunks), 2)
+
+        # Only new files are translated when the export is repeated
+        summary = exportObservationInfo(self.files + [missing], self.outputDir,
+                                        translator_class=LsstCamTranslator, maxWorkers=2)
+        self.assertEqual((summary.nExported, summary.nFailed, summary.nSkipped),
+                         (len(self.files) - 2, 0, 3))
+
+        rows = self.readRows()
+        self.assertEqual(set(rows), set(self.files))
+        for path, row in rows.items():
+            obsInfo = ObservationInfo(readRawFitsHeader(path, translator_class=LsstCamTranslator),
+                                      translator_class=LsstCamTranslator)
+            self.assertEqual(row["exposure_id"], obsInfo.exposure_id)
+            self.assertEqual(row["physical_filter"], obsInfo.physical_filter)
+            self.assertAlmostEqual(row["datetime_begin_mjd_tai"], obsInfo.datetime_begin.tai.mjd)
+            self.assertAlmostEqual(row["exposure_time"], obsInfo.exposure_time.to_value("s"))
+
+        # Files that failed are only tried again when requested
+        summary = exportObservationInfo([missing], self.outputDir, retryFailed=True)
+        self.assertEqual((summary.nExported, summary.nFailed, summary.nSkipped), (0, 1, 0))
+
+        # Output files missing from the manifest are removed
+        orphan = os.path.join(self.outputDir, "part-999999.parquet")
+        with open(orphan, "w"):
+            pass
+        exportObservationInfo([], self.outputDir)
+        self.assertFalse(os.path.exists(orphan))
+        self.assertTrue(os.path.exists(os.path.join(self.outputDir, EXPORT_MANIFEST)))
+
+        with self.assertRaises(ValueError):
+            ExportManifest(self.outputDir, "arrow")
+
+    def testArrow(self):
+        summary = exportObservationInfo(self.files, self.outputDir, fileFormat="arrow",
+                                        translator_class=LsstCamTranslator, maxWorkers=1)
+        self.assertEqual(summary.nExported, len(self.files))
+        self.assertEqual(set(self.readRows(".arrow")), set(self.files))
+
+        with self.assertRaises(ValueError):
+            exportObservationInfo(self.files, self.outputDir, fileFormat="csv")
+
+
+if __name__ == "__main__":
+    unittest.main()
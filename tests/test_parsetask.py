@@ -19,6 +19,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import glob
 import os.path
 import unittest
 
@@ -35,6 +36,10 @@ from lsst.obs.lsst.imsim import ImsimParseTask
 from lsst.obs.lsst.ucd import UcdParseTask
 from lsst.obs.lsst.comCam import LsstComCamParseTask
 from lsst.obs.lsst.ingest import LsstCamParseTask
+from lsst.obs.lsst.obsInfoBatch import parseInfoBatch, readObservationInfoBatch
+from lsst.obs.lsst.translators import LsstCamTranslator
+from lsst.obs.lsst._fitsHeader import readRawFitsHeader
+from astro_metadata_translator import ObservationInfo
 
 TESTDIR = os.path.abspath(os.path.dirname(__file__))
 ROOTDIR = os.path.normpath(os.path.join(TESTDIR, os.path.pardir))
@@ -486,6 +491,36 @@ class LsstCamParseTaskTestCase(unittest.TestCase):
                      )
         self.assertParseCompare(DATADIR, CONFIGDIR, "comCam", LsstComCamParseTask, test_data)
 
+    def test_parsetask_batch(self):
+        """Extract information from several files in parallel"""
+        parseTask = self._constructParseTask(CONFIGDIR, "lsstCam", LsstCamParseTask)
+        files = sorted(glob.glob(os.path.join(DATADIR, "lsstCam", "raw", "*", "*", "*.fits")))
+        missing = os.path.join(DATADIR, "lsstCam", "raw", "missing.fits")
+
+        results = {result.path: result for result in parseInfoBatch(parseTask, files + [missing],
+                                                                    maxWorkers=2)}
+        self.assertEqual(len(results), len(files) + 1)
+        for file in files:
+            self.assertTrue(results[file].ok, msg=results[file].error)
+            self.assertEqual(results[file].info, parseTask.getInfo(file)[0])
+        self.assertFalse(results[missing].ok)
+        self.assertIsNone(results[missing].info)
+        self.assertIn("missing.fits", results[missing].error.message)
+
+        for fastScan in (True, False):
+            with self.subTest(fastScan=fastScan):
+                results = list(readObservationInfoBatch(iter(files), translator_class=LsstCamTranslator,
+                                                        maxWorkers=2, fastScan=fastScan))
+                self.assertEqual(len(results), len(files))
+                for result in results:
+                    self.assertTrue(result.ok, msg=result.error)
+                    expected = ObservationInfo(readRawFitsHeader(result.path,
+                                                                 translator_class=LsstCamTranslator),
+                                               translator_class=LsstCamTranslator)
+                    for name in ("observation_id", "exposure_id", "detector_num", "physical_filter",
+                                 "datetime_begin"):
+                        self.assertEqual(result.info[name], getattr(expected, name), msg=name)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,109 @@
+# This file is part of obs_lsst.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Test the camera geometry shared between processes."""
+
+import multiprocessing
+import os
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from lsst.obs.lsst import LsstComCam
+from lsst.obs.lsst.sharedCamera import SHARED_CAMERA_ENV, SharedCamera, getSharedCamera
+
+
+def _describeDetector(detectorId):
+    """Describe a detector of the published ComCam camera in a worker."""
+    detector = getSharedCamera(LsstComCam.getName()).getDetector(detectorId)
+    return detector.getName(), detector.getSerial(), [amp.getName() for amp in detector]
+
+
+class SharedCameraTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.camera = LsstComCam.getCamera()
+
+    def assertDetectorsEqual(self, detector1, detector2):
+        self.assertEqual(detector1.getName(), detector2.getName())
+        self.assertEqual(detector1.getSerial(), detector2.getSerial())
+        self.assertEqual(detector1.getBBox(), detector2.getBBox())
+        self.assertEqual(detector1.getOrientation().getFpPosition(),
+                         detector2.getOrientation().getFpPosition())
+        self.assertEqual([amp.getName() for amp in detector1], [amp.getName() for amp in detector2])
+        self.assertEqual([amp.getRawBBox() for amp in detector1], [amp.getRawBBox() for amp in detector2])
+
+    def testTables(self):
+        with SharedCamera.create(self.camera) as sharedCamera:
+            self.assertEqual(sharedCamera.cameraName, self.camera.getName())
+            self.assertEqual(len(sharedCamera), len(self.camera))
+            for detector in self.camera:
+                self.assertIn(detector.getId(), sharedCamera)
+                row = sharedCamera.detectors[sharedCamera.detectors["id"] == detector.getId()][0]
+                self.assertEqual(row["name"].decode(), detector.getName())
+                self.assertEqual(row["serial"].decode(), detector.getSerial())
+                bbox = detector.getBBox()
+                self.assertEqual(row["bbox"].tolist(),
+                                 [bbox.getMinX(), bbox.getMinY(), bbox.getMaxX(), bbox.getMaxY()])
+
+                amplifiers = sharedCamera.getAmplifiers(detector.getId())
+                self.assertEqual([name.decode() for name in amplifiers["name"]],
+                                 [amp.getName() for amp in detector])
+                self.assertEqual(amplifiers["gain"].tolist(), [amp.getGain() for amp in detector])
+
+                self.assertDetectorsEqual(sharedCamera.getDetector(detector.getId()), detector)
+
+            # The tables can not be modified
+            with self.assertRaises(ValueError):
+                sharedCamera.amplifiers["gain"][0] = 0.0
+
+            # Attaching by name, as worker processes do, gives the same tables;
+            # testPublish covers access from other processes
+            attached = SharedCamera.attach(sharedCamera.name)
+            self.assertEqual(attached.detectors.tolist(), sharedCamera.detectors.tolist())
+            attached.close()
+
+            with self.assertRaises(KeyError):
+                sharedCamera.getDetector(1000)
+
+        with self.assertRaises(FileNotFoundError):
+            SharedCamera.attach(sharedCamera.name)
+
+    def testPublish(self):
+        self.assertIsNone(getSharedCamera(LsstComCam.getName()))
+        with SharedCamera.share(LsstComCam) as sharedCamera:
+            self.assertIs(getSharedCamera(LsstComCam.getName()), sharedCamera)
+            self.assertIn(SHARED_CAMERA_ENV, os.environ)
+
+            detectorIds = [detector.getId() for detector in self.camera]
+            for method in ("fork", "spawn"):
+                with self.subTest(method=method):
+                    context = multiprocessing.get_context(method)
+                    with ProcessPoolExecutor(max_workers=2, mp_context=context) as executor:
+                        results = list(executor.map(_describeDetector, detectorIds))
+                    self.assertEqual(results, [(d.getName(), d.getSerial(), [a.getName() for a in d])
+                                               for d in self.camera])
+
+        self.assertNotIn(SHARED_CAMERA_ENV, os.environ)
+        self.assertIsNone(getSharedCamera(LsstComCam.getName()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,13 +20,34 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os.path
+import shutil
+import subprocess
+import sys
+import tempfile
 import unittest
+import unittest.mock
 import astropy
+import astropy.time
 import astropy.units as u
 import astropy.units.cds as cds
+import numpy as np
+from astropy.coordinates import AltAz
+import astro_metadata_translator
 import lsst.obs.lsst.translators  # noqa: F401 -- register the translators
+from lsst.obs.lsst.translators import (LatissTranslator, LsstCamTranslator, LsstTS8Translator,
+                                       LsstUCDCamTranslator)
+from lsst.obs.lsst._obsInfoCache import getObservationInfo, clearObservationInfoCache
+from lsst.obs.lsst.translators.coordinates import (altaz_to_icrs, icrs_to_altaz, ASTROPY_COORDINATES_ENV,
+                                                   FAST_COORDINATES_TOLERANCE)
+from lsst.obs.lsst.translators.corrections_index import compile_corrections_index, CorrectionsIndex
+from lsst.obs.lsst.translators.latiss import AUXTEL_LOCATION
+from lsst.obs.lsst.translators.lsst import (SIMONYI_LOCATION, LsstBaseTranslator,
+                                            compute_visit_id_from_exposure_group,
+                                            compute_visit_id_from_exposure_group_array,
+                                            read_detector_ids, DETECTOR_CACHE_SUFFIX)
+from lsst.utils import getPackageDir
 
-from astro_metadata_translator.tests import MetadataAssertHelper
+from astro_metadata_translator.tests import MetadataAssertHelper, read_test_file
 
 TESTDIR = os.path.abspath(os.path.dirname(__file__))
 
@@ -849,6 +870,343 @@ class LsstMetadataTranslatorTestCase(unittest.TestCase, MetadataAssertHelper):
         obsInfo = ObservationInfo(header, pedantic=True, filename=filename)
         self.assertTrue(obsInfo)
 
+    def test_header_keywords(self):
+        """Headers restricted to the keywords listed by a translator must
+        translate exactly as the full headers do."""
+        from astro_metadata_translator import MetadataTranslator, ObservationInfo
+
+        def translate(header, translator_class, filename):
+            try:
+                return ObservationInfo(header, translator_class=translator_class, pedantic=False,
+                                       filename=filename)
+            except Exception as e:
+                return type(e)
+
+        for filename in sorted(os.listdir(self.datadir)):
+            if not filename.endswith(".yaml"):
+                continue
+            with self.subTest(filename=filename):
+                header = read_test_file(filename, self.datadir)
+                translator_class = MetadataTranslator.determine_translator(header, filename=filename)
+                keywords, prefixes = translator_class.header_keywords()
+                subset = {key: value for key, value in header.items()
+                          if key in keywords or key.startswith(prefixes)}
+                self.assertEqual(translate(subset, translator_class, filename),
+                                 translate(header, translator_class, filename))
+
+        # The keywords read by the batch physical filter calculation are
+        # part of the list
+        for translator_class in MetadataTranslator.translators.values():
+            if not issubclass(translator_class, LsstBaseTranslator):
+                continue
+            with self.subTest(translator=translator_class.__name__):
+                keywords, prefixes = translator_class.header_keywords()
+                self.assertLessEqual(set(translator_class._physical_filter_keywords), keywords)
+                self.assertLessEqual(set(translator_class._physical_filter_keyword_prefixes), set(prefixes))
+
+    def test_corrections_index(self):
+        corrections_dir = os.path.join(getPackageDir("obs_lsst"), "corrections")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index_file = os.path.join(tmpdir, "corrections.sqlite3")
+            n_entries = compile_corrections_index(corrections_dir, index_file)
+            index = CorrectionsIndex(corrections_dir, index_file)
+            self.assertTrue(index.is_valid)
+            self.assertEqual(len(index), n_entries)
+            self.assertTrue(index.has_correction("LATISS", "AT_O_20190329_000022"))
+            self.assertFalse(index.has_correction("LATISS", "AT_O_20190915_000037"))
+
+            # The translator only searches for corrections it knows exist
+            with unittest.mock.patch("lsst.obs.lsst.translators.lsst.get_corrections_index",
+                                     return_value=index):
+                for filename, expected in (("latiss-AT_O_20190329_000022-ats-wfs_ccd.yaml",
+                                            [corrections_dir]),
+                                           ("latiss-AT_O_20190915_000037.yaml", [])):
+                    header = read_test_file(filename, self.datadir)
+                    translator = LatissTranslator(header, filename=filename)
+                    self.assertEqual(translator.search_paths(), expected)
+
+            local_dir = os.path.join(tmpdir, "corrections")
+            os.mkdir(local_dir)
+            correction_file = os.path.join(local_dir, "LATISS-AT_O_20190329_000022.yaml")
+            shutil.copy(os.path.join(corrections_dir, "LATISS-AT_O_20190329_000022.yaml"), local_dir)
+            compile_corrections_index(local_dir)
+            self.assertTrue(CorrectionsIndex(local_dir).is_valid)
+
+            # Copying the directory with new modification times keeps the
+            # index valid, without reading the correction files
+            copied_dir = os.path.join(tmpdir, "copied")
+            shutil.copytree(local_dir, copied_dir, copy_function=shutil.copy)
+            stat = os.stat(os.path.join(copied_dir, "LATISS-AT_O_20190329_000022.yaml"))
+            os.utime(os.path.join(copied_dir, "LATISS-AT_O_20190329_000022.yaml"),
+                     ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            with unittest.mock.patch("builtins.open", side_effect=AssertionError("File was read")):
+                self.assertTrue(CorrectionsIndex(copied_dir).is_valid)
+
+            # A removed file makes the index invalid
+            os.unlink(correction_file)
+            self.assertFalse(CorrectionsIndex(local_dir).is_valid)
+            shutil.copy(os.path.join(copied_dir, "LATISS-AT_O_20190329_000022.yaml"), local_dir)
+            self.assertTrue(CorrectionsIndex(local_dir).is_valid)
+
+            # So does a new file
+            with open(os.path.join(local_dir, "LATISS-AT_O_20190915_000037.yaml"), "w") as fd:
+                fd.write("DAYOBS: '20190915'\n")
+            index = CorrectionsIndex(local_dir)
+            self.assertFalse(index.is_valid)
+            with self.assertRaises(RuntimeError):
+                index.has_correction("LATISS", "AT_O_20190915_000037")
+
+    def test_exposure_id_arrays(self):
+        dayobs = np.array(["20190319", "2019-03-22", "2020-01-28T10:00:00", "20500101"])
+        seqnum = np.array([1, 2, 335, 99_999])
+        controller = np.array(["O", "C", "H", "C"])
+        detector_num = np.array([0, 29, 97, 188])
+
+        exposure_id = LsstCamTranslator.compute_exposure_id_array(dayobs, seqnum, controller)
+        self.assertEqual(exposure_id.dtype, np.int64)
+        expected = [LsstCamTranslator.compute_exposure_id(d, int(n), c)
+                    for d, n, c in zip(dayobs, seqnum, controller)]
+        self.assertEqual(exposure_id.tolist(), expected)
+
+        # Integer dayobs and a single controller are also accepted
+        self.assertEqual(LsstCamTranslator.compute_exposure_id_array([20190319], [1], "C").tolist(),
+                         [LsstCamTranslator.compute_exposure_id("20190319", 1, "C")])
+
+        decoded_dayobs, decoded_seqnum, decoded_controller = \
+            LsstCamTranslator.decode_exposure_id_array(exposure_id)
+        self.assertEqual(decoded_dayobs.tolist(), [20190319, 20190322, 20200128, 20500101])
+        self.assertEqual(decoded_seqnum.tolist(), seqnum.tolist())
+        self.assertEqual(decoded_controller.tolist(), controller.tolist())
+
+        detector_exposure_id = LsstCamTranslator.compute_detector_exposure_id_array(
+            exposure_id, detector_num)
+        expected = [LsstCamTranslator.compute_detector_exposure_id(int(e), int(d))
+                    for e, d in zip(exposure_id, detector_num)]
+        self.assertEqual(detector_exposure_id.tolist(), expected)
+        decoded_exposure_id, decoded_detector_num = \
+            LsstCamTranslator.decode_detector_exposure_id_array(detector_exposure_id)
+        self.assertEqual(decoded_exposure_id.tolist(), exposure_id.tolist())
+        self.assertEqual(decoded_detector_num.tolist(), detector_num.tolist())
+
+        # LATISS does not include the detector
+        self.assertEqual(LatissTranslator.compute_detector_exposure_id_array(exposure_id, 0).tolist(),
+                         exposure_id.tolist())
+        self.assertEqual(LatissTranslator.decode_detector_exposure_id_array(exposure_id)[1].tolist(),
+                         [0, 0, 0, 0])
+
+        # Test stands calculate the ID from the date
+        dateobs = np.array(["2018-07-24T10:28:45.342", "2018-07-24T10:29:12.000"])
+        self.assertEqual(LsstTS8Translator.compute_exposure_id_array(dateobs, 0).tolist(),
+                         [LsstTS8Translator.compute_exposure_id(d) for d in dateobs])
+        self.assertEqual(LsstTS8Translator.decode_exposure_id(201807241028453),
+                         ("2018-07-24T10:28:45.3", 0, None))
+        exposure_id = LsstTS8Translator.compute_exposure_id_array(dateobs, 0)
+        decoded_dateobs, decoded_seqnum, _ = LsstTS8Translator.decode_exposure_id_array(exposure_id)
+        self.assertEqual(decoded_dateobs.tolist(), ["2018-07-24T10:28:45.3", "2018-07-24T10:29:12.0"])
+        self.assertEqual(decoded_seqnum.tolist(), [0, 0])
+        self.assertEqual(LsstTS8Translator.compute_exposure_id_array(decoded_dateobs, 0).tolist(),
+                         exposure_id.tolist())
+        self.assertEqual(LsstUCDCamTranslator.decode_exposure_id(20180724102845)[0], "2018-07-24T10:28:45")
+        self.assertEqual(LsstCamTranslator.decode_exposure_id(3019031900001), (20190319, 1, "C"))
+        with self.assertRaises(ValueError):
+            LsstTS8Translator.decode_exposure_id(20180724)
+
+        for args in ((["201903"], [1], None), (["20190319"], [100_000], None),
+                     (["20190319"], [1], ["X"])):
+            with self.assertRaises(ValueError):
+                LsstCamTranslator.compute_exposure_id_array(*args)
+        with self.assertRaises(ValueError):
+            LsstCamTranslator.compute_detector_exposure_id_array([1], [1000])
+
+    def test_visit_id_arrays(self):
+        groups = ["2020-01-28T10:00:00.123", "2020-01-28T10:00:00.123+5", "2019-03-29T12:00:00.001#9999",
+                  "2020-01-28T10:00:00.123+10000", "2014-01-28T10:00:00.123+5", "3019031900001",
+                  " 12", "", "foo", "2020-01-28T10:00:00.123+"]
+        visit_ids = compute_visit_id_from_exposure_group_array(groups)
+        self.assertEqual(visit_ids.dtype, np.int64)
+        self.assertEqual(visit_ids.tolist(), [compute_visit_id_from_exposure_group(g) for g in groups])
+
+        # Header translation uses the same calculation
+        filename = "latiss-AT_O_20200128_000335.yaml"
+        header = read_test_file(filename, self.datadir)
+        translator = LatissTranslator(header, filename=filename)
+        self.assertEqual(compute_visit_id_from_exposure_group_array([translator.to_exposure_group()])[0],
+                         translator.to_visit_id())
+
+        with self.assertRaises(ValueError):
+            compute_visit_id_from_exposure_group_array(["2020-13-28T10:00:00.123"])
+
+    def test_physical_filter_arrays(self):
+        columns = {"FILTER": ["SDSSi", "SDSSi", "empty_2", None, "g"],
+                   "FILTER2": ["ND_OD0.5", "ND_OD0.5", "ND_OD1.0", None, "empty"],
+                   "GRATING": ["ronchi90lpmm", None, "", "empty_1", None],
+                   "FILTPOS": [2, 3, 7, None, 6]}
+
+        # Identical to translating each header separately
+        for translator_class in (LsstCamTranslator, LatissTranslator, LsstTS8Translator):
+            physical_filters = translator_class.compute_physical_filter_array(columns)
+            for i, physical_filter in enumerate(physical_filters):
+                header = {k: v[i] for k, v in columns.items() if v[i] is not None}
+                self.assertEqual(physical_filter,
+                                 translator_class._physical_filter_from_header(header))
+
+        self.assertEqual(LsstCamTranslator.compute_physical_filter_array(columns).tolist(),
+                         ["SDSSi~ND_OD0.5", "SDSSi~ND_OD0.5", "empty~ND_OD1.0", "unknown", "g"])
+        self.assertEqual(LatissTranslator.compute_physical_filter_array(columns).tolist(),
+                         ["SDSSi~ronchi90lpmm", "SDSSi~unknown", "empty~empty", "unknown~empty",
+                          "g~unknown"])
+        self.assertEqual(LsstTS8Translator.compute_physical_filter_array(columns).tolist(),
+                         ["g", "r", "NONE", "NONE", "y"])
+
+        # Header translation uses the same calculation
+        filename = "latiss-AT_O_20200128_000335.yaml"
+        header = read_test_file(filename, self.datadir)
+        translator = LatissTranslator(header, filename=filename)
+        columns = {k: [v] for k, v in header.items()}
+        self.assertEqual(LatissTranslator.compute_physical_filter_array(columns)[0],
+                         translator.to_physical_filter())
+
+        with self.assertRaises(ValueError):
+            LsstCamTranslator.compute_physical_filter_array({"FILTER": ["g"], "FILTER2": []})
+
+    def test_detector_mapping_cache(self):
+        policy = """
+CCDs:
+  R22_S11:
+    id: 94
+    serial: E2V-CCD250-370
+  R22_S12:
+    id: 95
+    serial: E2V-CCD250-382
+"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            policy_file = os.path.join(tmpdir, "camera.yaml")
+            cache_file = os.path.join(tmpdir, "camera" + DETECTOR_CACHE_SUFFIX)
+            with open(policy_file, "w") as fh:
+                fh.write(policy)
+
+            expected = {"R22_S11": (94, "E2V-CCD250-370"), "R22_S12": (95, "E2V-CCD250-382")}
+            self.assertEqual(read_detector_ids(policy_file), expected)
+            self.assertTrue(os.path.exists(cache_file))
+
+            # The cache is used without reading the policy file
+            with unittest.mock.patch("yaml.load", side_effect=AssertionError("YAML was read")):
+                self.assertEqual(read_detector_ids(policy_file), expected)
+
+            # Changed content of the same size is detected and the cache
+            # rewritten; set the modification time explicitly since the
+            # file system may not resolve the time between the two writes
+            stat = os.stat(policy_file)
+            with open(policy_file, "w") as fh:
+                fh.write(policy.replace("94", "93"))
+            os.utime(policy_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            mapping = read_detector_ids(policy_file)
+            self.assertEqual(mapping["R22_S11"], (93, "E2V-CCD250-370"))
+            with unittest.mock.patch("yaml.load", side_effect=AssertionError("YAML was read")):
+                self.assertEqual(read_detector_ids(policy_file), mapping)
+
+            # A new modification time with the same content, as after
+            # copying or installing, is checked by content once and the
+            # cache updated so that the policy is not hashed again
+            stat = os.stat(policy_file)
+            os.utime(policy_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            with unittest.mock.patch("yaml.load", side_effect=AssertionError("YAML was read")):
+                self.assertEqual(read_detector_ids(policy_file), mapping)
+                with unittest.mock.patch("lsst.obs.lsst.translators.lsst._hash_file",
+                                         side_effect=AssertionError("Policy was hashed")):
+                    self.assertEqual(read_detector_ids(policy_file), mapping)
+
+    def test_observation_info_cache(self):
+        header = read_test_file("latiss-AT_O_20200128_000379.yaml", dir=self.datadir)
+        clearObservationInfoCache()
+        with unittest.mock.patch("lsst.obs.lsst._obsInfoCache.ObservationInfo",
+                                 wraps=astro_metadata_translator.ObservationInfo) as mock:
+            obsInfo = getObservationInfo(header)
+            self.assertEqual(obsInfo.instrument, "LATISS")
+
+            # Same content, whether or not the translator is specified
+            self.assertIs(getObservationInfo(dict(header), translator_class=LatissTranslator), obsInfo)
+            self.assertEqual(mock.call_count, 1)
+
+            # Or whether or not the file name is given
+            self.assertIs(getObservationInfo(dict(header), translator_class=LatissTranslator,
+                                             filename="raw.fits"), obsInfo)
+            self.assertIs(getObservationInfo(dict(header), filename="other.fits"), obsInfo)
+            self.assertEqual(mock.call_count, 1)
+
+            # Changed content is translated again
+            header["EXPTIME"] = header["EXPTIME"] + 1.0
+            modified = getObservationInfo(header)
+            self.assertIsNot(modified, obsInfo)
+            self.assertEqual(mock.call_count, 2)
+
+        # Headers are corrected in place whether or not the translation
+        # was cached
+        fixed = read_test_file("latiss-AT_O_20190306_000014.yaml", dir=self.datadir)
+        obsInfo = getObservationInfo(fixed)
+        header = read_test_file("latiss-AT_O_20190306_000014.yaml", dir=self.datadir)
+        self.assertNotIn("OBSID", header)
+        self.assertIs(getObservationInfo(header), obsInfo)
+        for key in ("OBSID", "DAYOBS", "SEQNUM"):
+            self.assertEqual(header[key], fixed[key])
+
+    def test_fast_coordinates(self):
+        obstime = astropy.time.Time("2020-03-01T05:00", scale="tai")
+        for location in (SIMONYI_LOCATION, AUXTEL_LOCATION):
+            for az, alt in ((10.0, 20.0), (135.0, 45.0), (280.0, 85.0)):
+                with self.subTest(location=location, az=az, alt=alt):
+                    altaz = AltAz(az=az*u.deg, alt=alt*u.deg, obstime=obstime, location=location)
+                    radec = altaz_to_icrs(altaz)
+                    self.assertEqual(radec.frame.name, "icrs")
+                    self.assertEqual(radec.obstime, obstime)
+                    with unittest.mock.patch.dict(os.environ, {ASTROPY_COORDINATES_ENV: "1"}):
+                        expected = altaz_to_icrs(altaz)
+                        expected_altaz = icrs_to_altaz(expected)
+                    self.assertLess(radec.separation(expected), FAST_COORDINATES_TOLERANCE)
+
+                    round_trip = icrs_to_altaz(expected)
+                    self.assertEqual(round_trip.frame.name, "altaz")
+                    self.assertLess(round_trip.separation(expected_altaz), FAST_COORDINATES_TOLERANCE)
+                    self.assertLess(round_trip.separation(altaz), FAST_COORDINATES_TOLERANCE)
+
+    def test_import_surface(self):
+        # Run in a fresh interpreter since this process has already
+        # imported everything.
+        script = """
+import sys, time
+heavy = ("lsst.afw", "lsst.daf.persistence", "lsst.daf.butler", "lsst.obs.base")
+start = time.perf_counter()
+import astro_metadata_translator
+baseline = time.perf_counter() - start
+start = time.perf_counter()
+import lsst.obs.lsst.translators
+elapsed = time.perf_counter() - start
+before = [m for m in heavy if m in sys.modules]
+lsst.obs.lsst.LsstCam
+after = [m for m in heavy if m in sys.modules]
+print(baseline, elapsed, ",".join(before), ",".join(after))
+"""
+        result = subprocess.run([sys.executable, "-c", script], check=True, stdout=subprocess.PIPE,
+                                universal_newlines=True)
+        baseline, elapsed, before, after = result.stdout.rstrip("\n").split(" ")
+        self.assertEqual(before, "", "Translators imported the data management stack")
+        # Using an instrument class imports the stack on demand
+        self.assertIn("lsst.obs.base", after.split(","))
+        # The translators add well under a tenth to the cost of importing
+        # astro_metadata_translator, which they need anyway. Half allows
+        # for noisy test machines but not for importing the stack.
+        self.assertLess(float(elapsed), 0.5*float(baseline))
+
+        # The classes exported by the package are still available.
+        import lsst.obs.lsst
+        self.assertIn("LsstCamMapper", lsst.obs.lsst.__all__)
+        self.assertIs(lsst.obs.lsst.LsstCam, lsst.obs.lsst._instrument.LsstCam)
+
+        # Other names do not trigger a search for a submodule
+        with unittest.mock.patch("importlib.import_module",
+                                 side_effect=AssertionError("Module imported")):
+            self.assertFalse(hasattr(lsst.obs.lsst, "LsstCamm"))
+
 
 if __name__ == "__main__":
     unittest.main()